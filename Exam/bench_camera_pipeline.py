@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+카메라 파이프라인 벤치마크
+
+실제 카메라 대신 합성 영상 소스(camera/synthetic_source.py)로 캡처 엔진을 돌리고,
+/mjpeg, /mjpeg-async 시청자 N명을 같은 프로세스 안에서 동시에 붙여
+시청자별 전달 fps, 프레임 지연(캡처 → 전달) 백분위, 시청자당 CPU, 초당 바이트를 측정합니다.
+--h264로 H.264(/h264.mp4) 시청자를 붙이면 같은 조건에서 MJPEG과 대역폭/CPU를 비교할 수 있습니다
+(ffmpeg 프로세스 CPU는 psutil이 있을 때만 측정).
+라즈베리 파이에 올리기 전에 노트북에서 변경 전후를 비교하는 용도입니다.
+
+사용 예:
+    python Exam/bench_camera_pipeline.py --mjpeg 4 --async 4 --duration 10
+    python Exam/bench_camera_pipeline.py --mjpeg 8 --size full --pattern static
+    python Exam/bench_camera_pipeline.py --async 4 --send-delay 50 --json result.json
+    python Exam/bench_camera_pipeline.py --mjpeg 2 --async 0 --h264 2 --size half
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from camera.capture_engine import capture_engine
+from camera.frame import VARIANT_SCALES
+from camera.h264_stream import h264_stream, stream_h264, ffmpeg_available
+from camera.mjpeg_streamer import generate_mjpeg
+from camera.stream_control import viewer_registry
+from services.camera_service import generate_async_mjpeg
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 캡처 시각 기록 보관 개수 (seq → captured_at)
+CAPTURE_LOG_SIZE = 1000
+
+
+class CaptureProbe:
+    """캡처 엔진의 모든 프레임 seq와 캡처 시각을 기록 (지연 계산용)"""
+
+    def __init__(self):
+        self.captured_at = {}
+        self.frames = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    def _run(self):
+        seq = 0
+        while not self._stop.is_set():
+            frame = capture_engine.wait_for_frame_sync(seq, timeout=0.5)
+            if frame is None:
+                continue
+            seq = frame.seq
+            self.frames += 1
+            self.captured_at[seq] = frame.captured_at
+            self.captured_at.pop(seq - CAPTURE_LOG_SIZE, None)
+
+    def lookup(self, seq):
+        captured_at = self.captured_at.get(seq)
+        if captured_at is None:
+            latest = capture_engine.get_latest()
+            if latest is not None and latest.seq == seq:
+                captured_at = latest.captured_at
+        return captured_at
+
+
+class ViewerResult:
+    def __init__(self, route, scale):
+        self.route = route
+        self.scale = scale
+        self.frames = 0
+        self.bytes = 0
+        self.latencies = []
+        self.session = None
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def cpu_seconds():
+    """프로세스 전체(모든 스레드) CPU 시간"""
+    return time.process_time()
+
+
+async def start_viewer(route, scale):
+    """시청자 하나 연결 - 첫 청크를 받은 뒤 자신의 세션을 찾아 둠"""
+    result = ViewerResult(route, scale)
+    if route == "/h264.mp4":
+        # fragment(GOP) 단위 전달이라 프레임별 지연은 측정하지 않음
+        gen = stream_h264()
+        await gen.__anext__()
+        return result, gen
+    known = {session.id for session in viewer_registry.sessions()}
+    gen = generate_mjpeg(scale) if route == "/mjpeg" else generate_async_mjpeg(scale)
+    await gen.__anext__()
+    for session in viewer_registry.sessions():
+        if session.id not in known and session.route == route:
+            result.session = session
+            break
+    return result, gen
+
+
+async def run_viewer(result, gen, probe, send_delay, stop_at):
+    """청크를 계속 받으며 지연/전송량 기록 - send_delay로 느린 네트워크를 흉내 냄"""
+    try:
+        async for chunk in gen:
+            now = time.monotonic()
+            if now >= stop_at:
+                break
+            result.frames += 1
+            result.bytes += len(chunk)
+            if result.session is not None:
+                captured_at = probe.lookup(result.session.last_seq)
+                if captured_at is not None:
+                    result.latencies.append(now - captured_at)
+            if send_delay:
+                await asyncio.sleep(send_delay)
+    finally:
+        await gen.aclose()
+
+
+async def run_benchmark(args):
+    scale = VARIANT_SCALES[args.size] if args.size else None
+    probe = CaptureProbe()
+
+    # 1단계: 시청자 없이 캡처만 - 기준 CPU 측정
+    capture_engine.acquire()
+    probe.start()
+    await asyncio.sleep(args.warmup)  # 합성 프레임 준비/첫 프레임 대기
+    cpu_start, wall_start = cpu_seconds(), time.monotonic()
+    await asyncio.sleep(args.warmup)
+    baseline_cpu = (cpu_seconds() - cpu_start) / (time.monotonic() - wall_start)
+
+    # 2단계: 시청자 연결 후 측정
+    viewers = []
+    for _ in range(args.mjpeg):
+        viewers.append(await start_viewer("/mjpeg", scale or 2))
+    for _ in range(args.async_viewers):
+        viewers.append(await start_viewer("/mjpeg-async", scale or 1))
+    if args.h264 and not ffmpeg_available():
+        print("⚠️ ffmpeg가 없어 H.264 시청자는 건너뜀")
+        args.h264 = 0
+    if args.h264:
+        h264_stream.scale = scale or h264_stream.scale
+        h264_stream.configure(args.h264_bitrate, args.h264_gop)
+    for _ in range(args.h264):
+        viewers.append(await start_viewer("/h264.mp4", h264_stream.scale))
+    encoder_process = None
+    if psutil is not None and h264_stream.process is not None:
+        encoder_process = psutil.Process(h264_stream.process.pid)
+        encoder_process.cpu_percent()
+    print(f"👀 시청자 {len(viewers)}명 연결 완료 - {args.duration}초 측정")
+
+    captured_before = probe.frames
+    cpu_start, wall_start = cpu_seconds(), time.monotonic()
+    stop_at = wall_start + args.duration
+    await asyncio.gather(*[
+        run_viewer(result, gen, probe, args.send_delay / 1000.0, stop_at)
+        for result, gen in viewers
+    ])
+    elapsed = time.monotonic() - wall_start
+    total_cpu = (cpu_seconds() - cpu_start) / elapsed
+    encoder_cpu = None
+    if encoder_process is not None:
+        try:
+            encoder_cpu = encoder_process.cpu_percent()
+        except psutil.Error:
+            pass
+    h264_status = h264_stream.get_status()
+    captured_fps = (probe.frames - captured_before) / elapsed
+    engine_status = capture_engine.get_status()
+
+    probe.stop()
+    capture_engine.release()
+
+    results = [result for result, _ in viewers]
+    report = {
+        "config": {
+            "width": capture_engine.width,
+            "height": capture_engine.height,
+            "fps": capture_engine.fps,
+            "passthrough": capture_engine.passthrough,
+            "pattern": args.pattern,
+            "mjpeg_viewers": args.mjpeg,
+            "async_viewers": args.async_viewers,
+            "h264_viewers": args.h264,
+            "duration": round(elapsed, 2),
+            "send_delay_ms": args.send_delay,
+        },
+        "capture_fps": round(captured_fps, 2),
+        "cpu_percent_baseline": round(baseline_cpu * 100, 1),
+        "cpu_percent_total": round(total_cpu * 100, 1),
+        "cpu_percent_per_viewer": round((total_cpu - baseline_cpu) * 100 / max(len(results), 1), 2),
+        "routes": {},
+        "broadcaster": engine_status["broadcaster"],
+    }
+    if args.h264:
+        report["h264"] = {
+            "bitrate": h264_status["bitrate"],
+            "gop": h264_status["gop"],
+            "frames_in": h264_status["frames_in"],
+            "dropped_frames": h264_status["dropped_frames"],
+            "encoder_cpu_percent": encoder_cpu,
+        }
+    for route in ("/mjpeg", "/mjpeg-async", "/h264.mp4"):
+        group = [result for result in results if result.route == route]
+        if not group:
+            continue
+        latencies = [value for result in group for value in result.latencies]
+        report["routes"][route] = {
+            "viewers": len(group),
+            "scale": group[0].scale,
+            "fps_per_viewer": round(sum(result.frames for result in group) / len(group) / elapsed, 2),
+            "min_viewer_fps": round(min(result.frames for result in group) / elapsed, 2),
+            "bytes_per_sec": round(sum(result.bytes for result in group) / elapsed),
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50) * 1000, 2),
+                "p95": round(percentile(latencies, 95) * 1000, 2),
+                "p99": round(percentile(latencies, 99) * 1000, 2),
+                "max": round(max(latencies, default=0.0) * 1000, 2),
+            },
+        }
+    return report
+
+
+def print_report(report):
+    config = report["config"]
+    print("=" * 60)
+    print(f"📊 {config['width']}x{config['height']}@{config['fps']} "
+          f"(passthrough={config['passthrough']}, pattern={config['pattern']})")
+    print(f"   캡처 fps: {report['capture_fps']}")
+    print(f"   CPU: 기준 {report['cpu_percent_baseline']}% → 전체 {report['cpu_percent_total']}% "
+          f"(시청자당 {report['cpu_percent_per_viewer']}%)")
+    for route, stats in report["routes"].items():
+        latency = stats["latency_ms"]
+        print(f"   {route} x{stats['viewers']} (1/{stats['scale']}): "
+              f"{stats['fps_per_viewer']} fps/시청자 (최소 {stats['min_viewer_fps']}), "
+              f"{stats['bytes_per_sec'] / 1024:.0f} KB/s, "
+              f"지연 p50 {latency['p50']}ms / p95 {latency['p95']}ms / p99 {latency['p99']}ms")
+    if "h264" in report:
+        h264 = report["h264"]
+        encoder_cpu = h264["encoder_cpu_percent"]
+        print(f"   H.264 {h264['bitrate']} GOP {h264['gop']}: 입력 {h264['frames_in']}프레임 "
+              f"(버림 {h264['dropped_frames']}), ffmpeg CPU "
+              f"{'측정 안 됨 (psutil 없음)' if encoder_cpu is None else f'{encoder_cpu}%'}")
+    broadcaster = report["broadcaster"]
+    print(f"   인코딩: {broadcaster.get('encoded_frames')} / 발행: {broadcaster.get('published_frames')}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="카메라 파이프라인 벤치마크 (합성 영상 소스)")
+    parser.add_argument("--mjpeg", type=int, default=2, help="/mjpeg 시청자 수")
+    parser.add_argument("--async", dest="async_viewers", type=int, default=2, help="/mjpeg-async 시청자 수")
+    parser.add_argument("--h264", type=int, default=0, help="/h264.mp4 시청자 수 (ffmpeg 필요)")
+    parser.add_argument("--h264-bitrate", default=None, help="H.264 비트레이트 (예: 300k)")
+    parser.add_argument("--h264-gop", type=int, default=None, help="H.264 GOP 길이(프레임)")
+    parser.add_argument("--size", choices=sorted(VARIANT_SCALES), default=None,
+                        help="모든 시청자의 해상도 (기본: 각 경로의 기본값)")
+    parser.add_argument("--duration", type=float, default=10.0, help="측정 시간(초)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="기준 측정 전후 대기 시간(초)")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--pattern", choices=["moving", "static"], default="moving")
+    parser.add_argument("--no-passthrough", action="store_true", help="BGR 캡처 후 인코딩 경로 측정")
+    parser.add_argument("--send-delay", type=float, default=0.0, help="청크마다 추가할 전송 지연(ms)")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    capture_engine.device = f"synthetic:{args.pattern}"
+    capture_engine.requested = (args.width, args.height, args.fps)
+    capture_engine.width, capture_engine.height, capture_engine.fps = capture_engine.requested
+    capture_engine.passthrough = not args.no_passthrough
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WebRTC 루프백 테스트
+
+같은 프로세스 안에서 클라이언트 피어(aiortc)를 만들어 서버 쪽 webrtc_service와 직접
+오퍼/앤서를 주고받습니다 (시그널링 WebSocket 없이). 합성 영상 소스를 쓰므로 카메라 없이
+노트북에서도 돌릴 수 있습니다.
+
+측정 항목:
+  - 연결 후 첫 영상 프레임까지 걸린 시간
+  - 수신 fps, 프레임 간격 지터
+  - 데이터 채널 명령 왕복 시간 ({"type": "status"} 명령)
+
+사용 예:
+    python Exam/test_webrtc_loopback.py --duration 10
+    python Exam/test_webrtc_loopback.py --size full --audio
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from camera.capture_engine import capture_engine
+from camera.frame import VARIANT_SCALES
+from services.webrtc_service import webrtc_service, AIORTC_AVAILABLE
+
+if AIORTC_AVAILABLE:
+    from aiortc import RTCPeerConnection, RTCSessionDescription
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+async def run_loopback(args):
+    client = RTCPeerConnection()
+    client.addTransceiver("video", direction="recvonly")
+    if args.audio:
+        client.addTransceiver("audio", direction="recvonly")
+    channel = client.createDataChannel("commands")
+
+    frame_times = []
+    audio_frames = 0
+    first_frame = asyncio.get_running_loop().create_future()
+    pending = {}
+    round_trips = []
+
+    @client.on("track")
+    def on_track(track):
+        async def consume():
+            nonlocal audio_frames
+            while True:
+                try:
+                    frame = await track.recv()
+                except Exception:
+                    return
+                if track.kind == "audio":
+                    audio_frames += 1
+                    continue
+                frame_times.append(time.monotonic())
+                if not first_frame.done():
+                    first_frame.set_result((frame.width, frame.height))
+        asyncio.ensure_future(consume())
+
+    @channel.on("message")
+    def on_message(message):
+        response = json.loads(message)
+        sent_at = pending.pop(response.get("command", {}).get("id"), None)
+        if sent_at is not None:
+            round_trips.append(time.monotonic() - sent_at)
+
+    # 오퍼/앤서 교환 (실제 서버에서는 /ws/webrtc가 이 역할)
+    started = time.monotonic()
+    await client.setLocalDescription(await client.createOffer())
+    server_pc, answer = await webrtc_service.create_answer(
+        client.localDescription.sdp, "offer", VARIANT_SCALES[args.size], args.audio)
+    await client.setRemoteDescription(RTCSessionDescription(sdp=answer, type="answer"))
+
+    width, height = await asyncio.wait_for(first_frame, timeout=10)
+    first_frame_ms = (time.monotonic() - started) * 1000
+    print(f"✅ 첫 프레임 수신 ({width}x{height}) - {first_frame_ms:.0f}ms")
+
+    # 측정 구간 - 데이터 채널 명령을 주기적으로 보내 왕복 시간 측정
+    measure_start = len(frame_times)
+    stop_at = time.monotonic() + args.duration
+    command_id = 0
+    while time.monotonic() < stop_at:
+        if channel.readyState == "open":
+            command_id += 1
+            pending[command_id] = time.monotonic()
+            channel.send(json.dumps({"type": "status", "id": command_id}))
+        await asyncio.sleep(args.command_interval)
+
+    times = frame_times[measure_start:]
+    intervals = [b - a for a, b in zip(times, times[1:])]
+    report = {
+        "size": args.size,
+        "first_frame_ms": round(first_frame_ms, 1),
+        "video_fps": round(len(times) / args.duration, 2),
+        "frame_interval_ms": {
+            "p50": round(percentile(intervals, 50) * 1000, 2),
+            "p95": round(percentile(intervals, 95) * 1000, 2),
+            "max": round(max(intervals, default=0.0) * 1000, 2),
+        },
+        "audio_frames": audio_frames,
+        "command_rtt_ms": {
+            "count": len(round_trips),
+            "p50": round(percentile(round_trips, 50) * 1000, 2),
+            "p95": round(percentile(round_trips, 95) * 1000, 2),
+        },
+        "server": webrtc_service.get_status(),
+    }
+
+    await client.close()
+    await webrtc_service.close(server_pc)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebRTC 루프백 테스트 (합성 영상 소스)")
+    parser.add_argument("--size", choices=sorted(VARIANT_SCALES), default="half")
+    parser.add_argument("--duration", type=float, default=10.0, help="측정 시간(초)")
+    parser.add_argument("--audio", action="store_true", help="서버 마이크 오디오 트랙도 받기")
+    parser.add_argument("--command-interval", type=float, default=0.5, help="명령 전송 간격(초)")
+    parser.add_argument("--pattern", choices=["moving", "static"], default="moving")
+    parser.add_argument("--camera", action="store_true", help="합성 소스 대신 실제 카메라 사용")
+    args = parser.parse_args()
+
+    if not AIORTC_AVAILABLE:
+        print("❌ aiortc가 설치되어 있지 않음 (pip install aiortc)")
+        sys.exit(1)
+    if not args.camera:
+        capture_engine.device = f"synthetic:{args.pattern}"
+
+    report = asyncio.run(run_loopback(args))
+    print("=" * 60)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# camera/burst.py - 연속 촬영 후 가장 선명한 한 장 고르기 (움직이는 반려동물 사진용)
+import os
+import time
+import threading
+import logging
+import cv2
+import numpy as np
+from typing import List, NamedTuple, Optional
+
+from camera.capture_engine import capture_engine
+from camera.frame import Frame
+from camera.frame_ring import frame_ring
+
+logger = logging.getLogger(__name__)
+
+# 연속 촬영 설정
+# 버튼을 누르기 직전 프레임 (링 버퍼에서, 복사/재캡처 없음)
+BURST_PAST_FRAMES = 8
+# 이 시간보다 오래된 링 버퍼 프레임은 후보에서 제외 (버튼 누른 순간과 너무 먼 사진 방지)
+BURST_PAST_SECONDS = 1.0
+# 버튼을 누른 뒤 이어서 받을 프레임
+BURST_NEXT_FRAMES = 8
+BURST_MAX_FRAMES = 60
+# 다음 프레임 하나를 기다리는 최대 시간 (장치가 막 열리는 경우 포함)
+BURST_FRAME_TIMEOUT = 3.0
+# 선명도는 축소 그레이 디코딩본(640x480 → 160x120)으로 계산 - 전체 디코딩 없음
+BURST_SCORE_SCALE = 4
+
+
+class BurstShot(NamedTuple):
+    """연속 촬영 결과 - jpeg은 고른 프레임의 원본 JPEG"""
+    frame: Frame
+    score: float
+    scores: List[float]
+    candidates: int
+    jpeg: bytes
+
+
+def sharpness(gray: np.ndarray) -> float:
+    """라플라시안 분산 - 값이 클수록 경계가 또렷함 (흔들리거나 움직임 번진 사진은 작음)"""
+    laplacian = cv2.Laplacian(gray, cv2.CV_32F)
+    _, stddev = cv2.meanStdDev(laplacian)
+    return float(stddev[0][0] ** 2)
+
+
+class BurstCapture:
+    """
+    최근 past장(링 버퍼) + 이후 next장(라이브 프레임)에서 가장 선명한 한 장을 고름
+
+    캡처 엔진에 잠시 소비자로 붙어 공유 파이프라인의 프레임만 쓰므로 장치를 따로 열지 않는다.
+    후보마다 1/BURST_SCORE_SCALE 그레이 축소 디코딩본으로 점수를 매기고,
+    고른 프레임은 패스스루 원본 JPEG을 그대로 돌려준다 (재인코딩 없음).
+    블로킹 함수이므로 이벤트 루프에서는 run_in_executor로 호출한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bursts = 0
+        self.last_result: Optional[dict] = None
+
+    def _past_frames(self, count: int) -> List[Frame]:
+        """링 버퍼의 최근 프레임을 Frame으로 (참조만 - 복사/인코딩 없음)"""
+        if count <= 0:
+            return []
+        entries = frame_ring.snapshot(since=time.monotonic() - BURST_PAST_SECONDS)[-count:]
+        return [entry.to_frame() for entry in entries]
+
+    def capture(self, past: int = BURST_PAST_FRAMES, following: int = BURST_NEXT_FRAMES,
+                save_path: Optional[str] = None) -> Optional[BurstShot]:
+        """연속 촬영 후 가장 선명한 프레임 반환 (save_path가 있으면 그 한 장만 저장, 실패 시 None)"""
+        past = max(0, min(past, BURST_MAX_FRAMES))
+        following = max(0, min(following, BURST_MAX_FRAMES))
+        started = time.monotonic()
+        capture_engine.acquire()
+        try:
+            frames = self._past_frames(past) if capture_engine.is_streaming else []
+            last_seq = frames[-1].seq if frames else capture_engine.frame_seq
+            # 링 버퍼가 비어 있으면(방금 연 경우) 최소 한 장은 라이브로 받음
+            for _ in range(following if frames else max(following, 1)):
+                frame = capture_engine.wait_for_frame_sync(last_seq, BURST_FRAME_TIMEOUT)
+                if frame is None:
+                    break
+                frames.append(frame)
+                last_seq = frame.seq
+        finally:
+            capture_engine.release()
+        if not frames:
+            logger.warning("⚠️ 연속 촬영: 받은 프레임 없음")
+            return None
+
+        scores = []
+        for frame in frames:
+            gray = frame.get_gray(BURST_SCORE_SCALE)
+            scores.append(sharpness(gray) if gray is not None else -1.0)
+        best = int(np.argmax(scores))
+        frame = frames[best]
+        jpeg = frame.get_jpeg()
+        if jpeg is None:
+            return None
+
+        if save_path:
+            directory = os.path.dirname(save_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(save_path, "wb") as f:
+                f.write(jpeg)
+            logger.info(f"📸 베스트 샷 저장: {save_path}")
+
+        shot = BurstShot(frame, scores[best], scores, len(frames), jpeg)
+        with self._lock:
+            self.bursts += 1
+            self.last_result = {
+                "seq": frame.seq,
+                "score": round(shot.score, 1),
+                "candidates": shot.candidates,
+                "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+            }
+        logger.info(f"📸 연속 촬영: 후보 {len(frames)}장 중 #{best} 선택 (선명도 {shot.score:.1f}, "
+                    f"최저 {min(scores):.1f})")
+        return shot
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return {"bursts": self.bursts, "last": self.last_result}
+
+
+# 전역 인스턴스
+burst_capture = BurstCapture()
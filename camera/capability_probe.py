@@ -0,0 +1,280 @@
+# camera/capability_probe.py - 카메라 지원 모드 프로브 + 장치별 디스크 캐시
+import os
+import re
+import cv2
+import json
+import time
+import shutil
+import threading
+import subprocess
+import logging
+from typing import Callable, Dict, List, Optional
+
+from camera.synthetic_source import is_synthetic_device
+
+logger = logging.getLogger(__name__)
+
+# 프로브 결과 캐시 파일 (장치 식별자별로 한 번만 프로브)
+CAPABILITY_CACHE_PATH = "camera_caps.json"
+# 벤치마크할 포맷 - 패스스루/스트리밍은 MJPG만 쓰므로 다른 포맷은 목록에만 남김
+PROBE_FOURCCS = ("MJPG",)
+# 실제로 열어서 측정할 최대 모드 수 (요청 해상도에 가까운 순)
+PROBE_MAX_MODES = 6
+# 모드마다 첫 프레임을 기다리는 최대 시간
+PROBE_FRAME_TIMEOUT = 3.0
+# 지원 모드 목록 조회 도구 (v4l-utils) - 없으면 FALLBACK_MODES를 직접 시험
+V4L2_CTL_BINARY = "v4l2-ctl"
+V4L2_CTL_TIMEOUT = 5.0
+FALLBACK_MODES = ((640, 480, 30), (320, 240, 30), (1280, 720, 30), (1920, 1080, 30), (640, 480, 15))
+
+SYSFS_VIDEO4LINUX = "/sys/class/video4linux"
+
+_FORMAT_RE = re.compile(r"\[\d+\]: '(\w{4})'")
+_SIZE_RE = re.compile(r"Size: Discrete (\d+)x(\d+)")
+_INTERVAL_RE = re.compile(r"Interval: Discrete [\d.]+s \(([\d.]+) fps\)")
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _usb_identity(device_dir: str) -> Optional[str]:
+    """sysfs 장치 디렉터리에서 위로 올라가며 USB VID:PID(:시리얼) 찾기"""
+    path = os.path.realpath(device_dir)
+    for _ in range(4):
+        vendor = _read_text(os.path.join(path, "idVendor"))
+        if vendor:
+            product = _read_text(os.path.join(path, "idProduct")) or "0000"
+            serial = _read_text(os.path.join(path, "serial"))
+            return f"usb:{vendor}:{product}" + (f":{serial}" if serial else "")
+        path = os.path.dirname(path)
+    return None
+
+
+def device_identity(device) -> str:
+    """
+    캐시 키로 쓰는 장치 식별자 - USB VID:PID:시리얼 + 카드 이름
+
+    /dev/video 번호는 재부팅/재연결마다 바뀔 수 있으므로 sysfs에서 실제 장치 정보를 읽는다.
+    읽을 수 없으면 장치 경로를 그대로 쓴다.
+    """
+    if is_synthetic_device(device) or not isinstance(device, str):
+        return str(device)
+    node = os.path.basename(os.path.realpath(device))
+    sysfs = os.path.join(SYSFS_VIDEO4LINUX, node)
+    parts = [part for part in (_usb_identity(os.path.join(sysfs, "device")),
+                               _read_text(os.path.join(sysfs, "name"))) if part]
+    return "|".join(parts) if parts else device
+
+
+def fourcc_to_str(code: float) -> str:
+    code = int(code)
+    return "".join(chr((code >> 8 * index) & 0xFF) for index in range(4)).strip("\x00")
+
+
+def list_modes(device: str) -> List[dict]:
+    """v4l2-ctl --list-formats-ext로 (포맷, 해상도, fps) 조합 나열 (도구가 없거나 실패하면 빈 목록)"""
+    binary = shutil.which(V4L2_CTL_BINARY)
+    if binary is None:
+        return []
+    try:
+        output = subprocess.run([binary, "-d", device, "--list-formats-ext"], capture_output=True,
+                                text=True, timeout=V4L2_CTL_TIMEOUT).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"⚠️ 카메라 모드 목록 조회 실패: {e}")
+        return []
+
+    modes = []
+    fourcc = None
+    size = None
+    for line in output.splitlines():
+        match = _FORMAT_RE.search(line)
+        if match:
+            fourcc, size = match.group(1), None
+            continue
+        match = _SIZE_RE.search(line)
+        if match:
+            size = (int(match.group(1)), int(match.group(2)))
+            continue
+        match = _INTERVAL_RE.search(line)
+        if match and fourcc and size:
+            modes.append({"fourcc": fourcc, "width": size[0], "height": size[1],
+                          "fps": round(float(match.group(1)))})
+    return modes
+
+
+def benchmark_mode(device: str, mode: dict) -> dict:
+    """장치를 열어 모드를 적용하고 열기/첫 프레임 시간과 실제 적용 값을 측정"""
+    result = dict(mode, verified=False)
+    started = time.perf_counter()
+    cap = cv2.VideoCapture(device, cv2.CAP_V4L2)
+    try:
+        if not cap.isOpened():
+            result["error"] = "장치 열기 실패"
+            return result
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode["fourcc"]))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode["width"])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode["height"])
+        cap.set(cv2.CAP_PROP_FPS, mode["fps"])
+        opened = time.perf_counter()
+        result["open_ms"] = round((opened - started) * 1000, 1)
+
+        while not cap.grab():
+            if time.perf_counter() - opened > PROBE_FRAME_TIMEOUT:
+                result["error"] = "첫 프레임 시간 초과"
+                return result
+            time.sleep(0.01)
+        result["first_frame_ms"] = round((time.perf_counter() - opened) * 1000, 1)
+
+        actual = {
+            "fourcc": fourcc_to_str(cap.get(cv2.CAP_PROP_FOURCC)),
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": round(cap.get(cv2.CAP_PROP_FPS)),
+        }
+        result["actual"] = actual
+        # 드라이버가 다른 값으로 바꿔 받아들였으면 검증 실패 (fps는 드라이버마다 보고가 달라 제외)
+        result["verified"] = (actual["fourcc"] == mode["fourcc"] and actual["width"] == mode["width"]
+                              and actual["height"] == mode["height"])
+        return result
+    finally:
+        cap.release()
+
+
+class CameraCapabilities:
+    """
+    장치별 지원 모드 프로브 결과 (디스크 캐시)
+
+    처음 보는 장치는 지원 모드를 나열하고, 요청 해상도에 가까운 모드부터 실제로 열어
+    열기/첫 프레임 시간과 드라이버가 실제로 적용한 값을 측정한 뒤 장치 식별자별로 저장한다.
+    이후 캡처 엔진은 select_mode()로 검증된 모드를 바로 적용하므로
+    매번 cap.set()을 시도하고 결과를 확인하는 과정을 반복하지 않는다.
+    """
+
+    def __init__(self, cache_path: str = CAPABILITY_CACHE_PATH):
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        # 프로브와 캡처 엔진이 장치를 동시에 열지 않도록 - 프로브는 모드 하나를 측정하는 동안,
+        # 캡처 엔진은 장치를 여는 동안 보유
+        self.device_lock = threading.Lock()
+        self._cache: Optional[Dict[str, dict]] = None
+
+    def _load(self) -> Dict[str, dict]:
+        """(_lock 보유 상태에서 호출) 처음 사용할 때 캐시 파일 읽기"""
+        if self._cache is None:
+            try:
+                with open(self.cache_path, encoding="utf-8") as f:
+                    self._cache = json.load(f)
+            except FileNotFoundError:
+                self._cache = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ 카메라 모드 캐시 읽기 실패 - 다시 프로브: {e}")
+                self._cache = {}
+        return self._cache
+
+    def _save(self) -> None:
+        """(_lock 보유 상태에서 호출) 임시 파일에 쓰고 교체 (쓰다 끊겨도 기존 캐시 유지)"""
+        temp_path = self.cache_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._cache, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.cache_path)
+
+    def get(self, device) -> Optional[dict]:
+        """캐시된 프로브 결과 (없으면 None)"""
+        identity = device_identity(device)
+        with self._lock:
+            return self._load().get(identity)
+
+    def probe(self, device, width: int, height: int, fps: int, force: bool = False,
+              busy: Optional[Callable[[], bool]] = None) -> Optional[dict]:
+        """
+        장치 프로브 (블로킹 - 이벤트 루프 밖에서, 장치를 쓰는 소비자가 없을 때 호출)
+
+        캐시가 있으면 force=True가 아닌 한 그대로 반환한다. 합성 소스는 모든 모드를 받아들이므로 생략.
+        백그라운드로 돌 때는 busy()가 True가 되면(캡처 엔진이 장치를 쓰기 시작하면) 중단하고
+        결과를 캐시하지 않는다 (다음 시작 때 다시 프로브). busy() 확인과 모드 측정은 device_lock을
+        잡은 채 하므로, 확인 직후 캡처 엔진이 장치를 열어 측정과 겹치는 일은 없다.
+        """
+        if is_synthetic_device(device):
+            return None
+        identity = device_identity(device)
+        with self._lock:
+            cached = self._load().get(identity)
+        if cached is not None and not force:
+            return cached
+
+        started = time.perf_counter()
+        listed = list_modes(device)
+        candidates = [mode for mode in listed if mode["fourcc"] in PROBE_FOURCCS]
+        if not candidates:
+            candidates = [{"fourcc": PROBE_FOURCCS[0], "width": w, "height": h, "fps": f}
+                          for w, h, f in FALLBACK_MODES]
+        # 요청 해상도에 가까운 순, 같은 해상도면 요청 fps에 가까운 순
+        candidates.sort(key=lambda mode: (abs(mode["width"] * mode["height"] - width * height),
+                                          abs(mode["fps"] - fps)))
+        results = []
+        for mode in candidates[:PROBE_MAX_MODES]:
+            with self.device_lock:
+                if busy is not None and busy():
+                    logger.info("📷 카메라 사용 시작 - 모드 프로브 중단 (다음 시작 때 다시 시도)")
+                    return cached
+                results.append(benchmark_mode(device, mode))
+
+        entry = {
+            "device": device,
+            "probed_at": time.time(),
+            "probe_ms": round((time.perf_counter() - started) * 1000, 1),
+            "formats": listed,
+            "modes": results,
+        }
+        verified = sum(1 for result in results if result["verified"])
+        logger.info(f"📷 카메라 모드 프로브 완료 ({identity}): 지원 {len(listed)}개, "
+                    f"검증 {verified}/{len(results)}개, {entry['probe_ms']:.0f}ms")
+        with self._lock:
+            self._load()[identity] = entry
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"⚠️ 카메라 모드 캐시 저장 실패: {e}")
+        return entry
+
+    def select_mode(self, device, width: int, height: int, fps: int) -> Optional[dict]:
+        """
+        요청 모드에 가장 가까운 검증된 모드 (캐시가 없거나 검증된 모드가 없으면 None)
+
+        같은 해상도가 있으면 그중 요청 fps에 가장 가까운 것을, 없으면 화소 수가 가장 가까운
+        해상도를 고른다 (같은 차이면 큰 쪽 - 축소는 가능하지만 확대는 화질 손실).
+        """
+        entry = self.get(device)
+        if entry is None:
+            return None
+        verified = [mode for mode in entry.get("modes", []) if mode["verified"]]
+        if not verified:
+            return None
+        area = width * height
+        return min(verified, key=lambda mode: (abs(mode["width"] * mode["height"] - area),
+                                               -mode["width"], abs(mode["fps"] - fps)))
+
+    def get_status(self) -> dict:
+        with self._lock:
+            cache = self._load()
+            return {
+                "cache_path": self.cache_path,
+                "devices": {
+                    identity: {
+                        "probed_at": entry.get("probed_at"),
+                        "formats": len(entry.get("formats", [])),
+                        "verified_modes": [f"{mode['fourcc']} {mode['width']}x{mode['height']}@{mode['fps']}"
+                                           for mode in entry.get("modes", []) if mode["verified"]],
+                    }
+                    for identity, entry in cache.items()
+                },
+            }
+
+
+# 전역 인스턴스
+camera_capabilities = CameraCapabilities()
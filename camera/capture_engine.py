@@ -0,0 +1,494 @@
+# camera/capture_engine.py - 참조 카운트 기반 단일 카메라 캡처 엔진
+import cv2
+import threading
+import time
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from camera.capability_probe import camera_capabilities, fourcc_to_str
+from camera.frame import Frame
+from camera.frame_broadcaster import frame_broadcaster
+from camera.frame_notifier import FrameNotifier
+from camera.frame_ring import frame_ring
+from camera.jpeg_encoder import jpeg_encoder
+from camera.latency_stats import latency_stats
+from camera.synthetic_source import SyntheticCapture, is_synthetic_device
+
+logger = logging.getLogger(__name__)
+
+# 카메라 기본 설정 - 필요한 가장 큰 해상도로 한 번만 캡처하고
+# 작은 해상도(1/2, 1/4)는 해상도 피라미드로 만들어 쓴다
+# "synthetic" 또는 "synthetic:static"으로 지정하면 카메라 없이 합성 영상 사용 (벤치마크/개발용)
+CAMERA_DEVICE = "/dev/video0"
+CAMERA_WIDTH = 640
+CAMERA_HEIGHT = 480
+CAMERA_FPS = 30
+# MJPG 버퍼를 디코딩하지 않고 그대로 받기 (픽셀은 필요할 때만 지연 디코딩)
+CAMERA_PASSTHROUGH = True
+
+# 저지연 모드 - 드라이버 버퍼를 최소로 두고 grab()/retrieve()를 나눠
+# 이미 대기열에 쌓여 있던 오래된 버퍼는 디코딩/복사 없이 버리고 가장 새 프레임만 발행
+CAMERA_LOW_LATENCY = True
+# V4L2 버퍼 수 (CAP_PROP_BUFFERSIZE, 드라이버가 무시할 수 있음)
+CAMERA_BUFFER_SIZE = 1
+# 드라이버 타임스탬프 기준 프레임 나이가 프레임 간격의 이 배수를 넘으면 오래된 버퍼로 판단
+DRAIN_MAX_AGE_FRAMES = 1.0
+# 타임스탬프가 없을 때: grab()이 프레임 간격의 이 비율보다 빨리 반환되면 대기열에 있던 버퍼로 판단
+DRAIN_FAST_GRAB_FRACTION = 0.25
+# 한 번에 버릴 수 있는 최대 버퍼 수 (드라이버가 계속 즉시 반환해도 발행이 멈추지 않도록)
+DRAIN_MAX_GRABS = 4
+
+# 감시(supervisor) 설정
+# 이 시간 동안 새 프레임이 없으면 정지(stall)로 판단하고 장치를 다시 연다
+STALL_TIMEOUT = 2.0
+# 연속 read 실패가 이 횟수에 도달하면 에러 폭주로 판단하고 장치를 다시 연다
+READ_ERROR_LIMIT = 30
+# read 실패 직후 대기 시간 (연속 실패마다 두 배, 상한까지) - 실패 시 CPU를 태우는 빈 루프 방지
+READ_ERROR_BACKOFF = 0.005
+READ_ERROR_BACKOFF_MAX = 0.2
+# 장치 재오픈 대기 시간 (실패할 때마다 두 배, 상한까지)
+REOPEN_BACKOFF_INITIAL = 0.5
+REOPEN_BACKOFF_MAX = 10.0
+
+# 엔진 상태
+STATE_STOPPED = "stopped"            # 소비자 없음
+STATE_OPENING = "opening"            # 장치 여는 중 (첫 프레임 대기)
+STATE_STREAMING = "streaming"        # 정상 캡처 중
+STATE_STALLED = "stalled"            # 장치는 열려 있으나 STALL_TIMEOUT 동안 프레임 없음
+STATE_RECONNECTING = "reconnecting"  # 장치를 닫고 재오픈 대기 중 (뽑힘/에러 폭주/정지)
+
+
+# --------------------------------------------------------
+def open_capture(device=CAMERA_DEVICE):
+    """장치 한 번 열기 시도 (실패 시 None)"""
+    if is_synthetic_device(device):
+        return SyntheticCapture.from_device(device)
+    cap = cv2.VideoCapture(device, cv2.CAP_V4L2)
+    if cap.isOpened():
+        return cap
+    cap.release()
+    return None
+
+
+class CaptureEngine:
+    """
+    /mjpeg, /mjpeg-async 등 모든 카메라 소비자가 공유하는 캡처 엔진
+
+    acquire()/release()는 소비자 수만 증감하며(O(1)) 둘 다 블로킹하지 않는다.
+    장치 열기, 캡처, 장애 복구는 모두 감시 스레드가 맡는다. 감시 스레드는
+    프레임 정지(stall)와 read 에러 폭주를 감지하면 장치를 닫고 지수 백오프로 다시 열며,
+    그동안의 상태(state)는 스트리밍 소비자가 "카메라 사용 불가"를 알리는 데 쓴다.
+    장치는 첫 소비자가 붙을 때 열고 마지막 소비자가 떠날 때만 해제한다.
+    """
+
+    def __init__(self, device: str = CAMERA_DEVICE, width: int = CAMERA_WIDTH,
+                 height: int = CAMERA_HEIGHT, fps: int = CAMERA_FPS,
+                 passthrough: bool = CAMERA_PASSTHROUGH, stall_timeout: float = STALL_TIMEOUT,
+                 low_latency: bool = CAMERA_LOW_LATENCY):
+        self.device = device
+        # 설정값 - 실제 width/height/fps는 프로브 캐시의 검증된 모드에 따라 달라질 수 있음
+        self.requested = (width, height, fps)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.passthrough = passthrough
+        self.low_latency = low_latency
+        self.stall_timeout = stall_timeout
+        self.cap = None
+        self.frame_seq = 0
+        self._frames = FrameNotifier()
+        self._sinks: List[Callable[[Frame], None]] = []
+        self.consumers = 0
+        self.open_count = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._running = False
+        self._state = STATE_STOPPED
+        self.last_frame_at = 0.0
+        self.reconnects = 0
+        self.open_failures = 0
+        self.read_errors = 0
+        self.stalls = 0
+        self.last_error: Optional[str] = None
+        # 저지연 모드 계측 - 버린 오래된 버퍼 수, 마지막 프레임의 드라이버 기준 나이(초)
+        self.drained_frames = 0
+        # 프로브 캐시에서 고른 검증된 모드 (없으면 요청 값을 그대로 시도)
+        self.mode: Optional[dict] = None
+        self.last_sensor_age: Optional[float] = None
+
+    # --------------------------------------------------------
+    def acquire(self) -> None:
+        """
+        소비자 등록 (블로킹 없음) - 감시 스레드가 없으면 시작하고, 장치는 그 스레드가 연다
+
+        장치 열기 실패는 여기서 알 수 없으므로(감시 스레드가 백오프로 재시도) 반환값이 없다.
+        카메라 사용 가능 여부는 state/is_streaming으로 확인한다.
+        """
+        with self._lock:
+            self.consumers += 1
+            logger.info(f"📹 카메라 소비자 등록 (활성 연결: {self.consumers})")
+
+            if not self.is_running:
+                self._start_supervisor()
+
+    def release(self) -> None:
+        """소비자 해제 - 마지막 소비자가 떠날 때만 별도 스레드에서 장치 해제"""
+        with self._lock:
+            self.consumers -= 1
+            if self.consumers < 0:
+                logger.warning("⚠️ 카메라 소비자 수가 0 미만! 강제로 0으로 보정")
+                self.consumers = 0
+            logger.info(f"📹 카메라 소비자 해제 (활성 연결: {self.consumers})")
+
+            if self.consumers > 0:
+                return
+
+        # 스레드 join/장치 해제는 호출자(이벤트 루프 등)를 막지 않도록 분리
+        threading.Thread(target=self._close_if_unused, daemon=True).start()
+
+    def _close_if_unused(self) -> None:
+        with self._lock:
+            # 해제 대기 중에 새 소비자가 붙었으면 그대로 유지
+            if self.consumers > 0:
+                return
+            logger.info("📹 모든 소비자 연결 해제됨 - 카메라 자원 정리 시작")
+            thread = self._stop_supervisor()
+
+        # join은 잠금 밖에서 - 그 사이 acquire()가 이벤트 루프를 막지 않고 새 감시 스레드를 시작할 수 있음
+        if thread is not None and thread.is_alive():
+            thread.join(timeout=2)
+            if thread.is_alive():
+                logger.warning("⚠️ 카메라 스레드 강제 종료")
+
+        with self._lock:
+            # join 중에 새 감시 스레드가 시작됐으면 그 스레드의 프레임을 지우지 않음
+            if self.is_running:
+                return
+            self._frames.clear()
+            frame_broadcaster.reset()
+            frame_ring.clear()
+
+    @property
+    def is_running(self) -> bool:
+        """감시 스레드가 돌고 있는지 (재연결 중에도 True)"""
+        return self._running and self._thread is not None and self._thread.is_alive()
+
+    @property
+    def state(self) -> str:
+        """엔진 상태 - 캡처 스레드가 read()에서 멈춰 있어도 마지막 프레임 시각으로 정지를 판단"""
+        state = self._state
+        if state == STATE_STREAMING and time.monotonic() - self.last_frame_at > self.stall_timeout:
+            return STATE_STALLED
+        return state
+
+    @property
+    def is_streaming(self) -> bool:
+        """새 프레임이 정상적으로 들어오고 있는지"""
+        return self.is_running and self.state == STATE_STREAMING
+
+    def negotiated_mode(self) -> Tuple[int, int, int]:
+        """
+        소비자가 받게 될 (width, height, fps)
+
+        장치가 열려 있으면 실제 적용 값, 열기 전(또는 재연결 대기 중)이면 _open_device()가 적용할
+        검증된 모드(없으면 요청 값) - width/height는 장치를 열 때 바뀌므로 열기 전에는 쓰지 않는다.
+        """
+        if self.cap is not None:
+            return self.width, self.height, self.fps
+        mode = camera_capabilities.select_mode(self.device, *self.requested)
+        if mode is not None:
+            return mode["width"], mode["height"], mode["fps"]
+        return self.requested
+
+    def _set_state(self, state: str) -> None:
+        if state != self._state:
+            logger.info(f"📹 카메라 상태: {self._state} → {state}")
+            self._state = state
+
+    def add_frame_sink(self, sink: Callable[[Frame], None]) -> None:
+        """
+        모든 프레임을 캡처 스레드에서 직접 받을 콜백 등록 (녹화 등)
+
+        캡처 스레드를 막지 않도록 sink는 대기열에 넣기만 하고 바로 반환해야 한다.
+        """
+        with self._lock:
+            self._sinks = self._sinks + [sink]
+
+    def remove_frame_sink(self, sink: Callable[[Frame], None]) -> None:
+        with self._lock:
+            # 바운드 메서드는 접근할 때마다 새 객체이므로 is가 아닌 == 로 비교
+            self._sinks = [registered for registered in self._sinks if registered != sink]
+
+    # --------------------------------------------------------
+    def _start_supervisor(self) -> None:
+        """감시 스레드 시작 (_lock 보유 상태에서 호출)"""
+        # 세대마다 새 종료 이벤트 - 종료가 늦어진 이전 스레드는 자신의 이벤트만 봄
+        self._stop_event = threading.Event()
+        self._running = True
+        self._set_state(STATE_OPENING)
+        self._thread = threading.Thread(target=self._supervise, args=(self._stop_event,), daemon=True)
+        self._thread.start()
+
+    def _stop_supervisor(self) -> Optional[threading.Thread]:
+        """
+        감시 스레드에 종료 신호만 보냄 (_lock 보유 상태에서 호출, 블로킹 없음)
+
+        장치는 스레드가 종료하며 해제한다. join할 스레드를 반환하므로 호출자가 잠금 밖에서 기다린다.
+        """
+        thread = self._thread
+        self._running = False
+        self._stop_event.set()
+        self._thread = None
+        self._set_state(STATE_STOPPED)
+        return thread
+
+    def _open_device(self):
+        """장치 한 번 열고 캡처 설정 적용 (감시 스레드에서 호출, 실패 시 None)"""
+        # 백그라운드 모드 프로브가 장치를 열고 있으면 그 모드 하나가 끝날 때까지 기다림
+        # (이후 프로브는 busy()로 엔진 사용을 보고 중단)
+        with camera_capabilities.device_lock:
+            cap = open_capture(self.device)
+        if cap is None:
+            return None
+
+        # 프로브에서 검증된 모드(요청 모드가 없으면 가장 가까운 모드)가 있으면 바로 적용
+        mode = camera_capabilities.select_mode(self.device, *self.requested)
+        if mode is not None:
+            if mode is not self.mode:
+                logger.info(f"📷 검증된 카메라 모드 사용: {mode['fourcc']} {mode['width']}x{mode['height']}@{mode['fps']} "
+                            f"(첫 프레임 {mode.get('first_frame_ms')}ms)")
+            self.width, self.height, self.fps = mode["width"], mode["height"], mode["fps"]
+            self._apply_mode(cap, mode["fourcc"], only_changed=True)
+        else:
+            self.width, self.height, self.fps = self.requested
+            self._apply_mode(cap, "MJPG", only_changed=False)
+        self.mode = mode
+        if self.passthrough:
+            # 원시 MJPG 버퍼 그대로 받기 (OpenCV의 BGR 변환 생략)
+            cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        if self.low_latency:
+            # 드라이버 대기열에 프레임이 쌓이지 않도록 버퍼 최소화
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, CAMERA_BUFFER_SIZE)
+        # 장치가 멈췄을 때 read()가 오래 블로킹하지 않도록 (OpenCV 4.6 이상)
+        read_timeout = getattr(cv2, "CAP_PROP_READ_TIMEOUT_MSEC", None)
+        if read_timeout is not None:
+            cap.set(read_timeout, self.stall_timeout * 1000)
+        self.open_count += 1
+        return cap
+
+    def _apply_mode(self, cap, fourcc: str, only_changed: bool) -> None:
+        """
+        포맷/해상도/fps 적용
+
+        검증된 모드면(only_changed=True) 장치가 이미 그 값이면 건너뛴다 - V4L2는 마지막 포맷을
+        유지하므로 재오픈 시 버퍼를 다시 잡는 S_FMT 호출이 대부분 생략된다.
+        """
+        settings = (
+            (cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc)),
+            (cv2.CAP_PROP_FRAME_WIDTH, self.width),
+            (cv2.CAP_PROP_FRAME_HEIGHT, self.height),
+            (cv2.CAP_PROP_FPS, self.fps),
+        )
+        for prop, value in settings:
+            if only_changed:
+                current = cap.get(prop)
+                if prop == cv2.CAP_PROP_FOURCC:
+                    if fourcc_to_str(current) == fourcc:
+                        continue
+                elif round(current) == value:
+                    continue
+            cap.set(prop, value)
+
+    def _supervise(self, stop_event: threading.Event) -> None:
+        """장치 열기 → 캡처 → 장애 시 닫고 지수 백오프로 재오픈을 종료 요청까지 반복"""
+        logger.info("📹 카메라 감시 스레드 시작")
+        backoff = REOPEN_BACKOFF_INITIAL
+        while not stop_event.is_set():
+            cap = self._open_device()
+            if cap is None:
+                self.open_failures += 1
+                self.last_error = "장치 열기 실패"
+                self._set_state(STATE_RECONNECTING if self.open_count else STATE_OPENING)
+                logger.warning(f"⚠️ 카메라 열기 실패 - {backoff:.1f}초 후 재시도")
+                stop_event.wait(backoff)
+                backoff = min(backoff * 2, REOPEN_BACKOFF_MAX)
+                continue
+
+            self.cap = cap
+            logger.info(f"📹 카메라 스트리밍 시작 ({self.width}x{self.height}@{self.fps})")
+            try:
+                reason, frames = self._capture_loop(cap, stop_event)
+            finally:
+                cap.release()
+                if self.cap is cap:
+                    self.cap = None
+            if stop_event.is_set():
+                break
+
+            # 프레임을 받아 본 장치면 바로 재시도, 열리기만 하고 프레임이 없으면 백오프 증가
+            if frames:
+                backoff = REOPEN_BACKOFF_INITIAL
+            self.reconnects += 1
+            self.last_error = reason
+            self._set_state(STATE_RECONNECTING)
+            logger.warning(f"⚠️ 카메라 장애 ({reason}) - {backoff:.1f}초 후 장치 재오픈")
+            stop_event.wait(backoff)
+            backoff = min(backoff * 2, REOPEN_BACKOFF_MAX)
+        logger.info("📹 카메라 감시 스레드 종료")
+
+    def _capture_loop(self, cap, stop_event: threading.Event) -> Tuple[str, int]:
+        """
+        프레임을 읽어 발행 - 정지/에러 폭주를 감지하면 (사유, 받은 프레임 수)를 반환
+
+        cap.read()(저지연 모드는 cap.grab())가 다음 프레임까지 블로킹하므로 정상일 때는 별도 sleep이 없고,
+        실패할 때만 짧은 지수 백오프로 쉬어 빈 루프가 코어를 점유하지 않게 한다.
+        """
+        frames = 0
+        errors = 0
+        last_frame_at = time.monotonic()
+        while not stop_event.is_set():
+            ret, data, grabbed_at = self._read_frame(cap)
+            frame = Frame.from_capture(self.frame_seq + 1, data, grabbed_at) if ret and data is not None else None
+            now = time.monotonic()
+            if frame is None:
+                errors += 1
+                self.read_errors += 1
+                if errors >= READ_ERROR_LIMIT:
+                    return f"연속 read 실패 {errors}회", frames
+                if now - last_frame_at > self.stall_timeout:
+                    self.stalls += 1
+                    return f"{self.stall_timeout:g}초 동안 프레임 없음", frames
+                stop_event.wait(min(READ_ERROR_BACKOFF * 2 ** (errors - 1), READ_ERROR_BACKOFF_MAX))
+                continue
+
+            errors = 0
+            frames += 1
+            last_frame_at = self.last_frame_at = now
+            self.frame_seq = frame.seq
+            self._set_state(STATE_STREAMING)
+            # 패스스루 프레임은 인코딩 없이, 아니면 프레임당 한 번만 인코딩
+            frame_broadcaster.publish(frame)
+            self._frames.notify(frame.seq, frame)
+            # 이벤트 클립용 프리롤 (패스스루면 복사/인코딩 없이 참조만 보관)
+            frame_ring.push(frame)
+            # 목록은 등록/해제 시 통째로 교체되므로 잠금 없이 순회
+            for sink in self._sinks:
+                try:
+                    sink(frame)
+                except Exception as e:
+                    logger.error(f"❌ 프레임 sink 처리 실패: {e}")
+        return "종료 요청", frames
+
+    def _read_frame(self, cap) -> Tuple[bool, object, float]:
+        """
+        프레임 하나 읽기 → (성공 여부, 데이터, grab 반환 시각)
+
+        저지연 모드에서는 grab()만으로 버퍼를 넘기며 오래된 버퍼를 버리고,
+        발행할 프레임 하나만 retrieve()로 꺼낸다 (버리는 버퍼는 복사/디코딩 없음).
+        """
+        if not self.low_latency:
+            ret, data = cap.read()
+            return ret, data, time.monotonic()
+
+        interval = 1.0 / self.fps if self.fps else 0.0
+        for drained in range(DRAIN_MAX_GRABS + 1):
+            started = time.monotonic()
+            if not cap.grab():
+                return False, None, time.monotonic()
+            grabbed_at = time.monotonic()
+            age = self._buffer_age(cap, grabbed_at)
+            if age is not None:
+                stale = age > interval * DRAIN_MAX_AGE_FRAMES
+            else:
+                stale = grabbed_at - started < interval * DRAIN_FAST_GRAB_FRACTION
+            if not stale or drained == DRAIN_MAX_GRABS:
+                break
+            self.drained_frames += 1
+
+        if age is not None:
+            self.last_sensor_age = age
+            latency_stats.record("sensor_to_grab", age)
+        ret, data = cap.retrieve()
+        return ret, data, grabbed_at
+
+    def _buffer_age(self, cap, grabbed_at: float) -> Optional[float]:
+        """
+        드라이버 버퍼 타임스탬프 기준 프레임 나이(초) - 알 수 없으면 None
+
+        V4L2 백엔드의 CAP_PROP_POS_MSEC는 버퍼 타임스탬프(CLOCK_MONOTONIC, ms)이므로
+        time.monotonic()과 바로 비교할 수 있다. 다른 시계를 쓰는 드라이버는 범위 검사로 걸러낸다.
+        """
+        stamp_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+        if not stamp_ms or stamp_ms <= 0:
+            return None
+        age = grabbed_at - stamp_ms / 1000
+        if age < 0 or age > self.stall_timeout:
+            return None
+        return age
+
+    # --------------------------------------------------------
+    def get_latest(self) -> Optional[Frame]:
+        """가장 최근 Frame 객체 반환 (디코딩하지 않음, 없으면 None)"""
+        return self._frames.latest()[1]
+
+    async def wait_for_frame(self, after_seq: int = 0,
+                             timeout: Optional[float] = None) -> Optional[Frame]:
+        """after_seq 이후의 Frame이 도착할 때까지 대기 (timeout 시 None)"""
+        return (await self._frames.wait_next(after_seq, timeout))[1]
+
+    def wait_for_frame_sync(self, after_seq: int = 0,
+                            timeout: Optional[float] = None) -> Optional[Frame]:
+        """스레드용 wait_for_frame()"""
+        return self._frames.wait_next_sync(after_seq, timeout)[1]
+
+    def get_latest_frame(self):
+        """가장 최근 프레임의 BGR 픽셀 반환 - 이 시점에만 디코딩 (없으면 None)"""
+        frame = self.get_latest()
+        return frame.get_bgr() if frame is not None else None
+
+    def get_info(self) -> dict:
+        """실제 적용된 카메라 설정 조회"""
+        cap = self.cap
+        if cap is None or not self.is_running:
+            return {"error": "카메라가 실행 중이 아님"}
+        try:
+            return {
+                "width": cap.get(cv2.CAP_PROP_FRAME_WIDTH),
+                "height": cap.get(cv2.CAP_PROP_FRAME_HEIGHT),
+                "fps": cap.get(cv2.CAP_PROP_FPS),
+                "buffer_size": cap.get(cv2.CAP_PROP_BUFFERSIZE),
+                "mode": self.mode,
+                "device": self.device,
+                "is_opened": cap.isOpened()
+            }
+        except Exception as e:
+            return {"error": str(e)}
+
+    def get_status(self) -> dict:
+        """캡처 엔진 상태 조회"""
+        return {
+            "device": self.device,
+            "running": self.is_running,
+            "state": self.state,
+            "last_frame_age": round(time.monotonic() - self.last_frame_at, 2) if self.last_frame_at else None,
+            "reconnects": self.reconnects,
+            "open_failures": self.open_failures,
+            "read_errors": self.read_errors,
+            "stalls": self.stalls,
+            "last_error": self.last_error,
+            "passthrough": self.passthrough,
+            "low_latency": self.low_latency,
+            "mode": self.mode,
+            "drained_frames": self.drained_frames,
+            "sensor_age_ms": round(self.last_sensor_age * 1000, 1) if self.last_sensor_age is not None else None,
+            "consumers": self.consumers,
+            "open_count": self.open_count,
+            "broadcaster": frame_broadcaster.get_status(),
+            "jpeg_encoder": jpeg_encoder.get_status(),
+            "ring_buffer": frame_ring.get_status(),
+        }
+
+
+# 전역 인스턴스 (모든 카메라 경로가 공유)
+capture_engine = CaptureEngine()
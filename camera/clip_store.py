@@ -0,0 +1,179 @@
+# camera/clip_store.py - 이벤트 클립 색인 (SQLite) + 작성 시점 썸네일
+import os
+import struct
+import sqlite3
+import threading
+import time
+import logging
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 클립 색인 설정
+CLIP_DB_PATH = os.path.join("clips", "clips.db")
+# 썸네일: 1/4 축소 디코딩(640x480 → 160x120) 후 이 화질로 한 번만 인코딩
+THUMBNAIL_SCALE = 4
+THUMBNAIL_QUALITY = 70
+CLIP_QUERY_LIMIT = 500
+
+# 프레임 오프셋 레코드: 촬영 시각(epoch 초) float64, 파일 오프셋 uint64, 길이 uint32 (타임랩스 인덱스와 같은 형식)
+FRAME_RECORD = struct.Struct("<dQI")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_type TEXT NOT NULL,
+    event_time REAL NOT NULL,
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    frame_count INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    frames BLOB NOT NULL,
+    thumbnail BLOB,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS clips_start_time ON clips (start_time);
+CREATE INDEX IF NOT EXISTS clips_event_type ON clips (event_type, start_time);
+"""
+
+# 목록 조회용 컬럼 (썸네일/오프셋 BLOB은 읽지 않음)
+_LIST_COLUMNS = "id, event_type, event_time, start_time, end_time, path, frame_count, bytes"
+
+
+def make_thumbnail(jpeg: bytes) -> Optional[bytes]:
+    """원본 JPEG에서 썸네일 JPEG 생성 (축소 디코딩 - 전체 디코딩 없음)"""
+    # 색인 조회만 하는 쪽(라우터, 테스트)이 OpenCV를 import하지 않도록 썸네일을 만들 때만 import
+    from camera.frame import Frame
+    return Frame(0, jpeg=jpeg).get_jpeg(THUMBNAIL_QUALITY, THUMBNAIL_SCALE)
+
+
+def pack_frames(frames: Iterable[dict]) -> bytes:
+    """MjpegFileWriter 인덱스의 frames 목록 → 고정 크기 레코드 BLOB"""
+    return b"".join(FRAME_RECORD.pack(frame["time"], frame["offset"], frame["length"]) for frame in frames)
+
+
+def unpack_frames(blob: bytes) -> List[dict]:
+    return [
+        {"time": wall_time, "offset": offset, "length": length}
+        for wall_time, offset, length in FRAME_RECORD.iter_unpack(blob)
+    ]
+
+
+class ClipStore:
+    """
+    클립 메타데이터 색인 - 이벤트 종류, 시작/끝 시각, 프레임 오프셋, 썸네일
+
+    클립 작성 스레드가 저장 직후 add()로 한 번 기록하므로, 목록/시간 구간 조회는
+    색인만 읽고 영상 파일은 열지 않는다. 연결 하나를 잠금으로 공유한다
+    (쓰기는 클립 작성 스레드, 읽기는 요청 처리 스레드풀).
+    """
+
+    def __init__(self, db_path: str = CLIP_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """(_lock 보유 상태에서 호출) 처음 사용할 때 DB 열기/스키마 생성"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            # SD 카드 쓰기 횟수를 줄이고 읽기가 쓰기를 막지 않도록
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def add(self, event_type: str, event_time: float, path: str, index: dict,
+            thumbnail: Optional[bytes]) -> int:
+        """클립 색인 추가 (반환값: 클립 id)"""
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "INSERT OR REPLACE INTO clips (event_type, event_time, start_time, end_time, path, frame_count,"
+                " bytes, frames, thumbnail, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (event_type, event_time, index["start_time"], index["end_time"], path, index["frame_count"],
+                 index["bytes"], pack_frames(index["frames"]), thumbnail, time.time()),
+            )
+            conn.commit()
+            return cursor.lastrowid
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              event_type: Optional[str] = None, limit: int = CLIP_QUERY_LIMIT) -> List[dict]:
+        """[start, end]와 겹치는 클립 목록 (최신순)"""
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("end_time >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("start_time <= ?")
+            params.append(end)
+        if event_type:
+            conditions.append("event_type = ?")
+            params.append(event_type)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {_LIST_COLUMNS} FROM clips {where} ORDER BY start_time DESC LIMIT ?",
+                params + [min(limit, CLIP_QUERY_LIMIT)],
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, clip_id: int, with_frames: bool = False) -> Optional[dict]:
+        columns = _LIST_COLUMNS + (", frames" if with_frames else "")
+        with self._lock:
+            row = self._connect().execute(f"SELECT {columns} FROM clips WHERE id = ?", (clip_id,)).fetchone()
+        if row is None:
+            return None
+        clip = dict(row)
+        if with_frames:
+            clip["frames"] = unpack_frames(clip["frames"])
+        return clip
+
+    def thumbnail(self, clip_id: int) -> Optional[bytes]:
+        with self._lock:
+            row = self._connect().execute("SELECT thumbnail FROM clips WHERE id = ?", (clip_id,)).fetchone()
+        return row["thumbnail"] if row is not None else None
+
+    def frame_location(self, clip_id: int, frame_index: int) -> Optional[tuple]:
+        """(파일 경로, 오프셋, 길이) - 스크러빙용 프레임 한 장 위치"""
+        with self._lock:
+            row = self._connect().execute("SELECT path, frames FROM clips WHERE id = ?", (clip_id,)).fetchone()
+        if row is None:
+            return None
+        blob = row["frames"]
+        position = frame_index * FRAME_RECORD.size
+        if frame_index < 0 or position + FRAME_RECORD.size > len(blob):
+            return None
+        _, offset, length = FRAME_RECORD.unpack_from(blob, position)
+        return row["path"], offset, length
+
+    def remove_missing(self) -> int:
+        """파일이 지워진 클립 색인 정리 (반환값: 삭제 수)"""
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute("SELECT id, path FROM clips").fetchall()
+            missing = [(row["id"],) for row in rows if not os.path.exists(row["path"])]
+            if missing:
+                conn.executemany("DELETE FROM clips WHERE id = ?", missing)
+                conn.commit()
+        return len(missing)
+
+    def get_status(self) -> dict:
+        with self._lock:
+            if self._conn is None:
+                return {"db_path": self.db_path, "opened": False}
+            row = self._conn.execute("SELECT COUNT(*) AS clips, COALESCE(SUM(bytes), 0) AS bytes FROM clips").fetchone()
+        return {"db_path": self.db_path, "opened": True, "clips": row["clips"], "bytes": row["bytes"]}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 전역 인스턴스
+clip_store = ClipStore()
@@ -0,0 +1,151 @@
+# camera/event_clips.py - 이벤트(발사/급식/레이저) 전후 클립 저장
+import os
+import time
+import queue
+import threading
+import logging
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from camera.capture_engine import capture_engine
+from camera.clip_store import clip_store, make_thumbnail
+from camera.frame_ring import frame_ring
+from camera.mjpeg_file import MjpegFileWriter
+from utils import hardware_events
+
+logger = logging.getLogger(__name__)
+
+# 클립 저장 설정
+CLIP_DIR = "clips"
+CLIP_PRE_SECONDS = 3.0
+CLIP_POST_SECONDS = 3.0
+CLIP_QUEUE_SIZE = 16
+
+
+class ClipJob(NamedTuple):
+    event_type: str
+    event_at: float    # time.monotonic()
+    event_time: float  # time.time()
+    pre_seconds: float
+    post_seconds: float
+
+
+class EventClipRecorder:
+    """
+    이벤트 전후 몇 초를 링 버퍼에서 꺼내 클립으로 저장
+
+    trigger()는 대기열에 작업만 넣고 바로 반환하므로 명령 핸들러나 급식 스케줄러가
+    디스크 I/O를 기다리지 않는다. 실제 저장은 전용 작성 스레드가 이벤트 후
+    post_seconds가 지난 뒤 수행한다.
+    """
+
+    def __init__(self, clip_dir: str = CLIP_DIR):
+        self.clip_dir = clip_dir
+        self._queue: "queue.Queue[Optional[ClipJob]]" = queue.Queue(maxsize=CLIP_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.saved_clips = 0
+        self.dropped_events = 0
+        self.last_clip: Optional[str] = None
+
+    def trigger(self, event_type: str, pre_seconds: float = CLIP_PRE_SECONDS,
+                post_seconds: float = CLIP_POST_SECONDS) -> bool:
+        """이벤트 클립 요청 (블로킹 없음) - 카메라가 돌고 있지 않으면 건너뜀"""
+        if not capture_engine.is_running:
+            logger.debug(f"📼 카메라 미실행 - '{event_type}' 클립 건너뜀")
+            return False
+        self._ensure_worker()
+        job = ClipJob(event_type, time.monotonic(), time.time(), pre_seconds, post_seconds)
+        try:
+            self._queue.put_nowait(job)
+            logger.info(f"📼 이벤트 클립 예약: {event_type}")
+            return True
+        except queue.Full:
+            self.dropped_events += 1
+            logger.warning(f"⚠️ 클립 대기열 가득 참 - '{event_type}' 클립 버림")
+            return False
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, daemon=True)
+                self._thread.start()
+
+    def _worker(self) -> None:
+        logger.info("📼 클립 작성 스레드 시작")
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            # 이벤트 이후 구간이 링 버퍼에 쌓일 때까지 대기
+            delay = job.event_at + job.post_seconds - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                self._save(job)
+            except Exception as e:
+                logger.error(f"❌ 클립 저장 실패 ({job.event_type}): {e}")
+        logger.info("📼 클립 작성 스레드 종료")
+
+    def _save(self, job: ClipJob) -> Optional[str]:
+        entries = frame_ring.snapshot(job.event_at - job.pre_seconds, job.event_at + job.post_seconds)
+        if not entries:
+            logger.warning(f"⚠️ '{job.event_type}' 클립에 저장할 프레임 없음")
+            return None
+
+        stamp = datetime.fromtimestamp(job.event_time).strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        path = os.path.join(self.clip_dir, f"{stamp}_{job.event_type}.mjpeg")
+        writer = MjpegFileWriter(path)
+        for entry in entries:
+            # BGR 카메라 프레임은 여기(작성 스레드)에서 처음 인코딩됨
+            jpeg = entry.jpeg
+            if jpeg is not None:
+                writer.write(jpeg, entry.wall_time, entry.seq)
+        index = writer.close(event_type=job.event_type, event_time=job.event_time)
+        self._index(job, path, index, entries)
+
+        self.saved_clips += 1
+        self.last_clip = path
+        logger.info(f"💾 이벤트 클립 저장: {path} ({len(entries)}프레임)")
+        return path
+
+    def _index(self, job: ClipJob, path: str, index: dict, entries) -> None:
+        """클립 색인 등록 - 썸네일(이벤트 순간 프레임)은 여기서 한 번만 만듦"""
+        try:
+            event_entry = min(entries, key=lambda entry: abs(entry.captured_at - job.event_at))
+            clip_store.add(job.event_type, job.event_time, path, index, make_thumbnail(event_entry.jpeg))
+        except Exception as e:
+            # 색인 실패해도 클립 파일과 .json 인덱스는 남아 있음
+            logger.error(f"❌ 클립 색인 등록 실패 ({path}): {e}")
+
+    def stop(self) -> None:
+        """작성 스레드 종료 (대기 중인 클립은 저장 후 종료)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                self._queue.put(None)
+
+    def get_status(self) -> dict:
+        return {
+            "pending": self._queue.qsize(),
+            "saved_clips": self.saved_clips,
+            "dropped_events": self.dropped_events,
+            "last_clip": self.last_clip,
+            "store": clip_store.get_status(),
+            "ring_buffer": frame_ring.get_status(),
+        }
+
+
+# 전역 인스턴스
+event_clip_recorder = EventClipRecorder()
+
+
+def trigger_event_clip(event_type: str) -> None:
+    """하드웨어 핸들러용 훅 - 클립 저장 실패가 명령 처리에 영향을 주지 않도록 예외를 삼킴"""
+    try:
+        event_clip_recorder.trigger(event_type)
+    except Exception as e:
+        logger.warning(f"⚠️ 이벤트 클립 요청 실패 ({event_type}): {e}")
+
+
+# 명령 처리/급식 스케줄러는 이 모듈을 import하지 않고 이벤트로 클립을 요청함
+hardware_events.register(hardware_events.EVENT_CLIP, trigger_event_clip)
@@ -0,0 +1,318 @@
+# camera/frame.py - 캡처된 프레임 (압축 JPEG 원본 + 지연 디코딩)
+import cv2
+import threading
+import time
+import logging
+import numpy as np
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from camera.jpeg_encoder import jpeg_encoder
+from camera.latency_stats import latency_stats
+from camera.overlay import overlay_renderer
+
+logger = logging.getLogger(__name__)
+
+JPEG_SOI = b"\xff\xd8"
+
+# 해상도 피라미드 단계 (이름 → 축소 배율)
+VARIANT_SCALES = {"full": 1, "half": 2, "quarter": 4}
+
+# 압축 프레임을 축소 디코딩할 때 쓰는 플래그 (DCT 단계에서 바로 축소되어 전체 디코딩보다 저렴)
+# 움직임 감지용 저해상도 그레이스케일 배율 (640x480 → 80x60)
+GRAY_SMALL_SCALE = 8
+
+_REDUCED_DECODE_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+_GRAY_DECODE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+def jpeg_dimensions(jpeg: bytes) -> Tuple[int, int]:
+    """JPEG 헤더(SOF 마커)에서 (width, height) 읽기 - 디코딩 없음, 실패 시 (0, 0)"""
+    pos = 2
+    length = len(jpeg)
+    while pos + 9 < length:
+        if jpeg[pos] != 0xFF:
+            pos += 1
+            continue
+        marker = jpeg[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        # SOF0~SOF15 (DHT=C4, JPG=C8, DAC=CC 제외)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = (jpeg[pos + 5] << 8) | jpeg[pos + 6]
+            width = (jpeg[pos + 7] << 8) | jpeg[pos + 8]
+            return width, height
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        pos += 2 + ((jpeg[pos + 2] << 8) | jpeg[pos + 3])
+    return 0, 0
+
+
+class StreamVariant(NamedTuple):
+    """한 번의 캡처에서 파생되는 출력 스트림 종류 (브로드캐스터 구독 키)"""
+    scale: int = 1
+    quality: Optional[int] = None
+    # 오버레이(시각, 거리, 레이저 조준점) 합성 여부 - 구독자가 있을 때만 인코딩됨
+    overlay: bool = False
+    # 디지털 줌: 원본 해상도 기준 잘라낼 영역 (x, y, w, h)
+    crop: Optional[Tuple[int, int, int, int]] = None
+    # 출력 크기 (w, h) - None이면 (크롭 영역 또는 전체) / scale
+    size: Optional[Tuple[int, int]] = None
+
+    @property
+    def is_original(self) -> bool:
+        """카메라 원본 그대로인지 (패스스루 가능)"""
+        return (self.scale == 1 and self.quality is None and not self.overlay
+                and self.crop is None and self.size is None)
+
+    @property
+    def is_region(self) -> bool:
+        """크롭/출력 크기 지정 종류인지"""
+        return self.crop is not None or self.size is not None
+
+    def output_size(self, width: int, height: int) -> Tuple[int, int]:
+        """원본이 width x height일 때 이 종류의 출력 크기"""
+        if self.size is not None:
+            return self.size
+        if self.crop is not None:
+            return self.crop[2] // self.scale, self.crop[3] // self.scale
+        return width // self.scale, height // self.scale
+
+
+class Frame:
+    """
+    캡처 엔진이 발행하는 프레임 하나
+
+    패스스루 모드에서는 카메라가 준 MJPG 버퍼(jpeg)만 가지고 있으며,
+    픽셀이 필요한 소비자가 get_bgr()를 호출할 때 한 번만 디코딩한다.
+    반대로 BGR만 있는 경우 get_jpeg()가 한 번만 인코딩한다.
+    축소본과 (배율, 화질)별 인코딩 결과도 프레임당 한 번만 만들어 캐시한다.
+    오버레이 합성본도 배율별로 한 번만 만들어 오버레이를 켠 모든 종류가 공유한다.
+    captured_at은 cap.read()(저지연 모드에서는 cap.grab())가 반환된 모노토닉 시각, captured_wall은 같은 순간의 벽시계 시각이다.
+    """
+
+    __slots__ = ("seq", "captured_at", "captured_wall", "_jpeg", "_bgr", "_scaled", "_overlaid", "_encoded",
+                 "_gray", "_lock")
+
+    def __init__(self, seq: int, jpeg: Optional[bytes] = None,
+                 bgr: Optional[np.ndarray] = None, captured_at: Optional[float] = None):
+        self.seq = seq
+        now = time.monotonic()
+        self.captured_at = captured_at if captured_at is not None else now
+        # 클라이언트가 glass-to-glass 지연을 계산할 수 있도록 벽시계 시각도 보관
+        self.captured_wall = time.time() - (now - self.captured_at)
+        self._jpeg = jpeg
+        self._bgr = bgr
+        self._scaled: Dict[int, np.ndarray] = {}
+        self._overlaid: Dict[int, np.ndarray] = {}
+        self._encoded: Dict[StreamVariant, bytes] = {}
+        self._gray: Dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_capture(cls, seq: int, data: np.ndarray,
+                     captured_at: Optional[float] = None) -> Optional["Frame"]:
+        """cap.read()/retrieve() 결과로 프레임 생성 (원시 MJPG 버퍼 또는 디코딩된 BGR)"""
+        if data.ndim == 3:
+            # 드라이버가 CONVERT_RGB=0을 무시한 경우 - 이미 디코딩된 BGR
+            return cls(seq, bgr=data, captured_at=captured_at)
+        jpeg = data.tobytes()
+        if not jpeg.startswith(JPEG_SOI):
+            logger.warning("⚠️ MJPG 버퍼가 JPEG 형식이 아님 - 프레임 건너뜀")
+            return None
+        return cls(seq, jpeg=jpeg, captured_at=captured_at)
+
+    @property
+    def is_compressed(self) -> bool:
+        """카메라 원본 JPEG을 가지고 있는지 (패스스루)"""
+        return self._jpeg is not None
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._bgr is not None
+
+    @property
+    def dimensions(self) -> Tuple[int, int]:
+        """원본 (width, height) - 압축 프레임은 JPEG 헤더에서 읽음 (디코딩 없음)"""
+        if self._bgr is not None:
+            height, width = self._bgr.shape[:2]
+            return width, height
+        return jpeg_dimensions(self._jpeg) if self._jpeg is not None else (0, 0)
+
+    def _decode(self, flags: int) -> Optional[np.ndarray]:
+        """압축 원본 디코딩 (_lock 보유 상태에서 호출) - 소요 시간을 decode 단계로 기록"""
+        started = time.monotonic()
+        pixels = cv2.imdecode(np.frombuffer(self._jpeg, np.uint8), flags)
+        latency_stats.record("decode", time.monotonic() - started)
+        return pixels
+
+    def get_bgr(self, scale: int = 1) -> Optional[np.ndarray]:
+        """BGR 픽셀 반환 - 필요한 소비자가 처음 요청할 때 배율별로 한 번만 디코딩/축소"""
+        if scale == 1:
+            if self._bgr is not None:
+                return self._bgr
+            with self._lock:
+                if self._bgr is None and self._jpeg is not None:
+                    self._bgr = self._decode(cv2.IMREAD_COLOR)
+                return self._bgr
+
+        cached = self._scaled.get(scale)
+        if cached is not None:
+            return cached
+        with self._lock:
+            cached = self._scaled.get(scale)
+            if cached is not None:
+                return cached
+            if self._bgr is None and self._jpeg is not None and scale in _REDUCED_DECODE_FLAGS:
+                cached = self._decode(_REDUCED_DECODE_FLAGS[scale])
+            else:
+                full = self._bgr
+                if full is None and self._jpeg is not None:
+                    full = self._bgr = self._decode(cv2.IMREAD_COLOR)
+                if full is None:
+                    return None
+                height, width = full.shape[:2]
+                cached = cv2.resize(full, (width // scale, height // scale), interpolation=cv2.INTER_AREA)
+            if cached is not None:
+                self._scaled[scale] = cached
+            return cached
+
+    def get_overlay_bgr(self, scale: int = 1) -> Optional[np.ndarray]:
+        """오버레이를 합성한 BGR - 배율별로 프레임당 한 번만 합성 (원본 픽셀은 건드리지 않음)"""
+        cached = self._overlaid.get(scale)
+        if cached is not None:
+            return cached
+        bgr = self.get_bgr(scale)
+        if bgr is None:
+            return None
+        with self._lock:
+            cached = self._overlaid.get(scale)
+            if cached is None:
+                cached = self._overlaid[scale] = overlay_renderer.apply(bgr, self.captured_wall)
+            return cached
+
+    def get_region(self, variant: StreamVariant) -> Optional[np.ndarray]:
+        """
+        크롭/출력 크기 종류의 픽셀
+
+        출력 크기를 만족하는 가장 작은 축소 디코딩본을 골라 크롭 영역을 NumPy 뷰로 잘라내므로
+        (복사 없음) 잘려 나가는 픽셀은 인코딩하지 않는다. 출력 크기와 다를 때만 리사이즈한다.
+        """
+        full_width, full_height = self.dimensions
+        x, y, w, h = variant.crop or (0, 0, full_width, full_height)
+        # 크롭은 요청 시점의 예상 해상도로 계산되므로, 드라이버가 다른 해상도를 적용했으면 프레임 안으로 맞춤
+        w, h = min(w, full_width), min(h, full_height)
+        x, y = min(x, full_width - w), min(y, full_height - h)
+        out_width, out_height = variant.output_size(full_width, full_height)
+        decode_scale = 1
+        for scale in (8, 4, 2):
+            if w // scale >= out_width and h // scale >= out_height:
+                decode_scale = scale
+                break
+        if variant.overlay:
+            base = self.get_overlay_bgr(decode_scale)
+        else:
+            base = self.get_bgr(decode_scale)
+        if base is None:
+            return None
+        view = base[y // decode_scale:(y + h) // decode_scale, x // decode_scale:(x + w) // decode_scale]
+        if view.shape[1] == out_width and view.shape[0] == out_height:
+            return view
+        shrinking = view.shape[1] > out_width
+        return cv2.resize(view, (out_width, out_height),
+                          interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR)
+
+    def get_gray(self, scale: int = 1) -> Optional[np.ndarray]:
+        """
+        그레이스케일 픽셀 - 압축 프레임은 (축소) 그레이 디코딩으로 바로 얻음
+
+        컬러 디코딩보다 저렴하며, 배율별로 프레임당 한 번만 계산한다.
+        """
+        cached = self._gray.get(scale)
+        if cached is not None:
+            return cached
+        with self._lock:
+            cached = self._gray.get(scale)
+            if cached is not None:
+                return cached
+            if self._bgr is None and self._jpeg is not None and scale in _GRAY_DECODE_FLAGS:
+                cached = self._decode(_GRAY_DECODE_FLAGS[scale])
+            elif self._bgr is not None:
+                small = self._bgr
+                if scale != 1:
+                    height, width = self._bgr.shape[:2]
+                    small = cv2.resize(self._bgr, (width // scale, height // scale), interpolation=cv2.INTER_AREA)
+                cached = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            if cached is not None:
+                self._gray[scale] = cached
+            return cached
+
+    def get_gray_small(self) -> Optional[np.ndarray]:
+        """움직임 감지용 1/8 그레이스케일 (전체 디코딩보다 훨씬 저렴, 프레임당 한 번만 계산)"""
+        return self.get_gray(GRAY_SMALL_SCALE)
+
+    def get_jpeg(self, quality: Optional[int] = None, scale: int = 1) -> Optional[bytes]:
+        """
+        JPEG 바이트 반환
+
+        원본 배율에 quality=None이면 패스스루 원본을 그대로(없으면 기본 화질로 한 번 인코딩),
+        그 외에는 (배율, 화질) 조합마다 프레임당 한 번만 인코딩한다.
+        """
+        return self.render(StreamVariant(scale, quality))
+
+    def render(self, variant: StreamVariant) -> Optional[bytes]:
+        """스트림 종류에 맞는 JPEG 반환 (프레임당 종류별 한 번만 생성)"""
+        if variant.is_original and self._jpeg is not None:
+            return self._jpeg
+
+        cached = self._encoded.get(variant)
+        if cached is not None:
+            return cached
+        if variant.is_region:
+            bgr = self.get_region(variant)
+        elif variant.overlay:
+            bgr = self.get_overlay_bgr(variant.scale)
+        else:
+            bgr = self.get_bgr(variant.scale)
+        if bgr is None:
+            return None
+        with self._lock:
+            cached = self._encoded.get(variant)
+            if cached is None:
+                jpeg = jpeg_encoder.encode(bgr, variant.quality)
+                if jpeg is None:
+                    return None
+                cached = self._encoded[variant] = jpeg
+            return cached
+
+    def find_encoded(self, scale: int = 1, overlay: bool = False) -> StreamVariant:
+        """
+        해당 배율에서 이미 만들어진(추가 인코딩이 필요 없는) 스트림 종류 반환
+
+        원본 배율의 패스스루 JPEG, 그다음 시청자용으로 캐시된 인코딩 중 화질이 가장
+        높은 것을 고른다. 아무것도 없으면 원본 화질 종류를 반환한다 (render 시 한 번 인코딩).
+        """
+        original = StreamVariant(scale, None, overlay)
+        if original.is_original and self._jpeg is not None:
+            return original
+        encoded = [variant for variant in list(self._encoded)
+                   if variant.scale == scale and variant.overlay == overlay and not variant.is_region]
+        if not encoded:
+            return original
+        return max(encoded, key=lambda variant: 101 if variant.quality is None else variant.quality)
+
+    def is_transcode(self, variant: StreamVariant) -> bool:
+        """render(variant)가 새로 인코딩해야 하는지 (통계용)"""
+        if variant.is_original and self._jpeg is not None:
+            return False
+        return variant not in self._encoded
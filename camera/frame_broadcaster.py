@@ -0,0 +1,223 @@
+# camera/frame_broadcaster.py - 캡처 세션당 하나의 MJPEG 브로드캐스터
+import time
+import threading
+import logging
+from typing import Dict, Optional, Tuple
+
+from camera.frame import Frame, StreamVariant
+from camera.frame_notifier import FrameNotifier
+from camera.latency_stats import latency_stats
+from camera.motion_gate import motion_gate
+
+logger = logging.getLogger(__name__)
+
+MJPEG_BOUNDARY = b"--frame"
+
+
+def build_mjpeg_chunk(jpeg: bytes, timestamp: Optional[float] = None) -> bytes:
+    """
+    JPEG 바이트를 multipart/x-mixed-replace 파트 하나로 감싸기
+
+    timestamp(캡처 시각, Unix epoch 초)를 주면 X-Frame-Timestamp 파트 헤더를 붙인다.
+    """
+    headers = b"Content-Type: image/jpeg\r\n"
+    if timestamp is not None:
+        headers += b"X-Frame-Timestamp: %.6f\r\n" % timestamp
+    return MJPEG_BOUNDARY + b"\r\n" + headers + b"\r\n" + jpeg + b"\r\n"
+
+
+class EncodedFrame:
+    """
+    스트림 종류 하나로 인코딩된 프레임 - 모든 구독자가 같은 객체를 공유
+
+    jpeg은 WebSocket 등 원시 JPEG이 필요한 소비자용, chunk는 multipart 소비자용이며
+    chunk는 처음 요청될 때 한 번만 만든다.
+    encoded_at/enqueued_at은 지연 측정용 모노토닉 시각이다.
+    """
+
+    __slots__ = ("frame", "variant", "jpeg", "encoded_at", "enqueued_at", "_chunk", "_stamped_chunk")
+
+    def __init__(self, frame: Frame, variant: StreamVariant, jpeg: bytes):
+        self.frame = frame
+        self.variant = variant
+        self.jpeg = jpeg
+        self.encoded_at = time.monotonic()
+        self.enqueued_at = self.encoded_at
+        self._chunk: Optional[bytes] = None
+        self._stamped_chunk: Optional[bytes] = None
+
+    @property
+    def seq(self) -> int:
+        return self.frame.seq
+
+    @property
+    def chunk(self) -> bytes:
+        if self._chunk is None:
+            self._chunk = build_mjpeg_chunk(self.jpeg)
+        return self._chunk
+
+    @property
+    def stamped_chunk(self) -> bytes:
+        """X-Frame-Timestamp 헤더가 붙은 청크 (요청한 시청자가 있을 때만 한 번 만듦)"""
+        if self._stamped_chunk is None:
+            self._stamped_chunk = build_mjpeg_chunk(self.jpeg, self.frame.captured_wall)
+        return self._stamped_chunk
+
+
+def variant_label(variant: StreamVariant) -> str:
+    """상태 표시용 종류 이름 - 모든 필드를 포함해 서로 다른 종류가 겹치지 않음"""
+    label = f"1/{variant.scale}@{variant.quality or 'orig'}"
+    if variant.overlay:
+        label += "+overlay"
+    if variant.crop is not None:
+        label += " crop={},{},{},{}".format(*variant.crop)
+    if variant.size is not None:
+        label += " out={}x{}".format(*variant.size)
+    return label
+
+
+class FrameBroadcaster:
+    """
+    새 프레임을 한 번만 JPEG 인코딩하고, 모든 구독자에게 같은 bytes 청크를 전달
+
+    캡처 스레드가 publish()로 프레임을 넘기면 구독 중인 스트림 종류(배율, 화질)별로
+    한 번씩만 청크를 만든다. 원본 종류 구독은 패스스루 프레임의 카메라 JPEG을 그대로 써서
+    인코딩 자체가 없다.
+    구독자는 wait_for_chunk()로 마지막으로 받은 시퀀스 이후의 청크를 기다린다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._demand: Dict[StreamVariant, int] = {}
+        self._notifiers: Dict[StreamVariant, FrameNotifier] = {}
+        self.encoded_frames = 0
+        self.passthrough_frames = 0
+        self.published_frames = 0
+
+    def _notifier(self, variant: StreamVariant) -> FrameNotifier:
+        notifier = self._notifiers.get(variant)
+        if notifier is None:
+            with self._lock:
+                notifier = self._notifiers.setdefault(variant, FrameNotifier())
+        return notifier
+
+    def subscribe(self, variant: StreamVariant = StreamVariant()) -> int:
+        """구독자 등록 (반환값: 해당 스트림 종류의 구독자 수)"""
+        with self._lock:
+            self._demand[variant] = self._demand.get(variant, 0) + 1
+            return self._demand[variant]
+
+    def unsubscribe(self, variant: StreamVariant = StreamVariant()) -> int:
+        """구독자 해제 (반환값: 해당 스트림 종류의 구독자 수)"""
+        with self._lock:
+            count = self._demand.get(variant, 0) - 1
+            if count > 0:
+                self._demand[variant] = count
+                return count
+            self._demand.pop(variant, None)
+            notifier = self._notifiers.pop(variant, None)
+        # 더 이상 아무도 보지 않는 종류의 청크는 들고 있지 않음
+        if notifier is not None:
+            notifier.clear()
+        return 0
+
+    def resubscribe(self, old_variant: StreamVariant, new_variant: StreamVariant) -> None:
+        """적응형 단계 변경 시 구독 종류 교체"""
+        self.subscribe(new_variant)
+        self.unsubscribe(old_variant)
+
+    @property
+    def subscribers(self) -> int:
+        with self._lock:
+            return sum(self._demand.values())
+
+    def publish(self, frame: Frame) -> None:
+        """캡처 스레드에서 호출 - 구독 중인 스트림 종류마다 한 번만 청크를 만들어 공유"""
+        self.published_frames += 1
+        with self._lock:
+            demand = dict(self._demand)
+        if not demand:
+            return
+
+        # 장면 변화가 없으면 인코딩/전송 자체를 생략 (주기적인 keepalive 프레임만 통과)
+        if not motion_gate.should_send(frame):
+            self._record_suppressed(frame, demand)
+            return
+
+        variants = list(demand)
+        for variant in variants:
+            transcode = frame.is_transcode(variant)
+            started = time.monotonic()
+            jpeg = frame.render(variant)
+            if jpeg is None:
+                logger.warning("⚠️ JPEG 인코딩 실패 - 프레임 건너뜀")
+                continue
+            encoded = EncodedFrame(frame, variant, jpeg)
+            with self._lock:
+                if transcode:
+                    self.encoded_frames += 1
+                else:
+                    self.passthrough_frames += 1
+            if transcode:
+                latency_stats.record("encode", encoded.encoded_at - started)
+            # 해당 종류를 기다리는 모든 구독자를 즉시 깨움
+            encoded.enqueued_at = time.monotonic()
+            latency_stats.record("grab_to_enqueue", encoded.enqueued_at - frame.captured_at)
+            self._notifier(variant).notify(frame.seq, encoded)
+
+    def _record_suppressed(self, frame: Frame, demand: Dict[StreamVariant, int]) -> None:
+        """생략된 프레임이 아낀 전송량(직전 청크 크기 기준 추정)과 인코딩 수 집계"""
+        nbytes = 0
+        encodes = 0
+        for variant, count in demand.items():
+            _, encoded = self._notifier(variant).latest()
+            if encoded is not None:
+                nbytes += len(encoded.jpeg) * count
+            if frame.is_transcode(variant):
+                encodes += 1
+        motion_gate.record_saving(nbytes, encodes)
+
+    def get_latest_chunk(self, after_seq: int = 0,
+                         variant: StreamVariant = StreamVariant()) -> Tuple[int, Optional[bytes]]:
+        """after_seq 이후의 새 청크가 있으면 (seq, chunk), 없으면 (after_seq, None)"""
+        seq, encoded = self._notifier(variant).latest()
+        if encoded is None or seq <= after_seq:
+            return after_seq, None
+        return seq, encoded.chunk
+
+    async def wait_for_chunk(self, after_seq: int = 0, timeout: Optional[float] = None,
+                             variant: StreamVariant = StreamVariant()) -> Tuple[int, Optional[bytes]]:
+        """after_seq 이후의 청크가 도착할 때까지 대기 (timeout 시 (after_seq, None))"""
+        encoded = await self.wait_for_encoded(after_seq, timeout, variant)
+        if encoded is None:
+            return after_seq, None
+        return encoded.seq, encoded.chunk
+
+    async def wait_for_encoded(self, after_seq: int = 0, timeout: Optional[float] = None,
+                               variant: StreamVariant = StreamVariant()) -> Optional[EncodedFrame]:
+        """after_seq 이후의 EncodedFrame이 도착할 때까지 대기 (timeout 시 None)"""
+        return (await self._notifier(variant).wait_next(after_seq, timeout))[1]
+
+    def reset(self) -> None:
+        """캡처 세션 종료 시 캐시된 청크 정리"""
+        with self._lock:
+            notifiers = list(self._notifiers.values())
+        for notifier in notifiers:
+            notifier.clear()
+        motion_gate.reset()
+
+    def get_status(self) -> dict:
+        """브로드캐스터 상태 조회"""
+        with self._lock:
+            return {
+                "subscribers": sum(self._demand.values()),
+                "subscribers_by_variant": {variant_label(v): n for v, n in self._demand.items()},
+                "published_frames": self.published_frames,
+                "encoded_frames": self.encoded_frames,
+                "passthrough_frames": self.passthrough_frames,
+                "motion_gate": motion_gate.get_status(),
+            }
+
+
+# 전역 인스턴스 (캡처 세션당 하나)
+frame_broadcaster = FrameBroadcaster()
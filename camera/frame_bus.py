@@ -0,0 +1,182 @@
+# camera/frame_bus.py - 분석용 소비자(움직임 감지, YOLO, 녹화 등)를 위한 프로세스 내 프레임 버스
+import asyncio
+import threading
+import logging
+import numpy as np
+from typing import List, NamedTuple, Optional, Union
+
+from camera.capture_engine import capture_engine
+from camera.frame import Frame
+from camera.frame_notifier import FrameNotifier
+
+logger = logging.getLogger(__name__)
+
+# 구독 포맷 종류
+FORMAT_BGR = "bgr"
+FORMAT_GRAY = "gray"
+FORMAT_JPEG = "jpeg"
+FRAME_FORMATS = (FORMAT_BGR, FORMAT_GRAY, FORMAT_JPEG)
+# 축소 배율 (압축 프레임은 DCT 단계 축소 디코딩으로 바로 얻는 배율)
+FRAME_BUS_SCALES = (1, 2, 4, 8)
+
+
+class FrameFormat(NamedTuple):
+    """구독자가 받을 프레임 형식"""
+    kind: str = FORMAT_BGR
+    scale: int = 1
+    # JPEG 화질 (None이면 카메라 원본/기본 화질)
+    quality: Optional[int] = None
+
+
+class BusFrame(NamedTuple):
+    """구독자에게 전달되는 프레임 - data는 읽기 전용 배열(BGR/그레이) 또는 JPEG 바이트"""
+    seq: int
+    captured_at: float
+    captured_wall: float
+    data: Union[np.ndarray, bytes]
+
+
+def read_only(pixels: np.ndarray) -> np.ndarray:
+    """복사 없는 읽기 전용 뷰 - 공유 캐시 배열을 구독자가 수정하지 못하게 함"""
+    view = pixels.view()
+    view.flags.writeable = False
+    return view
+
+
+def convert(frame: Frame, frame_format: FrameFormat) -> Optional[Union[np.ndarray, bytes]]:
+    """
+    프레임을 요청 형식으로 변환 - Frame 캐시를 거치므로 같은 형식은 프레임당 한 번만 계산되고
+    같은 형식을 구독한 모든 소비자(그리고 스트리밍 경로)가 결과를 공유한다
+    """
+    if frame_format.kind == FORMAT_JPEG:
+        return frame.get_jpeg(frame_format.quality, frame_format.scale)
+    if frame_format.kind == FORMAT_GRAY:
+        pixels = frame.get_gray(frame_format.scale)
+    else:
+        pixels = frame.get_bgr(frame_format.scale)
+    return read_only(pixels) if pixels is not None else None
+
+
+class FrameSubscription:
+    """
+    프레임 버스 구독 하나
+
+    캡처 스레드는 max_fps에 맞춰 솎은 Frame 참조만 넘기고(변환 없음),
+    변환은 구독자가 read()/read_async()로 꺼낼 때 구독자 쪽에서 한 번 일어난다.
+    느린 구독자는 최신 프레임 한 장만 보므로 밀린 프레임이 쌓이지 않는다.
+    """
+
+    def __init__(self, bus: "FrameBus", name: str, frame_format: FrameFormat, max_fps: Optional[float]):
+        self.bus = bus
+        self.name = name
+        self.format = frame_format
+        self.max_fps = max_fps
+        self.last_seq = 0
+        self.offered = 0
+        self.read_frames = 0
+        self._frames = FrameNotifier()
+        self._last_offered_at = 0.0
+        self.closed = False
+
+    def _offer(self, frame: Frame) -> None:
+        """캡처 스레드에서 호출 - max_fps로 솎아서 알림만 보냄"""
+        if self.max_fps and frame.captured_at - self._last_offered_at < 1.0 / self.max_fps * 0.9:
+            return
+        self._last_offered_at = frame.captured_at
+        self.offered += 1
+        self._frames.notify(frame.seq, frame)
+
+    def _deliver(self, seq: int, frame: Optional[Frame]) -> Optional[BusFrame]:
+        if frame is None:
+            return None
+        self.last_seq = seq
+        data = convert(frame, self.format)
+        if data is None:
+            return None
+        self.read_frames += 1
+        return BusFrame(frame.seq, frame.captured_at, frame.captured_wall, data)
+
+    def read(self, timeout: Optional[float] = None) -> Optional[BusFrame]:
+        """다음 프레임까지 대기 후 변환해 반환 (스레드용, timeout 시 None)"""
+        return self._deliver(*self._frames.wait_next_sync(self.last_seq, timeout))
+
+    async def read_async(self, timeout: Optional[float] = None) -> Optional[BusFrame]:
+        """read()의 비동기 버전 - 변환(디코딩)은 이벤트 루프 밖에서"""
+        seq, frame = await self._frames.wait_next(self.last_seq, timeout)
+        if frame is None:
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._deliver, seq, frame)
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+    def __enter__(self) -> "FrameSubscription":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get_status(self) -> dict:
+        return {
+            "name": self.name,
+            "format": self.format._asdict(),
+            "max_fps": self.max_fps,
+            "offered": self.offered,
+            "read": self.read_frames,
+        }
+
+
+class FrameBus:
+    """
+    캡처 엔진 하나를 분석용 소비자들이 공유하는 프레임 버스
+
+    소비자마다 cv2.VideoCapture를 따로 여는 대신 subscribe()로 형식과 최대 fps를 선언한다.
+    첫 구독자가 오면 캡처 엔진에 소비자/프레임 sink로 붙고, 마지막 구독자가 떠나면 해제한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: List[FrameSubscription] = []
+
+    def subscribe(self, name: str, frame_format: FrameFormat = FrameFormat(),
+                  max_fps: Optional[float] = None) -> FrameSubscription:
+        """구독 추가 (블로킹 없음 - 장치는 캡처 엔진의 감시 스레드가 엶)"""
+        if frame_format.kind not in FRAME_FORMATS:
+            raise ValueError(f"지원하지 않는 형식: {frame_format.kind} ({', '.join(FRAME_FORMATS)})")
+        if frame_format.scale not in FRAME_BUS_SCALES:
+            raise ValueError(f"지원하지 않는 배율: {frame_format.scale} ({FRAME_BUS_SCALES})")
+        subscription = FrameSubscription(self, name, frame_format, max_fps)
+        with self._lock:
+            first = not self._subscriptions
+            # 목록은 통째로 교체 - 캡처 스레드가 잠금 없이 순회
+            self._subscriptions = self._subscriptions + [subscription]
+            if first:
+                capture_engine.add_frame_sink(self._publish)
+        capture_engine.acquire()
+        logger.info(f"🚌 프레임 버스 구독: {name} ({frame_format.kind}, 1/{frame_format.scale}, "
+                    f"최대 {max_fps or '제한 없음'}fps)")
+        return subscription
+
+    def unsubscribe(self, subscription: FrameSubscription) -> None:
+        with self._lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            self._subscriptions = [registered for registered in self._subscriptions if registered is not subscription]
+            if not self._subscriptions:
+                capture_engine.remove_frame_sink(self._publish)
+        capture_engine.release()
+        logger.info(f"🚌 프레임 버스 구독 해제: {subscription.name}")
+
+    def _publish(self, frame: Frame) -> None:
+        """캡처 엔진 sink - 구독마다 O(1) 알림만 (변환은 구독자 쪽에서)"""
+        for subscription in self._subscriptions:
+            subscription._offer(frame)
+
+    def get_status(self) -> dict:
+        return {"subscriptions": [subscription.get_status() for subscription in self._subscriptions]}
+
+
+# 전역 인스턴스
+frame_bus = FrameBus()
@@ -0,0 +1,88 @@
+# camera/frame_notifier.py - 프레임 시퀀스 기반 비동기 알림
+import asyncio
+import threading
+from typing import Any, List, Optional, Tuple
+
+
+def _resolve(future: asyncio.Future, result) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+class FrameNotifier:
+    """
+    프레임 시퀀스 번호 + "seq N 이후의 다음 프레임" 대기
+
+    캡처 스레드가 notify()를 호출하면 대기 중인 코루틴은 각자의 이벤트 루프에서
+    call_soon_threadsafe로 깨어나고, 스레드 소비자는 Condition으로 깨어난다.
+    폴링이나 sleep이 없으므로 새 프레임이 도착하는 즉시 전달된다.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._value: Any = None
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def latest(self) -> Tuple[int, Any]:
+        with self._cond:
+            return self._seq, self._value
+
+    def notify(self, seq: int, value: Any) -> None:
+        """새 프레임 발행 (어느 스레드에서든 호출 가능)"""
+        with self._cond:
+            self._seq = seq
+            self._value = value
+            waiters, self._waiters = self._waiters, []
+            self._cond.notify_all()
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future, (seq, value))
+            except RuntimeError:
+                # 이벤트 루프가 이미 닫힌 경우
+                pass
+
+    def clear(self) -> None:
+        """캐시된 값 정리 (시퀀스 번호는 유지)"""
+        with self._cond:
+            self._value = None
+
+    async def wait_next(self, after_seq: int, timeout: Optional[float] = None) -> Tuple[int, Any]:
+        """
+        after_seq 이후의 프레임이 있으면 즉시, 없으면 도착할 때까지 대기
+
+        Returns:
+            (seq, value) - timeout이 지나면 (after_seq, None)
+        """
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self._seq > after_seq and self._value is not None:
+                return self._seq, self._value
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return after_seq, None
+        finally:
+            # 타임아웃/취소된 경우 대기 목록에서 제거
+            if future.cancelled() or not future.done():
+                with self._cond:
+                    try:
+                        self._waiters.remove((loop, future))
+                    except ValueError:
+                        pass
+
+    def wait_next_sync(self, after_seq: int, timeout: Optional[float] = None) -> Tuple[int, Any]:
+        """스레드용 wait_next() - timeout이 지나면 (after_seq, None)"""
+        with self._cond:
+            ready = self._cond.wait_for(
+                lambda: self._seq > after_seq and self._value is not None, timeout
+            )
+            if not ready:
+                return after_seq, None
+            return self._seq, self._value
@@ -0,0 +1,110 @@
+# camera/frame_ring.py - 최근 압축 프레임 링 버퍼 (바이트 상한)
+import threading
+import logging
+import numpy as np
+from collections import deque
+from typing import Deque, List, NamedTuple, Optional
+
+from camera.frame import Frame
+
+logger = logging.getLogger(__name__)
+
+# 링 버퍼 메모리 상한 (640x480 MJPG 약 30~60KB/프레임 기준 수 초 분량)
+# 패스스루가 아닌(BGR) 카메라는 프레임당 약 900KB이므로 같은 상한에서 프리롤이 짧아짐
+RING_BUFFER_MAX_BYTES = 16 * 1024 * 1024
+
+
+class RingEntry(NamedTuple):
+    """
+    링 버퍼 항목 - 카메라 원본 JPEG(compressed) 또는 BGR 픽셀(pixels) 중 하나
+
+    둘 다 캡처 후 바뀌지 않으므로 스냅샷 시 데이터 복사가 없다.
+    BGR 프레임은 클립을 실제로 저장할 때(jpeg 접근 시) 그 스레드에서 인코딩한다.
+    """
+    seq: int
+    captured_at: float  # time.monotonic()
+    wall_time: float    # time.time()
+    compressed: Optional[bytes]
+    pixels: Optional[np.ndarray]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.compressed) if self.compressed is not None else self.pixels.nbytes
+
+    def to_frame(self) -> Frame:
+        """Frame으로 (데이터 참조만 - 인코딩/복사 없음)"""
+        return Frame(self.seq, jpeg=self.compressed, bgr=self.pixels, captured_at=self.captured_at)
+
+    @property
+    def jpeg(self) -> Optional[bytes]:
+        """JPEG 바이트 - 원본이 있으면 그대로, BGR이면 호출한 스레드에서 인코딩 (블로킹)"""
+        if self.compressed is not None:
+            return self.compressed
+        return self.to_frame().get_jpeg()
+
+
+class FrameRingBuffer:
+    """
+    최근 프레임을 개수가 아닌 전체 바이트 수로 제한해 보관
+
+    캡처 스레드가 push()로 넣고, 이벤트 훅은 snapshot()으로 구간을 꺼낸다.
+    항목은 불변이므로 스냅샷은 참조 목록만 만들고 프레임 데이터는 복사하지 않는다.
+    캡처 스레드에서는 인코딩하지 않는다 - 클립으로 잘리지 않는 대부분의 프레임은 인코딩 비용이 없다.
+    """
+
+    def __init__(self, max_bytes: int = RING_BUFFER_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: Deque[RingEntry] = deque()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evicted_frames = 0
+
+    def push(self, frame: Frame) -> None:
+        """캡처 스레드에서 호출 - 원본 JPEG(없으면 BGR 픽셀)을 넣고 상한을 넘는 오래된 프레임 제거"""
+        if frame.is_compressed:
+            entry = RingEntry(frame.seq, frame.captured_at, frame.captured_wall, frame.get_jpeg(), None)
+        else:
+            # Frame 자체가 아니라 원본 픽셀만 보관 - 스트리밍용 축소/인코딩 캐시를 붙잡지 않음
+            pixels = frame.get_bgr()
+            if pixels is None:
+                return
+            entry = RingEntry(frame.seq, frame.captured_at, frame.captured_wall, None, pixels)
+        with self._lock:
+            self._entries.append(entry)
+            self._bytes += entry.nbytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old = self._entries.popleft()
+                self._bytes -= old.nbytes
+                self.evicted_frames += 1
+
+    def snapshot(self, since: Optional[float] = None, until: Optional[float] = None) -> List[RingEntry]:
+        """captured_at(monotonic) 기준 [since, until] 구간의 항목 목록 (프레임 복사 없음)"""
+        with self._lock:
+            entries = list(self._entries)
+        if since is None and until is None:
+            return entries
+        return [
+            entry for entry in entries
+            if (since is None or entry.captured_at >= since)
+            and (until is None or entry.captured_at <= until)
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_status(self) -> dict:
+        with self._lock:
+            span = (self._entries[-1].captured_at - self._entries[0].captured_at) if self._entries else 0.0
+            return {
+                "frames": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "span_seconds": round(span, 2),
+                "evicted_frames": self.evicted_frames,
+            }
+
+
+# 전역 인스턴스
+frame_ring = FrameRingBuffer()
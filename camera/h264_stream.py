@@ -0,0 +1,352 @@
+# camera/h264_stream.py - ffmpeg 별도 프로세스로 만드는 H.264 (fragmented MP4) 스트림
+import re
+import queue
+import asyncio
+import shutil
+import struct
+import threading
+import subprocess
+import logging
+from typing import List, Optional
+
+from camera.capture_engine import capture_engine
+from camera.frame import Frame
+from camera.frame_notifier import FrameNotifier
+
+logger = logging.getLogger(__name__)
+
+# H.264 설정
+FFMPEG_BINARY = "ffmpeg"
+# libx264 (소프트웨어) 또는 h264_v4l2m2m (라즈베리 파이 하드웨어 인코더)
+H264_ENCODER = "libx264"
+H264_BITRATE = "300k"
+H264_FPS = 15
+# GOP 길이 (프레임) - fragment 하나가 GOP 하나이므로 새 시청자의 시작 지연과 같음
+H264_GOP = 15
+H264_SCALE = 2
+H264_PRESET = "ultrafast"
+# 인코더 입력 대기열 (프레임 수) - 가득 차면 캡처를 막지 않고 버림
+H264_QUEUE_FRAMES = 15
+# 요청으로 바꿀 수 있는 값의 허용 범위 (ffmpeg 인자로 그대로 들어가므로 검증 필수)
+H264_BITRATE_PATTERN = re.compile(r"^\d+[kM]?$")
+H264_BITRATE_MAX = 8_000_000  # 비트/초
+H264_GOP_RANGE = (1, 300)
+FRAGMENT_WAIT_TIMEOUT = 2.0
+
+_BOX_HEADER = struct.Struct(">I4s")
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which(FFMPEG_BINARY) is not None
+
+
+def validate_bitrate(bitrate: str) -> int:
+    """"300k", "2M", "500000" 형식 검증 → 비트/초 (잘못되면 ValueError)"""
+    if not H264_BITRATE_PATTERN.fullmatch(bitrate):
+        raise ValueError(f"bitrate 형식 오류: {bitrate} (예: 300k, 2M)")
+    value = int(bitrate.rstrip("kM")) * {"k": 1000, "M": 1_000_000}.get(bitrate[-1], 1)
+    if not 0 < value <= H264_BITRATE_MAX:
+        raise ValueError(f"bitrate 범위 오류: {bitrate} (최대 {H264_BITRATE_MAX // 1_000_000}M)")
+    return value
+
+
+def build_ffmpeg_command(width: int, height: int, bitrate: str = H264_BITRATE, gop: int = H264_GOP,
+                         fps: int = H264_FPS, encoder: str = H264_ENCODER) -> List[str]:
+    """JPEG 프레임(stdin) → H.264 fragmented MP4(stdout) 명령"""
+    command = [
+        FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+        # 입력 프레임 도착 시각을 그대로 타임스탬프로 사용 (가변 프레임레이트)
+        "-use_wallclock_as_timestamps", "1", "-fflags", "nobuffer",
+        "-f", "mjpeg", "-i", "pipe:0",
+        "-vf", f"scale={width}:{height}", "-pix_fmt", "yuv420p",
+        "-c:v", encoder, "-b:v", bitrate, "-maxrate", bitrate, "-bufsize", bitrate,
+        "-g", str(gop), "-keyint_min", str(gop), "-r", str(fps),
+    ]
+    if encoder == "libx264":
+        command += ["-preset", H264_PRESET, "-tune", "zerolatency", "-profile:v", "baseline"]
+    command += [
+        # 키프레임마다 fragment (moof+mdat) - 초기화 세그먼트(ftyp+moov)는 한 번만
+        "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+        "-f", "mp4", "pipe:1",
+    ]
+    return command
+
+
+class H264Stream:
+    """
+    공유 캡처 파이프라인 → ffmpeg 프로세스 → 모든 H.264 시청자가 공유하는 fragment
+
+    캡처 스레드는 frame sink로 JPEG 프레임을 대기열에 넣기만 하고, 입력 스레드가 ffmpeg stdin에
+    쓴다 (패스스루면 카메라 JPEG 그대로 - 파이썬에서 디코딩 없음). 출력 스레드는 stdout의 MP4
+    박스를 잘라 초기화 세그먼트는 캐시하고 fragment는 FrameNotifier로 시청자에게 알린다.
+    인코딩은 별도 프로세스이므로 웹 서버 프로세스의 응답성에 영향을 주지 않는다.
+    첫 시청자가 붙을 때 시작하고 마지막 시청자가 떠나면 종료한다.
+    """
+
+    def __init__(self, bitrate: str = H264_BITRATE, gop: int = H264_GOP,
+                 fps: int = H264_FPS, scale: int = H264_SCALE):
+        self.bitrate = bitrate
+        self.gop = gop
+        self.fps = fps
+        self.scale = scale
+        self.process: Optional[subprocess.Popen] = None
+        self.viewers = 0
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Frame]]" = queue.Queue(maxsize=H264_QUEUE_FRAMES)
+        self._fragments = FrameNotifier()
+        self._fragment_seq = 0
+        # ffmpeg 프로세스 세대 - 재시작 후 이전 프로세스의 출력 스레드가 내보내는 fragment를 버림
+        self._generation = 0
+        self.init_segment: Optional[bytes] = None
+        self._last_offered_at = 0.0
+        self.frames_in = 0
+        self.dropped_frames = 0
+        self.fragments_out = 0
+        self.bytes_out = 0
+        self.starts = 0
+
+    # --------------------------------------------------------
+    def subscribe(self) -> bool:
+        """시청자 등록 - 첫 시청자면 ffmpeg 시작 (블로킹 - 이벤트 루프 밖에서 호출, ffmpeg가 없으면 False)"""
+        with self._lock:
+            if self.process is None or self.process.poll() is not None:
+                if not self._start():
+                    return False
+            self.viewers += 1
+            return True
+
+    def unsubscribe(self) -> None:
+        with self._lock:
+            self.viewers = max(self.viewers - 1, 0)
+            if self.viewers == 0:
+                self._stop()
+
+    def configure(self, bitrate: Optional[str] = None, gop: Optional[int] = None) -> bool:
+        """
+        비트레이트/GOP 변경 - 실행 중인 인코더가 없을 때만 적용 (반환값: 적용 여부)
+
+        인코더 하나를 모든 시청자가 공유하므로, 이미 시청 중인 사람의 설정을 다른 요청이 바꾸지 않는다.
+        잘못된 값이면 ValueError.
+        """
+        if bitrate is not None:
+            validate_bitrate(bitrate)
+        if gop is not None and not H264_GOP_RANGE[0] <= gop <= H264_GOP_RANGE[1]:
+            raise ValueError(f"gop은 {H264_GOP_RANGE[0]}~{H264_GOP_RANGE[1]} 사이여야 함: {gop}")
+        with self._lock:
+            if self.process is not None and self.process.poll() is None:
+                return False
+            if bitrate is not None:
+                self.bitrate = bitrate
+            if gop is not None:
+                self.gop = gop
+            return True
+
+    def shutdown(self) -> None:
+        """서버 종료 시 ffmpeg 정리"""
+        with self._lock:
+            process = self.process
+            self._stop()
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def _start(self) -> bool:
+        """ffmpeg 프로세스와 입출력 스레드 시작 (_lock 보유 상태에서 호출)"""
+        if not ffmpeg_available():
+            logger.error(f"❌ {FFMPEG_BINARY}를 찾을 수 없음 - H.264 스트림 사용 불가")
+            return False
+        width = capture_engine.width // self.scale
+        height = capture_engine.height // self.scale
+        command = build_ffmpeg_command(width, height, self.bitrate, self.gop, self.fps)
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL, bufsize=0)
+        except OSError as e:
+            logger.error(f"❌ ffmpeg 실행 실패: {e}")
+            return False
+        self.starts += 1
+        self._generation += 1
+        self.init_segment = None
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        threading.Thread(target=self._feed, args=(self.process,), daemon=True).start()
+        threading.Thread(target=self._read_output, args=(self.process, self._generation), daemon=True).start()
+        capture_engine.acquire()
+        capture_engine.add_frame_sink(self._offer)
+        logger.info(f"🎞 H.264 인코더 시작 ({width}x{height}@{self.fps}, {self.bitrate}, GOP {self.gop})")
+        return True
+
+    def _stop(self) -> None:
+        """ffmpeg 종료 (_lock 보유 상태에서 호출, 블로킹 없음)"""
+        if self.process is None:
+            return
+        # 종료 중인 프로세스의 출력 스레드가 남은 fragment를 내보내지 않도록 세대를 넘김
+        self._generation += 1
+        capture_engine.remove_frame_sink(self._offer)
+        capture_engine.release()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            # 입력 스레드가 막혀 있으면 stdin을 닫아 ffmpeg를 끝냄
+            self.process.kill()
+        self.process = None
+        self._fragments.clear()
+        logger.info("🎞 H.264 인코더 종료")
+
+    # --------------------------------------------------------
+    def _offer(self, frame: Frame) -> None:
+        """캡처 스레드에서 호출 - H264_FPS로 솎아서 대기열에 넣고, 가득 차면 버림"""
+        if frame.captured_at - self._last_offered_at < 1.0 / self.fps * 0.9:
+            return
+        self._last_offered_at = frame.captured_at
+        try:
+            self._queue.put_nowait(frame)
+        except queue.Full:
+            self.dropped_frames += 1
+
+    def _feed(self, process: subprocess.Popen) -> None:
+        """입력 스레드 - JPEG을 ffmpeg stdin에 씀 (파이프가 막히면 이 스레드만 기다림)"""
+        try:
+            while True:
+                frame = self._queue.get()
+                if frame is None:
+                    break
+                jpeg = frame.get_jpeg()
+                if jpeg is None:
+                    continue
+                process.stdin.write(jpeg)
+                self.frames_in += 1
+        except (BrokenPipeError, OSError) as e:
+            logger.warning(f"⚠️ ffmpeg 입력 종료: {e}")
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    def _read_output(self, process: subprocess.Popen, generation: int) -> None:
+        """
+        출력 스레드 - MP4 박스 단위로 잘라 초기화 세그먼트/fragment로 나눔
+
+        재시작으로 세대가 바뀌면 이 프로세스의 남은 출력은 공유 상태에 반영하지 않고 읽어서 버린다
+        (ffmpeg가 stdout에 막히지 않고 끝나도록). 세대 확인과 반영은 _lock 안에서 - _start()와 겹치지 않음.
+        """
+        init_parts: List[bytes] = []
+        moof: Optional[bytes] = None
+        stdout = process.stdout
+        try:
+            while True:
+                box = self._read_box(stdout)
+                if box is None:
+                    break
+                box_type = box[4:8]
+                if box_type in (b"ftyp", b"moov"):
+                    init_parts.append(box)
+                    if box_type == b"moov":
+                        with self._lock:
+                            if generation == self._generation:
+                                self.init_segment = b"".join(init_parts)
+                elif box_type == b"moof":
+                    moof = box
+                elif box_type == b"mdat" and moof is not None:
+                    fragment = moof + box
+                    moof = None
+                    with self._lock:
+                        if generation != self._generation:
+                            continue
+                        self._fragment_seq += 1
+                        self.fragments_out += 1
+                        self.bytes_out += len(fragment)
+                        self._fragments.notify(self._fragment_seq, fragment)
+        finally:
+            process.wait()
+            logger.info(f"🎞 ffmpeg 종료 (코드 {process.returncode})")
+
+    @staticmethod
+    def _read_box(stream) -> Optional[bytes]:
+        header = H264Stream._read_exact(stream, 8)
+        if header is None:
+            return None
+        size, _ = _BOX_HEADER.unpack(header)
+        if size == 1:
+            # 64비트 크기 박스
+            large = H264Stream._read_exact(stream, 8)
+            if large is None:
+                return None
+            size = struct.unpack(">Q", large)[0]
+            header += large
+        body = H264Stream._read_exact(stream, size - len(header))
+        if body is None:
+            return None
+        return header + body
+
+    @staticmethod
+    def _read_exact(stream, size: int) -> Optional[bytes]:
+        chunks = []
+        remaining = size
+        while remaining > 0:
+            chunk = stream.read(remaining)
+            if not chunk:
+                return None
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+    # --------------------------------------------------------
+    async def wait_for_fragment(self, after_seq: int, timeout: float = FRAGMENT_WAIT_TIMEOUT):
+        """after_seq 이후의 fragment 대기 - (seq, fragment) 또는 (after_seq, None)"""
+        return await self._fragments.wait_next(after_seq, timeout)
+
+    @property
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def get_status(self) -> dict:
+        return {
+            "available": ffmpeg_available(),
+            "running": self.is_running,
+            "viewers": self.viewers,
+            "pid": self.process.pid if self.process is not None else None,
+            "bitrate": self.bitrate,
+            "gop": self.gop,
+            "fps": self.fps,
+            "scale": self.scale,
+            "frames_in": self.frames_in,
+            "dropped_frames": self.dropped_frames,
+            "fragments_out": self.fragments_out,
+            "bytes_out": self.bytes_out,
+            "starts": self.starts,
+        }
+
+
+# 전역 인스턴스
+h264_stream = H264Stream()
+
+
+async def stream_h264():
+    """
+    H.264 시청자 하나용 비동기 생성기 - 초기화 세그먼트 후 새 fragment(GOP)부터 전달
+
+    fragment마다 키프레임으로 시작하므로 중간에 들어온 시청자도 바로 재생할 수 있다.
+    """
+    # ffmpeg 실행과 캡처 엔진 등록은 이벤트 루프 밖에서
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(None, h264_stream.subscribe):
+        return
+    seq = 0
+    sent_init = False
+    try:
+        while True:
+            seq, fragment = await h264_stream.wait_for_fragment(seq)
+            if fragment is None:
+                if not h264_stream.is_running:
+                    logger.warning("⚠️ H.264 인코더가 중지됨 - 스트림 종료")
+                    break
+                continue
+            if not sent_init:
+                if h264_stream.init_segment is None:
+                    continue
+                yield h264_stream.init_segment
+                sent_init = True
+            yield fragment
+    finally:
+        h264_stream.unsubscribe()
@@ -0,0 +1,263 @@
+# camera/jpeg_encoder.py - 교체 가능한 JPEG 인코더 백엔드 + 자동 선택
+import io
+import abc
+import cv2
+import time
+import threading
+import logging
+import numpy as np
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 선택적 백엔드 (설치되어 있을 때만 사용)
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_444, TJSAMP_422, TJSAMP_420
+except ImportError:
+    TurboJPEG = None
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# quality=None일 때 쓰는 화질 (cv2.imencode 기본값과 동일)
+DEFAULT_JPEG_QUALITY = 95
+
+# 인코더 설정
+# "auto"면 시작 시 마이크로 벤치마크로 가장 빠른 백엔드를 고름
+JPEG_ENCODER_BACKEND = "auto"
+# 색차 서브샘플링 ("444", "422", "420") - 420이 가장 작고 빠름
+JPEG_SUBSAMPLING = "420"
+# 허프만 테이블 최적화 (크기 약간 감소, 인코딩 느려짐)
+JPEG_OPTIMIZE = False
+
+# 벤치마크 설정 (캡처 해상도 기준 샘플 이미지로 반복 인코딩)
+BENCHMARK_WIDTH = 640
+BENCHMARK_HEIGHT = 480
+BENCHMARK_ROUNDS = 10
+
+# 백엔드 우선순위 (벤치마크 없이 고를 때, 같은 속도일 때)
+BACKEND_ORDER = ("turbojpeg", "pillow", "opencv")
+
+
+class JpegEncoderBackend(abc.ABC):
+    """JPEG 인코더 백엔드 공통 인터페이스 - encode()는 BGR 배열을 받음"""
+
+    name = "base"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def encode(self, bgr: np.ndarray, quality: int = DEFAULT_JPEG_QUALITY,
+               subsampling: str = JPEG_SUBSAMPLING, optimize: bool = JPEG_OPTIMIZE) -> Optional[bytes]:
+        """BGR 배열 → JPEG 바이트 (실패 시 None)"""
+
+
+class OpenCvEncoder(JpegEncoderBackend):
+    """cv2.imencode (항상 사용 가능)"""
+
+    name = "opencv"
+    # IMWRITE_JPEG_SAMPLING_FACTOR는 OpenCV 4.5.5 이상에만 있음
+    _SAMPLING = {
+        "444": getattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR_444", None),
+        "422": getattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR_422", None),
+        "420": getattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR_420", None),
+    }
+
+    def encode(self, bgr, quality=DEFAULT_JPEG_QUALITY, subsampling=JPEG_SUBSAMPLING, optimize=JPEG_OPTIMIZE):
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        if optimize:
+            params += [int(cv2.IMWRITE_JPEG_OPTIMIZE), 1]
+        sampling = self._SAMPLING.get(subsampling)
+        if sampling is not None:
+            params += [int(cv2.IMWRITE_JPEG_SAMPLING_FACTOR), int(sampling)]
+        ok, jpeg = cv2.imencode('.jpg', bgr, params)
+        return jpeg.tobytes() if ok else None
+
+
+class TurboJpegEncoder(JpegEncoderBackend):
+    """PyTurboJPEG (libjpeg-turbo 직접 호출) - optimize는 지원하지 않음"""
+
+    name = "turbojpeg"
+
+    def __init__(self):
+        self._turbo = None
+        if TurboJPEG is not None:
+            try:
+                self._turbo = TurboJPEG()
+                self._sampling = {"444": TJSAMP_444, "422": TJSAMP_422, "420": TJSAMP_420}
+            except Exception as e:
+                # 파이썬 패키지는 있어도 libturbojpeg 공유 라이브러리가 없을 수 있음
+                logger.info(f"ℹ️ TurboJPEG 사용 불가: {e}")
+
+    @property
+    def available(self) -> bool:
+        return self._turbo is not None
+
+    def encode(self, bgr, quality=DEFAULT_JPEG_QUALITY, subsampling=JPEG_SUBSAMPLING, optimize=JPEG_OPTIMIZE):
+        return self._turbo.encode(bgr, quality=quality, jpeg_subsample=self._sampling[subsampling])
+
+
+class PillowEncoder(JpegEncoderBackend):
+    """Pillow / Pillow-SIMD (같은 패키지 이름으로 설치됨)"""
+
+    name = "pillow"
+    _SAMPLING = {"444": 0, "422": 1, "420": 2}
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def encode(self, bgr, quality=DEFAULT_JPEG_QUALITY, subsampling=JPEG_SUBSAMPLING, optimize=JPEG_OPTIMIZE):
+        # BGR → RGB는 뷰(복사 없음)를 만든 뒤 Pillow가 한 번 복사
+        image = Image.fromarray(np.ascontiguousarray(bgr[:, :, ::-1]))
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=quality, subsampling=self._SAMPLING[subsampling], optimize=optimize)
+        return buffer.getvalue()
+
+
+class JpegEncoder:
+    """
+    모든 스트리밍 경로가 공유하는 JPEG 인코더
+
+    사용 가능한 백엔드 중 하나를 골라 quality/subsampling/optimize 설정으로 인코딩하며,
+    백엔드별 인코딩 횟수와 소요 시간을 집계한다. select()는 서버 시작 시 한 번 호출하며,
+    호출 전에 encode()가 불리면 그때 선택한다.
+    """
+
+    def __init__(self, backend: str = JPEG_ENCODER_BACKEND, subsampling: str = JPEG_SUBSAMPLING,
+                 optimize: bool = JPEG_OPTIMIZE):
+        self.requested = backend
+        self.subsampling = subsampling
+        self.optimize = optimize
+        self.backends: Dict[str, JpegEncoderBackend] = {
+            encoder.name: encoder for encoder in (TurboJpegEncoder(), PillowEncoder(), OpenCvEncoder())
+        }
+        self._backend: Optional[JpegEncoderBackend] = None
+        self._lock = threading.Lock()
+        # 백엔드 선택(벤치마크) 전용 잠금 - 통계 잠금과 분리해 벤치마크 중에도 get_status()가 막히지 않음
+        self._select_lock = threading.Lock()
+        self.benchmark_ms: Dict[str, float] = {}
+        self.encoded_frames = 0
+        self.encode_time = 0.0
+        self.last_encode_ms = 0.0
+        self.max_encode_ms = 0.0
+        self.failures = 0
+
+    @property
+    def available_backends(self) -> List[str]:
+        return [name for name in BACKEND_ORDER if self.backends[name].available]
+
+    @property
+    def backend(self) -> str:
+        return self._backend.name if self._backend is not None else "unselected"
+
+    def select(self, benchmark: bool = True) -> str:
+        """백엔드 선택 - 요청한 백엔드가 없으면 자동 선택으로 대체"""
+        with self._select_lock:
+            return self._select(benchmark)
+
+    def _ensure_selected(self) -> JpegEncoderBackend:
+        """select() 전에 encode()가 동시에 여러 번 불려도 선택(벤치마크)은 한 번만"""
+        with self._select_lock:
+            if self._backend is None:
+                self._select(benchmark=True)
+            return self._backend
+
+    def _select(self, benchmark: bool) -> str:
+        """(_select_lock 보유 상태에서 호출)"""
+        available = self.available_backends
+        if self.requested != "auto":
+            if self.requested in available:
+                self._backend = self.backends[self.requested]
+                logger.info(f"🖼️ JPEG 인코더: {self.requested} (설정값)")
+                return self.requested
+            logger.warning(f"⚠️ JPEG 인코더 '{self.requested}' 사용 불가 - 자동 선택")
+
+        if benchmark and len(available) > 1:
+            self.benchmark_ms = self._benchmark(available)
+        if self.benchmark_ms:
+            name = min(self.benchmark_ms, key=self.benchmark_ms.get)
+        else:
+            name = available[0]
+        self._backend = self.backends[name]
+        logger.info(f"🖼️ JPEG 인코더: {name} (사용 가능: {', '.join(available)}, 측정: {self.benchmark_ms})")
+        return name
+
+    def _benchmark(self, names: List[str]) -> Dict[str, float]:
+        """샘플 프레임을 백엔드별로 반복 인코딩해 중앙값(ms) 측정"""
+        sample = self._benchmark_image()
+        results: Dict[str, float] = {}
+        for name in names:
+            encoder = self.backends[name]
+            try:
+                jpeg = encoder.encode(sample, DEFAULT_JPEG_QUALITY, self.subsampling, self.optimize)
+                if not jpeg or not jpeg.startswith(b"\xff\xd8"):
+                    raise ValueError("JPEG 출력이 아님")
+                times = []
+                for _ in range(BENCHMARK_ROUNDS):
+                    started = time.perf_counter()
+                    encoder.encode(sample, DEFAULT_JPEG_QUALITY, self.subsampling, self.optimize)
+                    times.append(time.perf_counter() - started)
+                results[name] = round(sorted(times)[len(times) // 2] * 1000, 3)
+            except Exception as e:
+                logger.warning(f"⚠️ JPEG 인코더 '{name}' 벤치마크 실패: {e}")
+        return results
+
+    @staticmethod
+    def _benchmark_image() -> np.ndarray:
+        """실제 영상과 비슷하게 그라디언트 + 잡음이 섞인 결정적 샘플"""
+        rng = np.random.default_rng(0)
+        xs = np.linspace(0, 255, BENCHMARK_WIDTH, dtype=np.uint8)
+        ys = np.linspace(0, 255, BENCHMARK_HEIGHT, dtype=np.uint8)
+        image = np.empty((BENCHMARK_HEIGHT, BENCHMARK_WIDTH, 3), np.uint8)
+        image[:, :, 0] = xs[np.newaxis, :]
+        image[:, :, 1] = ys[:, np.newaxis]
+        image[:, :, 2] = 128
+        noise = rng.integers(0, 32, image.shape, dtype=np.uint8)
+        return cv2.add(image, noise)
+
+    def encode(self, bgr: np.ndarray, quality: Optional[int] = None) -> Optional[bytes]:
+        """BGR 프레임 인코딩 (quality=None이면 DEFAULT_JPEG_QUALITY) - 실패 시 None"""
+        backend = self._backend
+        if backend is None:
+            backend = self._ensure_selected()
+        started = time.perf_counter()
+        try:
+            jpeg = backend.encode(bgr, DEFAULT_JPEG_QUALITY if quality is None else quality,
+                                  self.subsampling, self.optimize)
+        except Exception as e:
+            logger.error(f"❌ JPEG 인코딩 실패 ({backend.name}): {e}")
+            jpeg = None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            if jpeg is None:
+                self.failures += 1
+                return None
+            self.encoded_frames += 1
+            self.encode_time += elapsed_ms
+            self.last_encode_ms = elapsed_ms
+            self.max_encode_ms = max(self.max_encode_ms, elapsed_ms)
+        return jpeg
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "requested": self.requested,
+                "available": self.available_backends,
+                "subsampling": self.subsampling,
+                "optimize": self.optimize,
+                "benchmark_ms": self.benchmark_ms,
+                "encoded_frames": self.encoded_frames,
+                "avg_encode_ms": round(self.encode_time / max(self.encoded_frames, 1), 3),
+                "last_encode_ms": round(self.last_encode_ms, 3),
+                "max_encode_ms": round(self.max_encode_ms, 3),
+                "failures": self.failures,
+            }
+
+
+# 전역 인스턴스
+jpeg_encoder = JpegEncoder()
@@ -0,0 +1,148 @@
+# camera/latency_stats.py - 캡처 → 클라이언트 단계별 지연 히스토그램
+import time
+import bisect
+import threading
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 히스토그램 버킷 상한 (ms) - 마지막 버킷은 그 이상 전부
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+# 최근 몇 초 동안의 측정값으로 히스토그램을 만들지
+LATENCY_WINDOW_SECONDS = 10
+
+# 측정 단계 (모두 time.monotonic() 기준)
+#   sensor_to_grab      드라이버 버퍼 타임스탬프 → cap.grab() 반환 (카메라/드라이버 쪽 프레임 나이)
+#   decode              압축 프레임 디코딩 시간 (픽셀이 필요한 경우만)
+#   overlay             오버레이 레이어 합성 시간 (overlay=1 스트림만)
+#   encode              스트림 종류별 재인코딩 시간 (패스스루는 없음)
+#   grab_to_enqueue     cap.read() 반환 → 구독자 알림 (움직임 게이트/디코딩/인코딩 포함)
+#   enqueue_to_dequeue  구독자 알림 → 시청자 생성기가 깨어남 (이벤트 루프 대기)
+#   socket_write        청크를 소켓에 다 쓸 때까지
+#   grab_to_write       cap.read() 반환 → 소켓 쓰기 완료 (서버 내부 전체 지연)
+LATENCY_STAGES = (
+    "sensor_to_grab",
+    "decode",
+    "overlay",
+    "encode",
+    "grab_to_enqueue",
+    "enqueue_to_dequeue",
+    "socket_write",
+    "grab_to_write",
+)
+
+
+class RollingHistogram:
+    """
+    최근 window_seconds초 동안의 값으로 만드는 고정 버킷 히스토그램
+
+    1초 단위 슬롯에 버킷 카운트를 쌓고 오래된 슬롯을 버리므로 기록은 O(1),
+    메모리는 창 크기에만 비례한다. 백분위는 버킷 상한으로 근사한다.
+    """
+
+    def __init__(self, window_seconds: int = LATENCY_WINDOW_SECONDS,
+                 buckets_ms: Tuple[int, ...] = LATENCY_BUCKETS_MS):
+        self.window_seconds = window_seconds
+        self.buckets_ms = buckets_ms
+        # (초, 버킷 카운트, 합계 ms, 최대 ms)
+        self._slots: Deque[list] = deque()
+
+    def _current_slot(self, now: float) -> list:
+        second = int(now)
+        if not self._slots or self._slots[-1][0] != second:
+            self._slots.append([second, [0] * (len(self.buckets_ms) + 1), 0.0, 0.0])
+        self._expire(now)
+        return self._slots[-1]
+
+    def _expire(self, now: float) -> None:
+        oldest = int(now) - self.window_seconds + 1
+        while self._slots and self._slots[0][0] < oldest:
+            self._slots.popleft()
+
+    def record(self, seconds: float, now: float) -> None:
+        value_ms = max(seconds, 0.0) * 1000
+        slot = self._current_slot(now)
+        slot[1][bisect.bisect_left(self.buckets_ms, value_ms)] += 1
+        slot[2] += value_ms
+        slot[3] = max(slot[3], value_ms)
+
+    def snapshot(self, now: float) -> dict:
+        self._expire(now)
+        counts = [0] * (len(self.buckets_ms) + 1)
+        total_ms = 0.0
+        max_ms = 0.0
+        for _, slot_counts, slot_total, slot_max in self._slots:
+            for index, count in enumerate(slot_counts):
+                counts[index] += count
+            total_ms += slot_total
+            max_ms = max(max_ms, slot_max)
+        samples = sum(counts)
+        return {
+            "samples": samples,
+            "avg_ms": round(total_ms / samples, 2) if samples else 0.0,
+            "max_ms": round(max_ms, 2),
+            "p50_ms": self._percentile(counts, samples, 0.50, max_ms),
+            "p95_ms": self._percentile(counts, samples, 0.95, max_ms),
+            "p99_ms": self._percentile(counts, samples, 0.99, max_ms),
+            "histogram": self._labels(counts),
+        }
+
+    def _percentile(self, counts: List[int], samples: int, fraction: float, max_ms: float) -> float:
+        if not samples:
+            return 0.0
+        target = fraction * samples
+        running = 0
+        for index, count in enumerate(counts):
+            running += count
+            if running >= target:
+                # 마지막(상한 없는) 버킷이면 관측된 최댓값 사용
+                if index < len(self.buckets_ms):
+                    return float(min(self.buckets_ms[index], max_ms))
+                return round(max_ms, 2)
+        return round(max_ms, 2)
+
+    def _labels(self, counts: List[int]) -> Dict[str, int]:
+        labels = [f"<={bound}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+        return dict(zip(labels, counts))
+
+
+class LatencyStats:
+    """단계별 RollingHistogram 모음 (캡처 스레드/이벤트 루프 어디서든 기록 가능)"""
+
+    def __init__(self, window_seconds: int = LATENCY_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, RollingHistogram] = {
+            stage: RollingHistogram(window_seconds) for stage in LATENCY_STAGES
+        }
+
+    def record(self, stage: str, seconds: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = RollingHistogram(self.window_seconds)
+            histogram.record(seconds, now)
+
+    def record_delivery(self, captured_at: float, enqueued_at: float,
+                        dequeued_at: float, write_started: float, written_at: float) -> None:
+        """시청자 한 명에게 프레임 하나를 보낸 결과 기록 (스트리밍 경로 공통)"""
+        now = time.monotonic()
+        with self._lock:
+            self._histograms["enqueue_to_dequeue"].record(dequeued_at - enqueued_at, now)
+            self._histograms["socket_write"].record(written_at - write_started, now)
+            self._histograms["grab_to_write"].record(written_at - captured_at, now)
+
+    def get_status(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "window_seconds": self.window_seconds,
+                "stages": {stage: histogram.snapshot(now) for stage, histogram in self._histograms.items()},
+            }
+
+
+# 전역 인스턴스
+latency_stats = LatencyStats()
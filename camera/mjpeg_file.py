@@ -0,0 +1,59 @@
+# camera/mjpeg_file.py - JPEG 시퀀스 파일(.mjpeg) + 프레임 오프셋 인덱스
+import os
+import json
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MjpegFileWriter:
+    """
+    JPEG 프레임을 이어 붙인 .mjpeg 파일과 프레임 오프셋 인덱스(.json) 작성
+
+    .mjpeg 파일은 ffplay/VLC로 바로 재생되며, 인덱스로 임의 프레임에 바로 접근할 수 있다.
+    쓰기는 블로킹이므로 전용 작성 스레드에서만 사용한다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + ".json"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "wb")
+        self.frames: List[dict] = []
+        self.bytes_written = 0
+
+    def write(self, jpeg: bytes, wall_time: float, seq: Optional[int] = None) -> int:
+        """프레임 하나 추가 (반환값: 파일 내 오프셋)"""
+        offset = self.bytes_written
+        self._file.write(jpeg)
+        self.bytes_written += len(jpeg)
+        self.frames.append({"offset": offset, "length": len(jpeg), "time": wall_time, "seq": seq})
+        return offset
+
+    def close(self, **meta) -> dict:
+        """파일을 닫고 인덱스 작성 (반환값: 인덱스 내용)"""
+        self._file.close()
+        index = {
+            "file": os.path.basename(self.path),
+            "start_time": self.frames[0]["time"] if self.frames else None,
+            "end_time": self.frames[-1]["time"] if self.frames else None,
+            "frame_count": len(self.frames),
+            "bytes": self.bytes_written,
+            **meta,
+            "frames": self.frames,
+        }
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        return index
+
+
+def read_index(path: str) -> Optional[dict]:
+    """.mjpeg 파일의 인덱스 읽기 (없으면 None)"""
+    index_path = os.path.splitext(path)[0] + ".json"
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ 인덱스 읽기 실패 ({index_path}): {e}")
+        return None
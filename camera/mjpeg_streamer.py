@@ -1,137 +1,97 @@
-from fastapi import FastAPI, BackgroundTasks
-from fastapi.responses import StreamingResponse
-import cv2
-import threading
 import time
 import logging
+from typing import Optional, Tuple
+from camera.frame import StreamVariant
+from camera.frame_broadcaster import frame_broadcaster, build_mjpeg_chunk
+from camera.latency_stats import latency_stats
+from camera.capture_engine import capture_engine, STATE_STREAMING
+from camera.placeholder import placeholder_jpeg
+from camera.stream_control import AdaptiveStreamController, ViewerSession, viewer_registry
 
 logger = logging.getLogger(__name__)
 
-# 전역 변수
-cap = None
-latest_frame = None
-lock = threading.Lock()
-capture_thread = None
-capture_thread_running = False
-active_connections = 0  # 활성 연결 수 추적
-
-# --------------------------------------------------------
-def wait_for_camera_ready(device="/dev/video0", timeout=3):
-    start = time.time()
-    while time.time() - start < timeout:
-        temp_cap = cv2.VideoCapture(device, cv2.CAP_V4L2)
-        if temp_cap.isOpened():
-            return temp_cap
-        time.sleep(0.1)
-    return None
-
-# --------------------------------------------------------
-def camera_capture_thread():
-    global cap, latest_frame, capture_thread_running
-    logger.info("📹 카메라 캡처 스레드 시작")
-    while capture_thread_running:
-        if cap is None:
-            break
-        ret, frame = cap.read()
-        if not ret:
-            continue
-        with lock:
-            latest_frame = frame
-        time.sleep(1 / 30)  # 30fps 제한
-    logger.info("📹 카메라 캡처 스레드 종료")
-
-# --------------------------------------------------------
-def _force_release_camera():
-    global cap, capture_thread_running, capture_thread
-    capture_thread_running = False
-    if capture_thread and capture_thread.is_alive():
-        capture_thread.join(timeout=2)
-        if capture_thread.is_alive():
-            logging.warning("⚠️ 카메라 스레드 강제 종료")
-    capture_thread = None
-    if cap:
-        cap.release()
-        cap = None
-        logging.info("📹 (내부) 카메라 자원 강제 정리 완료")
+# 새 프레임이 이 시간 동안 없으면 캡처 엔진 상태를 다시 확인
+FRAME_WAIT_TIMEOUT = 1.0
 
 # --------------------------------------------------------
 def start_capture():
-    global cap, capture_thread, capture_thread_running, active_connections
-
-    # 이전 자원 정리 (active_connections는 건드리지 않음)
-    _force_release_camera()
-
-    active_connections += 1
-    logger.info(f"📹 카메라 연결 요청 (활성 연결: {active_connections})")
-
-    if capture_thread_running and capture_thread and capture_thread.is_alive():
-        logger.info("📹 이미 스트리밍 중 - 기존 자원 사용")
-        return
-
-    cap = wait_for_camera_ready("/dev/video0")
-    if not cap:
-        logger.error("❌ 카메라 열기 실패")
-        return
-
-    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 320)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 240)
-    cap.set(cv2.CAP_PROP_FPS, 15)
-
-    capture_thread_running = True
-    capture_thread = threading.Thread(target=camera_capture_thread, daemon=True)
-    capture_thread.start()
-    logger.info("📹 카메라 스트리밍 시작")
+    """캡처 엔진에 소비자 등록 (블로킹 없음 - 장치는 엔진의 감시 스레드가 엶)"""
+    capture_engine.acquire()
 
 # --------------------------------------------------------
 def stop_capture():
-    global cap, capture_thread_running, capture_thread, active_connections
-    
-    active_connections -= 1
-    if active_connections < 0:
-        logging.warning(f"⚠️ active_connections가 0 미만! 강제로 0으로 보정")
-        active_connections = 0
-    logging.info(f"📹 카메라 연결 해제 요청 (활성 연결: {active_connections})")
-    
-    # 활성 연결이 있으면 카메라를 끄지 않음
-    if active_connections > 0:
-        logging.info(f"📹 다른 클라이언트가 연결되어 있어 카메라 유지 (활성 연결: {active_connections})")
-        return
-    
-    logging.info("📹 모든 클라이언트 연결 해제됨 - 카메라 자원 정리 시작")
-    capture_thread_running = False
-
-    if capture_thread and capture_thread.is_alive():
-        capture_thread.join(timeout=2)
-        if capture_thread.is_alive():
-            logging.warning("⚠️ 카메라 스레드 강제 종료")
-    capture_thread = None
-
-    if cap:
-        cap.release()
-        cap = None
-        logging.info("📹 카메라 자원 정리 완료")
+    """캡처 엔진에서 소비자 해제 (마지막 소비자일 때만 장치 해제)"""
+    capture_engine.release()
 
 # --------------------------------------------------------
-def generate_mjpeg():
+async def stream_mjpeg(route: str = "/mjpeg", max_quality: Optional[int] = None, scale: int = 1,
+                       timestamps: bool = False, overlay: bool = False,
+                       crop: Optional[Tuple[int, int, int, int]] = None, size: Optional[Tuple[int, int]] = None):
+    """
+    공유 브로드캐스터의 청크를 새 프레임이 도착할 때마다 전달하는 비동기 생성기
+
+    sleep 폴링 없이 FrameNotifier로 깨어나며, 스레드풀 워커를 점유하지 않는다.
+    시청자별로 최신 프레임 한 장만 보므로 느린 클라이언트는 밀린 프레임을 건너뛰고,
+    전송 시간에 따라 max_quality를 상한으로 화질/fps 단계를 조절한다.
+    카메라가 열리는 중이거나 재연결 중이면 상태가 바뀔 때마다 안내 프레임을 한 장 보낸다.
+    scale은 해상도 피라미드 단계(1=원본, 2=1/2, 4=1/4)이며 같은 단계의 시청자끼리 인코딩을 공유한다.
+    timestamps=True면 각 파트에 X-Frame-Timestamp(캡처 시각, epoch 초) 헤더를 붙인다.
+    overlay=True면 공유 경로에서 한 번 합성된 오버레이 종류를 구독한다.
+    crop/size(디지털 줌)가 같은 시청자끼리는 잘라낸 영역의 인코딩을 공유한다.
+    """
     start_capture()
 
+    controller = AdaptiveStreamController(max_quality=max_quality, max_fps=capture_engine.fps)
+    session = ViewerSession(route, controller, scale)
+    viewer_registry.add(session)
+    variant = StreamVariant(scale, controller.quality, overlay, crop, size)
+    frame_broadcaster.subscribe(variant)
+    notified_state = None
     try:
         while True:
-            with lock:
-                frame = latest_frame.copy() if latest_frame is not None else None
-
-            if frame is not None:
-                _, jpeg = cv2.imencode('.jpg', frame)
-                yield (
-                    b"--frame\r\n"
-                    b"Content-Type: image/jpeg\r\n\r\n" + jpeg.tobytes() + b"\r\n"
-                )
-            time.sleep(1 / 30)
+            encoded = await frame_broadcaster.wait_for_encoded(
+                session.last_seq, FRAME_WAIT_TIMEOUT, variant
+            )
+            if encoded is None:
+                if not capture_engine.is_running:
+                    logger.warning("⚠️ 캡처 엔진이 중지됨 - 스트림 종료")
+                    break
+                # 연결은 유지한 채 "카메라 사용 불가" 안내 프레임을 상태가 바뀔 때만 보냄
+                state = capture_engine.state
+                if state != STATE_STREAMING and state != notified_state:
+                    notified_state = state
+                    jpeg = placeholder_jpeg(*variant.output_size(capture_engine.width, capture_engine.height), state)
+                    if jpeg is not None:
+                        yield build_mjpeg_chunk(jpeg)
+                continue
+            notified_state = None
+            dequeued_at = time.monotonic()
+            if not session.accept(encoded.seq, dequeued_at):
+                continue
+
+            chunk = encoded.stamped_chunk if timestamps else encoded.chunk
+            # yield에서 돌아오는 시점 = 서버가 청크를 소켓에 다 쓴 시점
+            sent_at = time.monotonic()
+            yield chunk
+            now = time.monotonic()
+            latency_stats.record_delivery(encoded.frame.captured_at, encoded.enqueued_at, dequeued_at, sent_at, now)
+            if session.sent(len(chunk), now, now - sent_at) and controller.quality != variant.quality:
+                new_variant = variant._replace(quality=controller.quality)
+                frame_broadcaster.resubscribe(variant, new_variant)
+                variant = new_variant
 
     except Exception as e:
         logger.error(f"❌ MJPEG 생성 중 예외 발생: {e}")
 
     finally:
+        # 취소된 태스크 안에서도 안전하도록 await 없이 즉시 해제 (O(1))
         logger.info("📹 클라이언트 연결 종료 - stop_capture() 호출")
+        viewer_registry.remove(session)
+        frame_broadcaster.unsubscribe(variant)
         stop_capture()
+
+# --------------------------------------------------------
+def generate_mjpeg(scale: int = 2, timestamps: bool = False, overlay: bool = False,
+                   crop: Optional[Tuple[int, int, int, int]] = None, size: Optional[Tuple[int, int]] = None):
+    """/mjpeg 스트림 생성기 (하위 호환성) - 원본 화질이 상한, 기본은 기존과 같은 1/2 해상도"""
+    return stream_mjpeg("/mjpeg", scale=scale, timestamps=timestamps, overlay=overlay, crop=crop, size=size)
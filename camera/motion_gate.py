@@ -0,0 +1,129 @@
+# camera/motion_gate.py - 변화 없는 프레임의 인코딩/전송 생략
+import time
+import threading
+import logging
+import numpy as np
+from typing import Optional
+
+from camera.frame import Frame
+
+logger = logging.getLogger(__name__)
+
+# 움직임 감지 설정
+MOTION_GATE_ENABLED = True
+# 픽셀 밝기 차이가 이 값보다 크면 바뀐 픽셀로 간주 (0~255)
+MOTION_PIXEL_THRESHOLD = 12
+# 바뀐 픽셀 비율이 이 값 이상이면 프레임 전체가 바뀐 것으로 간주
+MOTION_AREA_THRESHOLD = 0.005
+# 변화가 없어도 이 간격마다 한 장은 보냄 (연결 유지/화면 갱신)
+KEEPALIVE_INTERVAL = 1.0
+
+
+def change_ratio(gray: np.ndarray, reference: Optional[np.ndarray],
+                 pixel_threshold: int = MOTION_PIXEL_THRESHOLD) -> float:
+    """기준 프레임 대비 바뀐 픽셀 비율 (기준이 없거나 크기가 다르면 1.0)"""
+    if reference is None or reference.shape != gray.shape:
+        return 1.0
+    # 벡터화된 절대 차이 - 80x60 기준 수십 마이크로초
+    diff = np.abs(gray.astype(np.int16) - reference.astype(np.int16))
+    return float(np.count_nonzero(diff > pixel_threshold)) / diff.size
+
+
+class MotionGate:
+    """
+    저해상도 그레이스케일 프레임을 NumPy로 비교해 바뀐 프레임만 통과
+
+    비교 기준은 마지막으로 통과시킨 프레임이므로 천천히 바뀌는 장면도 누적되어 감지된다.
+    변화가 없는 동안에는 KEEPALIVE_INTERVAL마다 한 장만 통과시킨다.
+    """
+
+    def __init__(self, enabled: bool = MOTION_GATE_ENABLED,
+                 pixel_threshold: int = MOTION_PIXEL_THRESHOLD,
+                 area_threshold: float = MOTION_AREA_THRESHOLD,
+                 keepalive_interval: float = KEEPALIVE_INTERVAL):
+        self.enabled = enabled
+        self.pixel_threshold = pixel_threshold
+        self.area_threshold = area_threshold
+        self.keepalive_interval = keepalive_interval
+        self._reference: Optional[np.ndarray] = None
+        self._last_pass_at = 0.0
+        self._lock = threading.Lock()
+        self.last_change_ratio = 0.0
+        self.frames_checked = 0
+        self.frames_changed = 0
+        self.frames_suppressed = 0
+        self.keepalives = 0
+        self.bytes_saved = 0
+        self.encodes_saved = 0
+        self.check_time = 0.0
+
+    def should_send(self, frame: Frame) -> bool:
+        """캡처 스레드에서 호출 - 시청자에게 보낼 프레임이면 True"""
+        if not self.enabled:
+            return True
+
+        started = time.perf_counter()
+        gray = frame.get_gray_small()
+        if gray is None:
+            return True
+
+        with self._lock:
+            self.frames_checked += 1
+            reference = self._reference
+            ratio = change_ratio(gray, reference, self.pixel_threshold)
+            changed = ratio >= self.area_threshold
+            self.last_change_ratio = ratio
+
+            now = time.monotonic()
+            if changed:
+                self.frames_changed += 1
+            elif now - self._last_pass_at >= self.keepalive_interval:
+                self.keepalives += 1
+            else:
+                self.frames_suppressed += 1
+                self.check_time += time.perf_counter() - started
+                return False
+
+            self._reference = gray
+            self._last_pass_at = now
+            self.check_time += time.perf_counter() - started
+            return True
+
+    def is_changed(self, gray: np.ndarray, reference: Optional[np.ndarray]) -> bool:
+        """게이트와 같은 기준으로 장면이 바뀌었는지 (게이트 상태는 건드리지 않음)"""
+        return change_ratio(gray, reference, self.pixel_threshold) >= self.area_threshold
+
+    def record_saving(self, nbytes: int, encodes: int) -> None:
+        """생략된 프레임이 아낀 전송량/인코딩 수 집계"""
+        with self._lock:
+            self.bytes_saved += nbytes
+            self.encodes_saved += encodes
+
+    def reset(self) -> None:
+        """캡처 세션 종료 시 비교 기준 초기화"""
+        with self._lock:
+            self._reference = None
+            self._last_pass_at = 0.0
+
+    def get_status(self) -> dict:
+        with self._lock:
+            checked = max(self.frames_checked, 1)
+            return {
+                "enabled": self.enabled,
+                "pixel_threshold": self.pixel_threshold,
+                "area_threshold": self.area_threshold,
+                "keepalive_interval": self.keepalive_interval,
+                "last_change_ratio": round(self.last_change_ratio, 4),
+                "frames_checked": self.frames_checked,
+                "frames_changed": self.frames_changed,
+                "frames_suppressed": self.frames_suppressed,
+                "keepalives": self.keepalives,
+                "suppressed_ratio": round(self.frames_suppressed / checked, 3),
+                "bytes_saved": self.bytes_saved,
+                "encodes_saved": self.encodes_saved,
+                "avg_check_ms": round(self.check_time / checked * 1000, 3),
+            }
+
+
+# 전역 인스턴스
+motion_gate = MotionGate()
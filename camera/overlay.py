@@ -0,0 +1,228 @@
+# camera/overlay.py - 공유 프레임 경로에서 한 번만 합성하는 오버레이 (시각, 거리, 레이저 조준점)
+import cv2
+import threading
+import time
+import logging
+import numpy as np
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Hashable, List, Optional, Tuple
+
+from camera.latency_stats import latency_stats
+from utils import hardware_events
+
+logger = logging.getLogger(__name__)
+
+# 오버레이 설정
+OVERLAY_FONT = cv2.FONT_HERSHEY_SIMPLEX
+OVERLAY_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# 화면 중앙 조준선 (고정 레이어)
+OVERLAY_RETICLE = True
+# 이 시간보다 오래된 거리 값은 표시하지 않음 (초)
+DISTANCE_STALE_SECONDS = 5.0
+# 서보 각도 → 화면 좌표 매핑 (카메라와 레이저가 같은 방향을 볼 때의 근사값, 설치 후 보정)
+LASER_X_ANGLE_RANGE = (0, 180)   # 화면 왼쪽 끝 → 오른쪽 끝 각도
+LASER_Y_ANGLE_RANGE = (0, 180)   # 화면 위 끝 → 아래 끝 각도
+# 렌더링해 둔 레이어 마스크 캐시 크기 (해상도 × 레이어 상태 조합 수)
+OVERLAY_CACHE_SIZE = 64
+
+
+class LayerMask:
+    """
+    미리 렌더링한 레이어 조각 - 그려진 영역(바운딩 박스)만 색상과 알파로 보관
+
+    합성은 해당 영역만 정수 연산으로 섞으므로 전체 화면을 건드리지 않는다.
+    """
+
+    __slots__ = ("x", "y", "premultiplied", "inverse_alpha")
+
+    def __init__(self, color: np.ndarray, alpha: np.ndarray):
+        points = cv2.findNonZero(alpha)
+        if points is None:
+            self.x = self.y = 0
+            self.premultiplied = None
+            self.inverse_alpha = None
+            return
+        x, y, w, h = cv2.boundingRect(points)
+        a = alpha[y:y + h, x:x + w].astype(np.uint16)[:, :, None]
+        self.x, self.y = x, y
+        self.premultiplied = color[y:y + h, x:x + w].astype(np.uint16) * a
+        self.inverse_alpha = 255 - a
+
+    def blend(self, image: np.ndarray) -> None:
+        if self.premultiplied is None:
+            return
+        h, w = self.inverse_alpha.shape[:2]
+        roi = image[self.y:self.y + h, self.x:self.x + w]
+        roi[:] = ((roi * self.inverse_alpha + self.premultiplied) // 255).astype(np.uint8)
+
+
+# 레이어 = (상태 키, 그리기 함수) - 상태 키가 같으면 캐시된 마스크를 그대로 씀
+DrawFunction = Callable[[np.ndarray, np.ndarray, int, int], None]
+Layer = Tuple[Hashable, DrawFunction]
+
+
+def _draw_text(color: np.ndarray, alpha: np.ndarray, text: str, origin: Tuple[int, int],
+               scale: float, rgb: Tuple[int, int, int] = (255, 255, 255)) -> None:
+    """검은 테두리 글자 (배경과 상관없이 읽히도록)"""
+    thickness = max(int(round(scale * 2)), 1)
+    for canvas, value in ((color, (0, 0, 0)), (alpha, 255)):
+        cv2.putText(canvas, text, origin, OVERLAY_FONT, scale, value, thickness + 2, cv2.LINE_AA)
+    cv2.putText(color, text, origin, OVERLAY_FONT, scale, rgb, thickness, cv2.LINE_AA)
+
+
+def _font_scale(width: int) -> float:
+    return max(width / 1280.0, 0.3)
+
+
+class OverlayRenderer:
+    """
+    오버레이 레이어를 상태 키별로 한 번만 알파 마스크로 렌더링해 두고 프레임에 합성
+
+    - 조준선처럼 변하지 않는 레이어는 해상도별로 한 번만 그린다.
+    - 시각은 초가 바뀔 때, 거리/레이저 조준점은 값이 바뀔 때만 다시 그린다.
+    서비스(초음파 센서, 서보)는 update_overlay()로 값만 넘기고, 그리기는 프레임 경로에서 한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Hashable, LayerMask]" = OrderedDict()
+        self.distance_cm: Optional[float] = None
+        self.distance_at = 0.0
+        self.laser_angles: Optional[Tuple[int, int]] = None
+        self.laser_on = False
+        self.composed_frames = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def update(self, distance_cm: Optional[float] = None, laser_angles: Optional[Tuple[int, int]] = None,
+               laser_on: Optional[bool] = None) -> None:
+        """표시할 값 갱신 (어느 스레드에서든 호출 가능)"""
+        with self._lock:
+            if distance_cm is not None:
+                self.distance_cm = distance_cm
+                self.distance_at = time.monotonic()
+            if laser_angles is not None:
+                self.laser_angles = (int(laser_angles[0]), int(laser_angles[1]))
+            if laser_on is not None:
+                self.laser_on = laser_on
+
+    # --------------------------------------------------------
+    def _layers(self, wall_time: float) -> List[Layer]:
+        layers: List[Layer] = []
+        if OVERLAY_RETICLE:
+            layers.append((("reticle",), self._draw_reticle))
+        second = int(wall_time)
+        layers.append((("timestamp", second), lambda c, a, w, h: self._draw_timestamp(c, a, w, h, second)))
+        with self._lock:
+            distance = self.distance_cm
+            fresh = time.monotonic() - self.distance_at <= DISTANCE_STALE_SECONDS
+            laser = self.laser_angles
+            laser_on = self.laser_on
+        if distance is not None and fresh:
+            shown = round(distance)
+            layers.append((("distance", shown), lambda c, a, w, h: self._draw_distance(c, a, w, h, shown)))
+        if laser is not None:
+            layers.append((("laser", laser, laser_on),
+                           lambda c, a, w, h: self._draw_laser(c, a, w, h, laser, laser_on)))
+        return layers
+
+    def _mask(self, key: Hashable, width: int, height: int, draw: DrawFunction) -> LayerMask:
+        cache_key = (width, height) + key
+        with self._lock:
+            mask = self._cache.get(cache_key)
+            if mask is not None:
+                self._cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                return mask
+        color = np.zeros((height, width, 3), np.uint8)
+        alpha = np.zeros((height, width), np.uint8)
+        draw(color, alpha, width, height)
+        mask = LayerMask(color, alpha)
+        with self._lock:
+            self.cache_misses += 1
+            self._cache[cache_key] = mask
+            while len(self._cache) > OVERLAY_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return mask
+
+    def apply(self, bgr: np.ndarray, wall_time: float) -> np.ndarray:
+        """오버레이를 합성한 새 이미지 반환 (원본 픽셀은 그대로 - 오버레이 없는 종류가 공유)"""
+        started = time.monotonic()
+        height, width = bgr.shape[:2]
+        image = bgr.copy()
+        for key, draw in self._layers(wall_time):
+            self._mask(key, width, height, draw).blend(image)
+        self.composed_frames += 1
+        latency_stats.record("overlay", time.monotonic() - started)
+        return image
+
+    # --------------------------------------------------------
+    @staticmethod
+    def _draw_reticle(color: np.ndarray, alpha: np.ndarray, width: int, height: int) -> None:
+        cx, cy = width // 2, height // 2
+        size = max(width // 40, 4)
+        for canvas, value in ((color, (255, 255, 255)), (alpha, 160)):
+            cv2.line(canvas, (cx - size, cy), (cx + size, cy), value, 1, cv2.LINE_AA)
+            cv2.line(canvas, (cx, cy - size), (cx, cy + size), value, 1, cv2.LINE_AA)
+
+    @staticmethod
+    def _draw_timestamp(color: np.ndarray, alpha: np.ndarray, width: int, height: int, second: int) -> None:
+        text = datetime.fromtimestamp(second).strftime(OVERLAY_TIMESTAMP_FORMAT)
+        scale = _font_scale(width)
+        margin = max(width // 64, 4)
+        _draw_text(color, alpha, text, (margin, height - margin), scale)
+
+    @staticmethod
+    def _draw_distance(color: np.ndarray, alpha: np.ndarray, width: int, height: int, distance: int) -> None:
+        text = f"{distance} cm"
+        scale = _font_scale(width)
+        margin = max(width // 64, 4)
+        (text_width, text_height), _ = cv2.getTextSize(text, OVERLAY_FONT, scale, max(int(round(scale * 2)), 1))
+        _draw_text(color, alpha, text, (width - text_width - margin, text_height + margin), scale, (0, 255, 255))
+
+    @staticmethod
+    def _draw_laser(color: np.ndarray, alpha: np.ndarray, width: int, height: int,
+                    angles: Tuple[int, int], laser_on: bool) -> None:
+        x = _angle_to_position(angles[0], LASER_X_ANGLE_RANGE, width)
+        y = _angle_to_position(angles[1], LASER_Y_ANGLE_RANGE, height)
+        radius = max(width // 40, 4)
+        # 레이저가 켜져 있으면 빨간 채운 원, 꺼져 있으면 조준 위치만 테두리로
+        thickness = -1 if laser_on else max(width // 320, 1)
+        rgb = (0, 0, 255) if laser_on else (0, 200, 255)
+        cv2.circle(alpha, (x, y), radius, 255 if laser_on else 200, thickness, cv2.LINE_AA)
+        cv2.circle(color, (x, y), radius, rgb, thickness, cv2.LINE_AA)
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return {
+                "composed_frames": self.composed_frames,
+                "cache_entries": len(self._cache),
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "distance_cm": self.distance_cm,
+                "laser_angles": self.laser_angles,
+                "laser_on": self.laser_on,
+            }
+
+
+def _angle_to_position(angle: int, angle_range: Tuple[int, int], size: int) -> int:
+    low, high = angle_range
+    ratio = (angle - low) / float(high - low) if high != low else 0.5
+    return int(min(max(ratio, 0.0), 1.0) * (size - 1))
+
+
+# 전역 인스턴스
+overlay_renderer = OverlayRenderer()
+
+
+def update_overlay(**values) -> None:
+    """서비스용 훅 - 오버레이 갱신 실패가 하드웨어 제어에 영향을 주지 않도록 예외를 삼킴"""
+    try:
+        overlay_renderer.update(**values)
+    except Exception as e:
+        logger.warning(f"⚠️ 오버레이 값 갱신 실패: {e}")
+
+
+# 하드웨어 서비스(레이저/서보/초음파)는 이 모듈을 import하지 않고 이벤트로 값을 보냄
+hardware_events.register(hardware_events.OVERLAY_UPDATE, update_overlay)
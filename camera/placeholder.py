@@ -0,0 +1,31 @@
+# camera/placeholder.py - 카메라를 쓸 수 없을 때 시청자에게 보내는 안내 프레임
+import cv2
+import logging
+import numpy as np
+from functools import lru_cache
+from typing import Optional
+
+from camera.jpeg_encoder import jpeg_encoder
+
+logger = logging.getLogger(__name__)
+
+# 상태별 안내 문구 (cv2.putText는 한글을 그리지 못하므로 영문)
+PLACEHOLDER_MESSAGES = {
+    "opening": "CAMERA STARTING...",
+    "stalled": "CAMERA NOT RESPONDING",
+    "reconnecting": "CAMERA UNAVAILABLE - RECONNECTING",
+}
+PLACEHOLDER_QUALITY = 70
+
+
+@lru_cache(maxsize=16)
+def placeholder_jpeg(width: int, height: int, state: str) -> Optional[bytes]:
+    """상태 안내 JPEG (해상도/상태별로 한 번만 만들어 캐시)"""
+    image = np.full((height, width, 3), 40, np.uint8)
+    message = PLACEHOLDER_MESSAGES.get(state, "CAMERA UNAVAILABLE")
+    scale = max(width / 640.0, 0.3)
+    thickness = max(int(round(2 * scale)), 1)
+    (text_width, text_height), _ = cv2.getTextSize(message, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+    origin = ((width - text_width) // 2, (height + text_height) // 2)
+    cv2.putText(image, message, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 255), thickness)
+    return jpeg_encoder.encode(image, PLACEHOLDER_QUALITY)
@@ -0,0 +1,237 @@
+# camera/segment_recorder.py - 시간 단위로 나눠 저장하는 연속 녹화
+import os
+import glob
+import time
+import queue
+import threading
+import logging
+from datetime import datetime
+from typing import Optional
+
+from camera.capture_engine import capture_engine
+from camera.frame import Frame
+from camera.mjpeg_file import MjpegFileWriter
+from utils import hardware_events
+
+logger = logging.getLogger(__name__)
+
+# 녹화 설정
+RECORD_DIR = "recordings"
+# 세그먼트 하나의 길이 (초) - 세그먼트마다 .mjpeg + .json 인덱스 한 쌍
+SEGMENT_SECONDS = 60
+# 저장 프레임레이트 (캡처는 30fps 그대로, 녹화만 솎아냄)
+RECORD_FPS = 10
+# 작성 스레드 대기열 크기 (프레임 수) - 가득 차면 캡처를 막지 않고 프레임을 버림
+RECORD_QUEUE_FRAMES = 30
+# 보존 정책 - 둘 중 하나라도 넘으면 가장 오래된 세그먼트부터 삭제
+RETENTION_MAX_BYTES = 2 * 1024 * 1024 * 1024
+RETENTION_MAX_AGE_HOURS = 72
+
+
+class SegmentRecorder:
+    """
+    공유 캡처 파이프라인의 프레임을 세그먼트 파일로 연속 녹화
+
+    캡처 스레드는 frame sink로 프레임을 대기열에 넣기만 하고, 디스크 쓰기는 전용 작성
+    스레드가 한다. SD 카드가 느려 대기열이 가득 차면 캡처를 막는 대신 프레임을 버린다.
+    세그먼트를 닫을 때마다 용량/기간 보존 정책을 적용한다.
+    """
+
+    def __init__(self, record_dir: str = RECORD_DIR, segment_seconds: float = SEGMENT_SECONDS,
+                 fps: float = RECORD_FPS):
+        self.record_dir = record_dir
+        self.segment_seconds = segment_seconds
+        self.fps = fps
+        self._queue: "queue.Queue[Optional[Frame]]" = queue.Queue(maxsize=RECORD_QUEUE_FRAMES)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._recording = False
+        self._last_offered_at = 0.0
+        self.label: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.current_segment: Optional[str] = None
+        self.recorded_frames = 0
+        self.dropped_frames = 0
+        self.segments_written = 0
+        self.segments_deleted = 0
+        self.bytes_written = 0
+
+    @property
+    def is_recording(self) -> bool:
+        return self._recording
+
+    def start(self, label: str = "manual") -> bool:
+        """녹화 시작 (블로킹 없음) - 이미 녹화 중이면 False"""
+        with self._lock:
+            if self._recording:
+                return False
+            if self._thread is not None and self._thread.is_alive():
+                # 직전 녹화의 작성 스레드가 아직 대기열을 비우는 중
+                logger.warning("⚠️ 이전 녹화 정리 중 - 녹화 시작 건너뜀")
+                return False
+            # 비정상 종료된 이전 녹화가 남긴 프레임은 버림
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self.label = label
+            self.started_at = time.time()
+            self._last_offered_at = 0.0
+            self._recording = True
+            self._thread = threading.Thread(target=self._writer, args=(label,), daemon=True)
+            self._thread.start()
+        capture_engine.acquire()
+        capture_engine.add_frame_sink(self._offer)
+        logger.info(f"⏺ 녹화 시작: {label} ({self.fps:g}fps, {self.segment_seconds:g}초 단위)")
+        return True
+
+    def stop(self) -> None:
+        """녹화 중지 (블로킹 없음) - 작성 스레드는 대기열을 비운 뒤 세그먼트를 닫고 종료"""
+        with self._lock:
+            if not self._recording:
+                return
+            self._recording = False
+        capture_engine.remove_frame_sink(self._offer)
+        capture_engine.release()
+        while True:
+            try:
+                self._queue.put_nowait(None)
+                break
+            except queue.Full:
+                # 종료 신호를 넣을 자리를 만들기 위해 가장 오래된 프레임 하나 버림
+                try:
+                    self._queue.get_nowait()
+                    self.dropped_frames += 1
+                except queue.Empty:
+                    pass
+        logger.info(f"⏹ 녹화 중지 요청: {self.label}")
+
+    def _offer(self, frame: Frame) -> None:
+        """캡처 스레드에서 호출 - 녹화 fps로 솎아서 대기열에 넣고, 가득 차면 버림"""
+        if not self._recording:
+            return
+        if frame.captured_at - self._last_offered_at < 1.0 / self.fps * 0.9:
+            return
+        self._last_offered_at = frame.captured_at
+        try:
+            self._queue.put_nowait(frame)
+        except queue.Full:
+            self.dropped_frames += 1
+
+    # --------------------------------------------------------
+    def _writer(self, label: str) -> None:
+        logger.info("⏺ 녹화 작성 스레드 시작")
+        session_dir = os.path.join(self.record_dir, label)
+        writer: Optional[MjpegFileWriter] = None
+        segment_started = 0.0
+        try:
+            while True:
+                frame = self._queue.get()
+                if frame is None:
+                    break
+                # 패스스루면 카메라 원본 그대로, 아니면 여기(캡처 스레드 밖)서 한 번 인코딩
+                jpeg = frame.get_jpeg()
+                if jpeg is None:
+                    continue
+                if writer is not None and frame.captured_at - segment_started >= self.segment_seconds:
+                    self._close_segment(writer, label)
+                    writer = None
+                if writer is None:
+                    writer = self._open_segment(session_dir, frame)
+                    segment_started = frame.captured_at
+                writer.write(jpeg, frame.captured_wall, frame.seq)
+                self.recorded_frames += 1
+                self.bytes_written += len(jpeg)
+        except Exception as e:
+            logger.error(f"❌ 녹화 쓰기 실패: {e}")
+            with self._lock:
+                self._recording = False
+            capture_engine.remove_frame_sink(self._offer)
+            capture_engine.release()
+        finally:
+            if writer is not None:
+                self._close_segment(writer, label)
+            self.current_segment = None
+            logger.info("⏺ 녹화 작성 스레드 종료")
+
+    def _open_segment(self, session_dir: str, frame: Frame) -> MjpegFileWriter:
+        stamp = datetime.fromtimestamp(frame.captured_wall).strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(session_dir, f"{stamp}.mjpeg")
+        self.current_segment = path
+        return MjpegFileWriter(path)
+
+    def _close_segment(self, writer: MjpegFileWriter, label: str) -> None:
+        try:
+            index = writer.close(label=label, fps=self.fps)
+            self.segments_written += 1
+            logger.info(f"💾 녹화 세그먼트 저장: {writer.path} ({index['frame_count']}프레임)")
+        except Exception as e:
+            logger.error(f"❌ 녹화 세그먼트 닫기 실패 ({writer.path}): {e}")
+        self.apply_retention()
+
+    def apply_retention(self) -> int:
+        """용량/기간 보존 정책 적용 - 가장 오래된 세그먼트부터 삭제 (반환값: 삭제 수)"""
+        segments = []
+        for path in glob.glob(os.path.join(self.record_dir, "*", "*.mjpeg")):
+            if path == self.current_segment:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            segments.append((stat.st_mtime, stat.st_size, path))
+        segments.sort()
+
+        total = sum(size for _, size, _ in segments)
+        oldest_allowed = time.time() - RETENTION_MAX_AGE_HOURS * 3600
+        deleted = 0
+        for mtime, size, path in segments:
+            if total <= RETENTION_MAX_BYTES and mtime >= oldest_allowed:
+                break
+            for target in (path, os.path.splitext(path)[0] + ".json"):
+                try:
+                    os.remove(target)
+                except OSError:
+                    pass
+            total -= size
+            deleted += 1
+        if deleted:
+            self.segments_deleted += deleted
+            logger.info(f"🧹 보존 정책으로 녹화 세그먼트 {deleted}개 삭제")
+        return deleted
+
+    def get_status(self) -> dict:
+        return {
+            "recording": self._recording,
+            "label": self.label,
+            "started_at": self.started_at,
+            "current_segment": self.current_segment,
+            "queued": self._queue.qsize(),
+            "recorded_frames": self.recorded_frames,
+            "dropped_frames": self.dropped_frames,
+            "segments_written": self.segments_written,
+            "segments_deleted": self.segments_deleted,
+            "bytes_written": self.bytes_written,
+        }
+
+
+# 전역 인스턴스
+segment_recorder = SegmentRecorder()
+
+
+def start_recording(label: str) -> None:
+    """서비스용 훅 - 녹화 실패가 호출자(자동 놀이 등)에 영향을 주지 않도록 예외를 삼킴"""
+    try:
+        segment_recorder.start(label)
+    except Exception as e:
+        logger.warning(f"⚠️ 녹화 시작 실패 ({label}): {e}")
+
+
+def stop_recording() -> None:
+    try:
+        segment_recorder.stop()
+    except Exception as e:
+        logger.warning(f"⚠️ 녹화 중지 실패: {e}")
+
+
+# 자동 놀이 서비스는 이 모듈을 import하지 않고 이벤트로 녹화를 시작/중지함
+hardware_events.register(hardware_events.RECORDING_START, start_recording)
+hardware_events.register(hardware_events.RECORDING_STOP, stop_recording)
@@ -0,0 +1,101 @@
+# camera/snapshot.py - 라이브 프레임 캐시에서 바로 꺼내는 스냅샷
+import time
+import threading
+import logging
+from typing import Optional, Tuple
+
+from camera.capture_engine import capture_engine
+from camera.frame import Frame, StreamVariant
+from camera.motion_gate import motion_gate
+
+logger = logging.getLogger(__name__)
+
+# 프로세스마다 다른 ETag가 나오도록 하는 값 (재시작 후 seq가 겹쳐도 304가 잘못 나가지 않음)
+_ETAG_EPOCH = format(int(time.time()), "x")
+
+# 스트림이 없을 때 단발 캡처에서 첫 프레임을 기다리는 최대 시간
+ONE_SHOT_TIMEOUT = 5.0
+
+
+# 장면이 마지막으로 바뀐 프레임과 그 저해상도 그레이 (스냅샷 ETag 기준)
+_scene_lock = threading.Lock()
+_scene_frame: Optional[Frame] = None
+_scene_gray = None
+
+
+def make_etag(frame: Frame, variant: StreamVariant) -> str:
+    """
+    프레임/종류별 ETag (큰따옴표 포함)
+
+    latest_snapshot()이 장면이 바뀐 프레임만 넘기므로 seq는 내용이 바뀔 때만 달라진다.
+    """
+    return f'"{_ETAG_EPOCH}-{frame.seq}-{variant.scale}{"o" if variant.overlay else ""}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 etag와 일치하는지 (목록, 약한 비교, * 지원)"""
+    if not if_none_match:
+        return False
+    for token in if_none_match.split(","):
+        token = token.strip()
+        if token == "*" or token.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def latest_snapshot(scale: int = 1, overlay: bool = False) -> Optional[Tuple[Frame, StreamVariant]]:
+    """
+    스트리밍 중이면 장면이 마지막으로 바뀐 프레임과 스트림 종류 반환 (캡처/인코딩 없음)
+
+    비교용 1/8 그레이 축소 디코딩이 있을 수 있으므로 이벤트 루프 밖에서 호출한다.
+    원본 배율은 패스스루 JPEG을, 축소 배율은 시청자용으로 이미 인코딩된 결과를 우선 쓴다.
+    """
+    if not capture_engine.is_streaming:
+        return None
+    frame = capture_engine.get_latest()
+    if frame is None:
+        return None
+    if not overlay:
+        frame = scene_frame(frame)
+    return frame, frame.find_encoded(scale, overlay)
+
+
+def scene_frame(frame: Frame) -> Frame:
+    """
+    장면이 마지막으로 바뀐 프레임 반환 (움직임 게이트와 같은 기준으로 비교)
+
+    매 프레임 센서 노이즈로 JPEG 바이트가 달라지므로 seq나 바이트 해시로는 ETag가 매번 바뀐다.
+    바뀌지 않은 장면이면 이전 프레임을 그대로 돌려주어 ETag와 내용이 함께 유지되고
+    폴링 클라이언트는 304를 받는다. 오버레이(시각 포함)는 매초 바뀌므로 쓰지 않는다.
+    """
+    global _scene_frame, _scene_gray
+    gray = frame.get_gray_small()
+    if gray is None:
+        return frame
+    with _scene_lock:
+        if _scene_frame is None or frame.seq < _scene_frame.seq or motion_gate.is_changed(gray, _scene_gray):
+            _scene_frame, _scene_gray = frame, gray
+        return _scene_frame
+
+
+def one_shot_snapshot(scale: int = 1, timeout: float = ONE_SHOT_TIMEOUT,
+                      overlay: bool = False) -> Optional[Tuple[Frame, StreamVariant, bytes]]:
+    """
+    스트림이 없을 때만 쓰는 단발 캡처 (블로킹 - 이벤트 루프 밖에서 호출)
+
+    캡처 엔진에 잠시 소비자로 붙었다가 첫 프레임을 받으면 바로 해제하므로
+    장치를 따로 열지 않고, 그 사이 시청자가 오면 그대로 공유된다.
+    """
+    capture_engine.acquire()
+    try:
+        frame = capture_engine.wait_for_frame_sync(0, timeout)
+        if frame is None:
+            logger.warning("⚠️ 단발 캡처 시간 초과")
+            return None
+        variant = frame.find_encoded(scale, overlay)
+        jpeg = frame.render(variant)
+        if jpeg is None:
+            return None
+        return frame, variant, jpeg
+    finally:
+        capture_engine.release()
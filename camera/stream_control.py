@@ -0,0 +1,207 @@
+# camera/stream_control.py - 시청자별 백프레셔 및 적응형 화질/프레임레이트
+import time
+import logging
+import itertools
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 적응 단계 설정
+# max_quality=None(원본 화질) 단계 다음부터 내려가기 시작하는 기준 화질
+# (jpeg_encoder.DEFAULT_JPEG_QUALITY와 같은 값 - 인코더/OpenCV를 import하지 않도록 따로 둠)
+LADDER_TOP_QUALITY = 95
+MIN_JPEG_QUALITY = 30
+QUALITY_STEP = 15
+MIN_STREAM_FPS = 3
+
+# 전송 시간이 프레임 예산의 이 비율을 넘으면 느린 것으로 판단
+SLOW_SEND_RATIO = 0.8
+# 전송 시간이 프레임 예산의 이 비율보다 작으면 여유 있는 것으로 판단
+FAST_SEND_RATIO = 0.3
+# 단계를 내리기/올리기 전에 연속으로 관측해야 하는 프레임 수
+STEP_DOWN_AFTER = 3
+STEP_UP_AFTER = 45
+# EWMA 평활 계수
+EWMA_ALPHA = 0.2
+
+
+def build_ladder(max_quality: Optional[int], max_fps: float,
+                 min_quality: int = MIN_JPEG_QUALITY,
+                 min_fps: float = MIN_STREAM_FPS) -> List[Tuple[Optional[int], float]]:
+    """
+    (quality, fps) 단계 목록 생성 - 0번이 가장 좋은 단계
+
+    먼저 화질을 QUALITY_STEP씩 내리고, 최저 화질에 도달하면 fps를 절반씩 내린다.
+    max_quality=None은 원본(패스스루 또는 인코더 기본값) 화질을 뜻한다.
+    """
+    ladder: List[Tuple[Optional[int], float]] = [(max_quality, max_fps)]
+    quality = max_quality if max_quality is not None else LADDER_TOP_QUALITY
+    while quality - QUALITY_STEP >= min_quality:
+        quality -= QUALITY_STEP
+        ladder.append((quality, max_fps))
+    fps = max_fps
+    while fps / 2 >= min_fps:
+        fps /= 2
+        ladder.append((ladder[-1][0], fps))
+    return ladder
+
+
+class AdaptiveStreamController:
+    """
+    시청자 한 명의 전송 처리량을 측정해 화질/fps 단계를 조절
+
+    record_send()에 각 청크의 전송 시간을 넘기면 프레임 예산(1/fps) 대비
+    느린 전송이 이어질 때 한 단계 내리고, 충분히 여유가 있을 때 한 단계 올린다.
+    """
+
+    def __init__(self, max_quality: Optional[int] = None, max_fps: float = 30,
+                 min_quality: int = MIN_JPEG_QUALITY, min_fps: float = MIN_STREAM_FPS):
+        self.ladder = build_ladder(max_quality, max_fps, min_quality, min_fps)
+        self.level = 0
+        self.throughput = 0.0  # bytes/sec (EWMA)
+        self.send_time = 0.0   # sec (EWMA)
+        self._slow_count = 0
+        self._fast_count = 0
+        self.step_downs = 0
+        self.step_ups = 0
+
+    @property
+    def quality(self) -> Optional[int]:
+        return self.ladder[self.level][0]
+
+    @property
+    def fps(self) -> float:
+        return self.ladder[self.level][1]
+
+    @property
+    def frame_interval(self) -> float:
+        return 1.0 / self.fps
+
+    def record_send(self, nbytes: int, seconds: float) -> bool:
+        """
+        청크 하나의 전송 결과 기록
+
+        Returns:
+            단계가 바뀌었으면 True (호출자가 구독 화질을 바꿔야 함)
+        """
+        seconds = max(seconds, 1e-6)
+        self.send_time += EWMA_ALPHA * (seconds - self.send_time)
+        self.throughput += EWMA_ALPHA * (nbytes / seconds - self.throughput)
+
+        budget = self.frame_interval
+        if seconds > budget * SLOW_SEND_RATIO:
+            self._slow_count += 1
+            self._fast_count = 0
+        elif self.send_time < budget * FAST_SEND_RATIO:
+            self._fast_count += 1
+            self._slow_count = 0
+        else:
+            self._slow_count = 0
+            self._fast_count = 0
+
+        if self._slow_count >= STEP_DOWN_AFTER and self.level < len(self.ladder) - 1:
+            self.level += 1
+            self.step_downs += 1
+            self._slow_count = 0
+            logger.info(f"📉 스트림 단계 하향: quality={self.quality}, fps={self.fps:g}")
+            return True
+        if self._fast_count >= STEP_UP_AFTER and self.level > 0:
+            self.level -= 1
+            self.step_ups += 1
+            self._fast_count = 0
+            logger.info(f"📈 스트림 단계 상향: quality={self.quality}, fps={self.fps:g}")
+            return True
+        return False
+
+    def get_status(self) -> dict:
+        return {
+            "level": self.level,
+            "levels": len(self.ladder),
+            "quality": self.quality,
+            "fps": self.fps,
+            "throughput_bps": round(self.throughput),
+            "send_time_ms": round(self.send_time * 1000, 2),
+            "step_downs": self.step_downs,
+            "step_ups": self.step_ups,
+        }
+
+
+class ViewerSession:
+    """
+    시청자 한 명의 "최신 프레임 한 장" 슬롯
+
+    대기열 없이 마지막으로 보낸 seq만 기억하므로, 느린 시청자는 밀린 프레임을
+    쌓지 않고 가장 최신 프레임으로 건너뛴다. 건너뛴 수는 frames_skipped에 집계된다.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, route: str, controller: AdaptiveStreamController, scale: int = 1):
+        self.id = next(self._ids)
+        self.route = route
+        self.scale = scale
+        self.controller = controller
+        self.last_seq = 0
+        self.last_sent_at = 0.0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.bytes_sent = 0
+        self.started_at = time.monotonic()
+
+    def accept(self, seq: int, now: float) -> bool:
+        """새 seq를 보낼지 결정 (fps 단계 제한 및 건너뛴 프레임 집계)"""
+        if self.last_seq and seq > self.last_seq + 1:
+            self.frames_skipped += seq - self.last_seq - 1
+        self.last_seq = seq
+        # 카메라 프레임 간격의 지터를 감안해 약간의 여유를 둠
+        if now - self.last_sent_at < self.controller.frame_interval * 0.9:
+            self.frames_skipped += 1
+            return False
+        return True
+
+    def sent(self, nbytes: int, now: float, seconds: float) -> bool:
+        """전송 완료 기록 - 화질 단계가 바뀌면 True"""
+        self.last_sent_at = now
+        self.frames_sent += 1
+        self.bytes_sent += nbytes
+        return self.controller.record_send(nbytes, seconds)
+
+    def get_status(self) -> dict:
+        return {
+            "id": self.id,
+            "route": self.route,
+            "scale": self.scale,
+            "frames_sent": self.frames_sent,
+            "frames_skipped": self.frames_skipped,
+            "bytes_sent": self.bytes_sent,
+            "uptime": round(time.monotonic() - self.started_at, 1),
+            **self.controller.get_status(),
+        }
+
+
+class ViewerRegistry:
+    """활성 시청자 세션 목록 (통계 조회용)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[int, ViewerSession] = {}
+
+    def add(self, session: ViewerSession) -> None:
+        with self._lock:
+            self._sessions[session.id] = session
+
+    def remove(self, session: ViewerSession) -> None:
+        with self._lock:
+            self._sessions.pop(session.id, None)
+
+    def sessions(self) -> List[ViewerSession]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def get_status(self) -> List[dict]:
+        return [session.get_status() for session in self.sessions()]
+
+
+# 전역 인스턴스
+viewer_registry = ViewerRegistry()
@@ -0,0 +1,160 @@
+# camera/synthetic_source.py - 카메라 없이 쓰는 결정적 합성 영상 소스 (벤치마크/개발용)
+import cv2
+import time
+import logging
+import numpy as np
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 캡처 엔진의 장치 이름이 이 접두사로 시작하면 /dev/video* 대신 합성 소스를 연다
+# 예: "synthetic", "synthetic:static"
+SYNTHETIC_DEVICE_PREFIX = "synthetic"
+# 미리 만들어 두고 반복 재생할 프레임 수 (소스 자체의 인코딩 비용이 측정에 섞이지 않도록)
+SYNTHETIC_CYCLE_FRAMES = 60
+SYNTHETIC_JPEG_QUALITY = 85
+SYNTHETIC_PATTERNS = ("moving", "static")
+
+
+def is_synthetic_device(device) -> bool:
+    return isinstance(device, str) and device.startswith(SYNTHETIC_DEVICE_PREFIX)
+
+
+class SyntheticCapture:
+    """
+    cv2.VideoCapture와 같은 인터페이스(read/grab/retrieve/set/get/isOpened/release)를 가진 합성 소스
+
+    그라디언트 배경 위로 사각형이 움직이고 프레임 번호가 찍힌 영상을 만든다.
+    프레임 내용은 프레임 번호로만 정해지므로 실행할 때마다 같다.
+    read()/grab()은 실제 카메라처럼 다음 프레임 시각까지 블로킹하며,
+    CAP_PROP_POS_MSEC는 V4L2처럼 그 프레임의 예정 시각(모노토닉, ms)을 돌려준다.
+    CAP_PROP_CONVERT_RGB=0이면 MJPG 카메라처럼 1차원 JPEG 버퍼를 돌려준다.
+    pattern="static"은 움직임 없는 장면 (움직임 게이트 측정용).
+    """
+
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 30,
+                 pattern: str = "moving"):
+        if pattern not in SYNTHETIC_PATTERNS:
+            raise ValueError(f"알 수 없는 합성 패턴: {pattern}")
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.pattern = pattern
+        self.convert_rgb = True
+        self._opened = True
+        self._bgr_frames: List[np.ndarray] = []
+        self._jpeg_frames: List[np.ndarray] = []
+        self._index = 0
+        self._next_at: Optional[float] = None
+        self._grabbed: Optional[int] = None
+        self._grabbed_at = 0.0
+
+    @classmethod
+    def from_device(cls, device: str) -> "SyntheticCapture":
+        """"synthetic[:pattern]" 형식의 장치 이름으로 생성 (해상도/fps는 set()으로 설정)"""
+        _, _, pattern = device.partition(":")
+        return cls(pattern=pattern or "moving")
+
+    # --------------------------------------------------------
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def set(self, prop: int, value) -> bool:
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = int(value)
+        elif prop == cv2.CAP_PROP_FPS:
+            self.fps = float(value)
+        elif prop == cv2.CAP_PROP_CONVERT_RGB:
+            self.convert_rgb = bool(value)
+        elif prop != cv2.CAP_PROP_FOURCC:
+            return False
+        # 설정이 바뀌면 다음 read()에서 프레임을 다시 만든다
+        self._bgr_frames = []
+        self._jpeg_frames = []
+        self._grabbed = None
+        return True
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop == cv2.CAP_PROP_CONVERT_RGB:
+            return float(self.convert_rgb)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self._grabbed_at * 1000
+        return 0.0
+
+    def grab(self) -> bool:
+        """다음 프레임 시각까지 대기 후 프레임 번호만 확정 (픽셀 복사 없음)"""
+        if not self._opened:
+            return False
+        if not self._bgr_frames:
+            self._render_cycle()
+
+        now = time.monotonic()
+        if self._next_at is None:
+            self._next_at = now
+        elif self._next_at > now:
+            time.sleep(self._next_at - now)
+        self._grabbed_at = self._next_at
+        # 소비가 늦어져도 밀린 프레임을 몰아서 내지 않음 (카메라와 동일)
+        self._next_at = max(self._next_at + 1.0 / self.fps, time.monotonic())
+
+        self._grabbed = self._index % len(self._bgr_frames)
+        self._index += 1
+        return True
+
+    def retrieve(self):
+        """마지막 grab()의 프레임 반환"""
+        if not self._opened or self._grabbed is None:
+            return False, None
+        if self.convert_rgb:
+            return True, self._bgr_frames[self._grabbed].copy()
+        return True, self._jpeg_frames[self._grabbed]
+
+    def read(self):
+        """다음 프레임 시각까지 대기 후 (True, 프레임) 반환"""
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def release(self) -> None:
+        self._opened = False
+        self._bgr_frames = []
+        self._jpeg_frames = []
+        self._grabbed = None
+
+    # --------------------------------------------------------
+    def _render_cycle(self) -> None:
+        """한 주기 분량의 프레임을 미리 렌더링/인코딩"""
+        started = time.perf_counter()
+        xs = np.linspace(0, 255, self.width, dtype=np.uint8)
+        ys = np.linspace(0, 255, self.height, dtype=np.uint8)
+        background = np.empty((self.height, self.width, 3), np.uint8)
+        background[:, :, 0] = xs[np.newaxis, :]
+        background[:, :, 1] = ys[:, np.newaxis]
+        background[:, :, 2] = 128
+
+        count = 1 if self.pattern == "static" else SYNTHETIC_CYCLE_FRAMES
+        box = max(self.height // 6, 8)
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), SYNTHETIC_JPEG_QUALITY]
+        for index in range(count):
+            image = background.copy()
+            x = (index * (self.width - box)) // max(count - 1, 1)
+            y = (self.height - box) // 2
+            cv2.rectangle(image, (x, y), (x + box, y + box), (255, 255, 255), -1)
+            cv2.putText(image, f"#{index:03d}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+            ok, jpeg = cv2.imencode('.jpg', image, params)
+            if not ok:
+                raise RuntimeError("합성 프레임 인코딩 실패")
+            self._bgr_frames.append(image)
+            self._jpeg_frames.append(jpeg.reshape(-1))
+        logger.info(
+            f"🧪 합성 영상 준비 ({self.width}x{self.height}@{self.fps:g}, {self.pattern}, "
+            f"{count}프레임, {(time.perf_counter() - started) * 1000:.0f}ms)"
+        )
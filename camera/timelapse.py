@@ -0,0 +1,219 @@
+# camera/timelapse.py - 저전력 타임랩스 (몇 초에 한 장) + 일 단위 압축 저장
+import os
+import bisect
+import struct
+import asyncio
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional
+
+from camera.capture_engine import capture_engine
+from camera.frame_broadcaster import build_mjpeg_chunk
+
+logger = logging.getLogger(__name__)
+
+# 타임랩스 설정
+TIMELAPSE_DIR = "timelapse"
+TIMELAPSE_INTERVAL = 5.0
+# 서버 시작 시 자동으로 타임랩스 시작 (야간 모니터링용)
+TIMELAPSE_AUTOSTART = False
+# 카메라를 새로 열었을 때 노출/화이트밸런스가 안정될 때까지 버리는 프레임 수
+TIMELAPSE_SETTLE_FRAMES = 5
+TIMELAPSE_FRAME_TIMEOUT = 5.0
+# 저장 해상도/화질 (640x480 → 320x240, 약 10KB/장)
+TIMELAPSE_SCALE = 2
+TIMELAPSE_QUALITY = 60
+# 재생 기본 fps (5초 간격이면 10fps 재생 = 50배속)
+TIMELAPSE_PLAYBACK_FPS = 10
+
+# 인덱스 레코드: 촬영 시각(epoch 초) float64, 파일 오프셋 uint64, 길이 uint32 (20바이트)
+INDEX_RECORD = struct.Struct("<dQI")
+
+
+class TimelapseEntry(NamedTuple):
+    wall_time: float
+    offset: int
+    length: int
+
+
+def day_paths(day: str, base_dir: str = TIMELAPSE_DIR):
+    """일 단위 파일 경로 (YYYYMMDD.mjpeg, YYYYMMDD.idx)"""
+    return os.path.join(base_dir, f"{day}.mjpeg"), os.path.join(base_dir, f"{day}.idx")
+
+
+def load_index(day: str, base_dir: str = TIMELAPSE_DIR) -> List[TimelapseEntry]:
+    """하루치 오프셋 인덱스 읽기 (없으면 빈 목록, 기록 중 잘린 마지막 레코드는 무시)"""
+    _, index_path = day_paths(day, base_dir)
+    try:
+        with open(index_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return []
+    usable = len(data) - len(data) % INDEX_RECORD.size
+    return [TimelapseEntry(*record) for record in INDEX_RECORD.iter_unpack(data[:usable])]
+
+
+class TimelapseCapture:
+    """
+    샘플링 시각에만 카메라를 깨워 한 장씩 일 단위 파일에 덧붙이는 타임랩스
+
+    시청자가 없으면 캡처 엔진에 잠깐 소비자로 붙어 노출이 안정된 프레임 한 장만 받고 바로
+    해제하므로, 그 사이에는 30fps 캡처 스레드가 돌지 않는다. 이미 스트리밍 중이면 최신 프레임을 쓴다.
+    JPEG은 .mjpeg 파일에 이어 붙이고, 고정 크기 레코드의 .idx 파일로 시간 → 오프셋을 찾는다.
+    """
+
+    def __init__(self, base_dir: str = TIMELAPSE_DIR, interval: float = TIMELAPSE_INTERVAL):
+        self.base_dir = base_dir
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.captured_frames = 0
+        self.failed_samples = 0
+        self.bytes_written = 0
+        self.last_capture: Optional[float] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None) -> bool:
+        with self._lock:
+            if self.is_running:
+                return False
+            if interval:
+                self.interval = interval
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop_event,), daemon=True)
+            self._thread.start()
+        logger.info(f"⏱ 타임랩스 시작 ({self.interval:g}초 간격)")
+        return True
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stop_event.set()
+        logger.info("⏱ 타임랩스 중지 요청")
+
+    def _run(self, stop_event: threading.Event) -> None:
+        next_at = time.monotonic()
+        while not stop_event.is_set():
+            try:
+                self.capture_once()
+            except Exception as e:
+                self.failed_samples += 1
+                logger.error(f"❌ 타임랩스 촬영 실패: {e}")
+            # 촬영에 걸린 시간과 무관하게 일정한 간격 유지 (밀리면 다음 시각으로 건너뜀)
+            next_at += self.interval
+            now = time.monotonic()
+            if next_at < now:
+                next_at = now + self.interval
+            stop_event.wait(next_at - now)
+        logger.info("⏱ 타임랩스 스레드 종료")
+
+    def capture_once(self) -> bool:
+        """지금 한 장 촬영해 일 단위 파일에 추가"""
+        frame = capture_engine.get_latest() if capture_engine.is_streaming else None
+        if frame is None:
+            frame = self._grab_settled()
+        if frame is None:
+            self.failed_samples += 1
+            logger.warning("⚠️ 타임랩스 프레임을 받지 못함")
+            return False
+        jpeg = frame.get_jpeg(TIMELAPSE_QUALITY, TIMELAPSE_SCALE)
+        if jpeg is None:
+            self.failed_samples += 1
+            return False
+        self._append(jpeg, frame.captured_wall)
+        return True
+
+    def _grab_settled(self):
+        """캡처 엔진에 잠깐 붙어 노출이 안정된 프레임 한 장을 받고 해제"""
+        capture_engine.acquire()
+        try:
+            # 재연결 중 남아 있던 이전 프레임이 아닌, 지금부터 들어오는 프레임만 사용
+            latest = capture_engine.get_latest()
+            seq = latest.seq if latest is not None else 0
+            frame = None
+            for _ in range(TIMELAPSE_SETTLE_FRAMES + 1):
+                frame = capture_engine.wait_for_frame_sync(seq, TIMELAPSE_FRAME_TIMEOUT)
+                if frame is None:
+                    return None
+                seq = frame.seq
+            return frame
+        finally:
+            capture_engine.release()
+
+    def _append(self, jpeg: bytes, wall_time: float) -> None:
+        day = datetime.fromtimestamp(wall_time).strftime("%Y%m%d")
+        data_path, index_path = day_paths(day, self.base_dir)
+        os.makedirs(self.base_dir, exist_ok=True)
+        with open(data_path, "ab") as data_file:
+            offset = data_file.tell()
+            data_file.write(jpeg)
+        # 인덱스는 데이터를 쓴 뒤에 추가 - 중간에 꺼져도 인덱스가 없는 데이터만 남음
+        with open(index_path, "ab") as index_file:
+            index_file.write(INDEX_RECORD.pack(wall_time, offset, len(jpeg)))
+        self.captured_frames += 1
+        self.bytes_written += len(jpeg)
+        self.last_capture = wall_time
+
+    def get_status(self) -> dict:
+        return {
+            "running": self.is_running,
+            "interval": self.interval,
+            "captured_frames": self.captured_frames,
+            "failed_samples": self.failed_samples,
+            "bytes_written": self.bytes_written,
+            "last_capture": self.last_capture,
+        }
+
+
+# 전역 인스턴스
+timelapse_capture = TimelapseCapture()
+
+
+def find_range(start: float, end: float, base_dir: str = TIMELAPSE_DIR):
+    """[start, end] 구간에 걸친 (일, 인덱스 항목 목록) 목록 - 인덱스만 읽고 영상은 읽지 않음"""
+    ranges = []
+    day = datetime.fromtimestamp(start).date()
+    last_day = datetime.fromtimestamp(end).date()
+    while day <= last_day:
+        name = day.strftime("%Y%m%d")
+        entries = load_index(name, base_dir)
+        times = [entry.wall_time for entry in entries]
+        selected = entries[bisect.bisect_left(times, start):bisect.bisect_right(times, end)]
+        if selected:
+            ranges.append((name, selected))
+        day += timedelta(days=1)
+    return ranges
+
+
+def _read_at(path: str, offset: int, length: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+async def stream_timelapse(start: float, end: float, fps: float = TIMELAPSE_PLAYBACK_FPS,
+                           base_dir: str = TIMELAPSE_DIR):
+    """
+    구간을 빨리 감은 MJPEG 청크로 전달하는 비동기 생성기
+
+    오프셋 인덱스로 필요한 JPEG만 잘라 읽으므로 디코딩/재인코딩이 없고,
+    파일 읽기는 이벤트 루프 밖에서 한다.
+    """
+    loop = asyncio.get_running_loop()
+    ranges = await loop.run_in_executor(None, find_range, start, end, base_dir)
+    interval = 1.0 / max(fps, 0.1)
+    next_at = loop.time()
+    for day, entries in ranges:
+        data_path, _ = day_paths(day, base_dir)
+        for entry in entries:
+            jpeg = await loop.run_in_executor(None, _read_at, data_path, entry.offset, entry.length)
+            yield build_mjpeg_chunk(jpeg, entry.wall_time)
+            next_at += interval
+            delay = next_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
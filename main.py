@@ -6,6 +6,9 @@ from routers.ws_audio_receive import router as audio_receive_router
 from routers.mjpeg_router import router as mjpeg_router  
 from routers.ws_audio_send import router as audio_send_router
 from routers.ws_settings_router import router as settings_router
+from routers.ws_video_router import router as video_router
+from routers.ws_webrtc_router import router as webrtc_router
+from routers.clip_router import router as clip_router
 from services.microphone_sender_instance import mic_streamer
 from services.mic_sender_instance import mic_sender
 from services.auto_play_service import auto_play_service
@@ -130,6 +133,15 @@ print("mjpeg_router 등록 완료")
 app.include_router(settings_router)
 print("settings_router 등록 완료")
 
+app.include_router(video_router)
+print("video_router 등록 완료")
+
+app.include_router(webrtc_router)
+print("webrtc_router 등록 완료")
+
+app.include_router(clip_router)
+print("clip_router 등록 완료")
+
 # FastAPI 앱 시작 시 모니터링 시작
 @app.on_event("startup")
 async def startup_event():
@@ -154,10 +166,52 @@ async def startup_event():
     print("   - /ws/audio_send (클라이언트→서버 음성)")
     print("   - /ws/settings (급식 설정)")
     print("   - /mjpeg (카메라)")
+    print("   - /ws/video (카메라, 바이너리 WebSocket)")
     print("   - /system/status (시스템 상태)")
     print("   - /system/commands (사용 가능한 명령)")
     print("   - /system/test/{command} (개별 명령 테스트)")
     
+    # 카메라 지원 모드 프로브 (장치별로 한 번만 - 이후에는 디스크 캐시의 검증된 모드 사용)
+    # 서버 시작을 기다리게 하지 않도록 백그라운드에서 실행하고, 그 사이 카메라를 쓰기 시작하면 중단
+    try:
+        from camera.capability_probe import camera_capabilities
+        from camera.capture_engine import capture_engine
+        if not capture_engine.is_running:
+            asyncio.get_event_loop().run_in_executor(
+                None, lambda: camera_capabilities.probe(
+                    capture_engine.device, *capture_engine.requested,
+                    busy=lambda: capture_engine.is_running
+                )
+            )
+            print(f"📷 카메라 모드 프로브 시작 (백그라운드, 캐시: {camera_capabilities.cache_path})")
+    except Exception as e:
+        print(f"⚠️ 카메라 모드 프로브 실패: {e}")
+    
+    # 야간 모니터링용 타임랩스 자동 시작 (설정 시)
+    try:
+        from camera.timelapse import timelapse_capture, TIMELAPSE_AUTOSTART
+        if TIMELAPSE_AUTOSTART:
+            timelapse_capture.start()
+            print(f"⏱ 타임랩스 시작 ({timelapse_capture.interval:g}초 간격)")
+    except Exception as e:
+        print(f"⚠️ 타임랩스 시작 실패: {e}")
+    
+    # JPEG 인코더 백엔드 선택 (사용 가능한 백엔드 마이크로 벤치마크)
+    try:
+        from camera.jpeg_encoder import jpeg_encoder
+        await asyncio.get_event_loop().run_in_executor(None, jpeg_encoder.select)
+        print(f"🖼️ JPEG 인코더 선택: {jpeg_encoder.backend}")
+    except Exception as e:
+        print(f"⚠️ JPEG 인코더 선택 실패: {e}")
+    
+    # YOLO 사람 감지기 (설정 시) - 서버 프로세스 안에서 프레임 버스로 카메라 공유
+    try:
+        from yolo.yolo import yolo_detector, YOLO_ENABLED
+        if YOLO_ENABLED and yolo_detector.start():
+            print("🧠 YOLO 감지기 시작")
+    except Exception as e:
+        print(f"⚠️ YOLO 감지기 시작 실패: {e}")
+    
     # 하드웨어 초기화
     try:
         from services.command_service import command_handler
@@ -213,6 +267,55 @@ async def shutdown_event():
     except Exception as e:
         print(f"⚠️ 오디오 재생 서비스 정리 실패: {e}")
     
+    # 이벤트 클립 작성 스레드 정리 (대기 중인 클립은 저장 후 종료)
+    try:
+        from camera.event_clips import event_clip_recorder
+        event_clip_recorder.stop()
+        print("⏹ 이벤트 클립 작성기 중지됨")
+    except Exception as e:
+        print(f"⚠️ 이벤트 클립 작성기 중지 실패: {e}")
+    
+    # 타임랩스 중지
+    try:
+        from camera.timelapse import timelapse_capture
+        timelapse_capture.stop()
+        print("⏹ 타임랩스 중지됨")
+    except Exception as e:
+        print(f"⚠️ 타임랩스 중지 실패: {e}")
+    
+    # 연속 녹화 중지 (현재 세그먼트는 작성 스레드가 닫음)
+    try:
+        from camera.segment_recorder import segment_recorder
+        segment_recorder.stop()
+        print("⏹ 연속 녹화 중지됨")
+    except Exception as e:
+        print(f"⚠️ 연속 녹화 중지 실패: {e}")
+    
+    # WebRTC 피어 종료 (카메라/마이크 소비자 해제)
+    try:
+        from services.webrtc_service import webrtc_service
+        await webrtc_service.close_all()
+        print("⏹ WebRTC 피어 종료됨")
+    except Exception as e:
+        print(f"⚠️ WebRTC 피어 종료 실패: {e}")
+    
+    # YOLO 감지기 중지 (프레임 버스 구독 해제)
+    try:
+        from yolo.yolo import yolo_detector
+        if yolo_detector.is_running:
+            await asyncio.get_event_loop().run_in_executor(None, yolo_detector.stop)
+            print("⏹ YOLO 감지기 중지됨")
+    except Exception as e:
+        print(f"⚠️ YOLO 감지기 중지 실패: {e}")
+    
+    # H.264 인코더(ffmpeg) 프로세스 정리
+    try:
+        from camera.h264_stream import h264_stream
+        h264_stream.shutdown()
+        print("⏹ H.264 인코더 중지됨")
+    except Exception as e:
+        print(f"⚠️ H.264 인코더 중지 실패: {e}")
+    
     # GPIO 정리
     try:
         from services.feed_service import cleanup
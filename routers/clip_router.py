@@ -0,0 +1,127 @@
+# routers/clip_router.py - 이벤트 클립 목록/썸네일/다운로드 (Range 지원)
+import os
+import asyncio
+import logging
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Header, Query
+from fastapi.responses import Response, StreamingResponse
+
+from camera.clip_store import clip_store, CLIP_QUERY_LIMIT
+from utils.http_range import RangeNotSatisfiable, parse_range
+from utils.time_parse import parse_time
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# 다운로드 시 한 번에 읽는 크기
+CLIP_READ_CHUNK = 64 * 1024
+
+
+def _read_at(path: str, offset: int, length: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+async def _iter_file(path: str, start: int, end: int):
+    """[start, end] 구간을 조각으로 읽어 전달 (파일 읽기는 이벤트 루프 밖에서)"""
+    loop = asyncio.get_running_loop()
+    position = start
+    while position <= end:
+        length = min(CLIP_READ_CHUNK, end - position + 1)
+        data = await loop.run_in_executor(None, _read_at, path, position, length)
+        if not data:
+            break
+        position += len(data)
+        yield data
+
+
+def _clip_summary(clip: dict) -> dict:
+    clip_id = clip["id"]
+    return {
+        **{key: value for key, value in clip.items() if key != "path"},
+        "file": os.path.basename(clip["path"]),
+        "thumbnail_url": f"/clips/{clip_id}/thumbnail.jpg",
+        "video_url": f"/clips/{clip_id}/video.mjpeg",
+    }
+
+
+@router.get("/clips")
+async def list_clips(start: Optional[str] = None, end: Optional[str] = None,
+                     event_type: Optional[str] = None,
+                     limit: int = Query(100, ge=1, le=CLIP_QUERY_LIMIT)):
+    """시간 구간/이벤트 종류로 클립 목록 조회 (최신순, 색인만 읽음)"""
+    start_time = parse_time(start) if start else None
+    end_time = parse_time(end) if end else None
+    loop = asyncio.get_running_loop()
+    clips = await loop.run_in_executor(None, clip_store.query, start_time, end_time, event_type, limit)
+    return {"count": len(clips), "clips": [_clip_summary(clip) for clip in clips]}
+
+
+@router.get("/clips/{clip_id}")
+async def get_clip(clip_id: int):
+    """클립 메타데이터 + 프레임별 시각/오프셋 (스크러빙용)"""
+    loop = asyncio.get_running_loop()
+    clip = await loop.run_in_executor(None, clip_store.get, clip_id, True)
+    if clip is None:
+        raise HTTPException(status_code=404, detail="클립 없음")
+    return _clip_summary(clip)
+
+
+@router.get("/clips/{clip_id}/thumbnail.jpg")
+async def clip_thumbnail(clip_id: int):
+    """작성 시점에 만든 썸네일 (디코딩 없음)"""
+    loop = asyncio.get_running_loop()
+    thumbnail = await loop.run_in_executor(None, clip_store.thumbnail, clip_id)
+    if thumbnail is None:
+        raise HTTPException(status_code=404, detail="썸네일 없음")
+    return Response(content=thumbnail, media_type="image/jpeg",
+                    headers={"Cache-Control": "public, max-age=86400"})
+
+
+@router.get("/clips/{clip_id}/frames/{frame_index}.jpg")
+async def clip_frame(clip_id: int, frame_index: int):
+    """클립의 프레임 한 장 - 오프셋 색인으로 해당 JPEG만 잘라 읽음"""
+    loop = asyncio.get_running_loop()
+    location = await loop.run_in_executor(None, clip_store.frame_location, clip_id, frame_index)
+    if location is None:
+        raise HTTPException(status_code=404, detail="프레임 없음")
+    path, offset, length = location
+    try:
+        jpeg = await loop.run_in_executor(None, _read_at, path, offset, length)
+    except OSError:
+        raise HTTPException(status_code=404, detail="클립 파일 없음")
+    return Response(content=jpeg, media_type="image/jpeg",
+                    headers={"Cache-Control": "public, max-age=86400"})
+
+
+@router.get("/clips/{clip_id}/video.mjpeg")
+async def clip_video(clip_id: int, range_header: Optional[str] = Header(None, alias="Range")):
+    """클립 파일 다운로드 - Range 요청이면 206으로 해당 구간만"""
+    loop = asyncio.get_running_loop()
+    clip = await loop.run_in_executor(None, clip_store.get, clip_id)
+    if clip is None:
+        raise HTTPException(status_code=404, detail="클립 없음")
+    path = clip["path"]
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="클립 파일 없음")
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'inline; filename="{os.path.basename(path)}"',
+    }
+    try:
+        requested = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        raise HTTPException(status_code=416, detail="요청 구간이 파일 범위를 벗어남",
+                            headers={"Content-Range": f"bytes */{size}"})
+    if requested is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_iter_file(path, 0, size - 1), media_type="video/x-motion-jpeg", headers=headers)
+    start, end = requested
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(_iter_file(path, start, end), status_code=206,
+                             media_type="video/x-motion-jpeg", headers=headers)
@@ -1,37 +1,198 @@
-from fastapi.responses import StreamingResponse
-from fastapi import APIRouter, BackgroundTasks
-from camera.mjpeg_streamer import generate_mjpeg, stop_capture
+from fastapi.responses import StreamingResponse, Response
+from fastapi import APIRouter, HTTPException, Header
+from typing import Optional, Tuple
+from camera.mjpeg_streamer import generate_mjpeg
+from camera.capture_engine import capture_engine
+from camera.capability_probe import camera_capabilities
+from camera.frame import VARIANT_SCALES
+from camera.stream_control import viewer_registry
+from camera.event_clips import event_clip_recorder
+from camera.latency_stats import latency_stats
+from camera.segment_recorder import segment_recorder
+from camera.h264_stream import h264_stream, stream_h264, ffmpeg_available
+from camera.timelapse import timelapse_capture, stream_timelapse, TIMELAPSE_PLAYBACK_FPS
+from camera.snapshot import latest_snapshot, one_shot_snapshot, make_etag, etag_matches, ONE_SHOT_TIMEOUT
+from camera.overlay import overlay_renderer
+from camera.frame_bus import frame_bus
+from camera.burst import burst_capture, BURST_PAST_FRAMES, BURST_NEXT_FRAMES
 from services.camera_service import generate_async_mjpeg, async_camera_service
+from services.webrtc_service import webrtc_service
+from utils.time_parse import parse_time
 import asyncio
 import logging
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# 크롭 영역 격자 (픽셀) - 손가락으로 비슷하게 확대한 시청자들이 같은 인코딩을 공유하도록 맞춤
+CROP_ALIGN = 16
+
+def _parse_size(size: str) -> int:
+    """size 쿼리 값(full/half/quarter)을 축소 배율로 변환"""
+    scale = VARIANT_SCALES.get(size.lower())
+    if scale is None:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 size: {size} (full, half, quarter)")
+    return scale
+
+def _parse_crop(crop: Optional[str]) -> Optional[Tuple[int, int, int, int]]:
+    """crop 쿼리 값(x,y,w,h - 화면 비율 0~1)을 CROP_ALIGN 격자에 맞춘 원본 픽셀 영역으로 변환"""
+    if not crop:
+        return None
+    try:
+        x, y, w, h = (float(value) for value in crop.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"crop 형식 오류: {crop} (예: 0.25,0.25,0.5,0.5)")
+    if not (0 <= x < 1 and 0 <= y < 1 and 0 < w <= 1 and 0 < h <= 1):
+        raise HTTPException(status_code=400, detail=f"crop 값은 0~1 비율이어야 함: {crop}")
+    # 장치를 열기 전이면 열 때 적용될 모드 기준 (capture_engine.width/height는 아직 요청 값일 수 있음)
+    width, height, _ = capture_engine.negotiated_mode()
+
+    def align(value: float, limit: int) -> int:
+        return min(max(int(round(value / CROP_ALIGN)) * CROP_ALIGN, 0), limit)
+
+    left, top = align(x * width, width - CROP_ALIGN), align(y * height, height - CROP_ALIGN)
+    right, bottom = align((x + w) * width, width), align((y + h) * height, height)
+    return left, top, max(right - left, CROP_ALIGN), max(bottom - top, CROP_ALIGN)
+
+def _parse_output(out: Optional[str]) -> Optional[Tuple[int, int]]:
+    """out 쿼리 값(WxH)을 출력 크기로 변환 (짝수로 맞추고 원본 해상도를 넘지 않음)"""
+    if not out:
+        return None
+    try:
+        width, height = (int(value) for value in out.lower().split("x"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"out 형식 오류: {out} (예: 320x240)")
+    if width < 16 or height < 16:
+        raise HTTPException(status_code=400, detail=f"출력 크기가 너무 작음: {out}")
+    frame_width, frame_height, _ = capture_engine.negotiated_mode()
+    return min(width, frame_width) // 2 * 2, min(height, frame_height) // 2 * 2
+
 @router.get("/mjpeg")
-def mjpeg(background_tasks: BackgroundTasks):
-    """기존 동기 MJPEG 스트림 (하위 호환성)"""
-    # 클라이언트 접속 종료 시 stop_capture 자동 호출
-    background_tasks.add_task(stop_capture)
-    
+async def mjpeg(size: str = "half", timestamps: bool = False, overlay: bool = False,
+                crop: Optional[str] = None, out: Optional[str] = None):
+    """
+    기존 동기 MJPEG 스트림 (하위 호환성) - 기본 1/2 해상도, ?size=full|half|quarter
+
+    ?timestamps=1이면 각 파트에 X-Frame-Timestamp(캡처 시각) 헤더를 붙인다.
+    ?overlay=1이면 시각/거리/레이저 조준점 오버레이를 합성한 스트림을 받는다.
+    ?crop=x,y,w,h(0~1 비율)&out=320x240이면 서버에서 잘라낸 영역만 인코딩해 보낸다 (디지털 줌).
+    """
+    scale = _parse_size(size)
+    # 접속 종료 시 stop_capture()는 생성기의 finally에서 한 번만 호출됨
     return StreamingResponse(
-        generate_mjpeg(),
+        generate_mjpeg(scale, timestamps, overlay, _parse_crop(crop), _parse_output(out)),
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
 @router.get("/mjpeg-async")
-async def mjpeg_async():
-    """비동기 MJPEG 스트림 (새로운 버전)"""
+async def mjpeg_async(size: str = "full", timestamps: bool = False, overlay: bool = False,
+                      crop: Optional[str] = None, out: Optional[str] = None):
+    """
+    비동기 MJPEG 스트림 (새로운 버전) - 기본 원본 해상도, ?size=full|half|quarter, ?timestamps=1, ?overlay=1
+
+    ?crop=x,y,w,h&out=WxH는 /mjpeg와 같다.
+    """
+    scale = _parse_size(size)
+    region = _parse_crop(crop)
+    output = _parse_output(out)
     try:
         logger.info("📹 비동기 MJPEG 스트림 시작")
         return StreamingResponse(
-            generate_async_mjpeg(),
+            generate_async_mjpeg(scale, timestamps, overlay, region, output),
             media_type="multipart/x-mixed-replace; boundary=frame"
         )
     except Exception as e:
         logger.error(f"❌ 비동기 MJPEG 스트림 생성 실패: {e}")
         raise
 
+@router.get("/snapshot.jpg")
+async def snapshot(size: str = "full", overlay: bool = False, if_none_match: Optional[str] = Header(None)):
+    """
+    라이브 파이프라인의 최신 JPEG 한 장 (추가 캡처/인코딩 없음)
+
+    ETag/If-None-Match를 지원하므로 폴링하는 대시보드는 장면이 바뀌지 않았으면 304를 받는다
+    (움직임 게이트와 같은 기준으로 비교 - 센서 노이즈만 다른 프레임은 같은 장면).
+    스트림이 돌고 있지 않을 때만 단발 캡처로 대체한다.
+    """
+    scale = _parse_size(size)
+    loop = asyncio.get_event_loop()
+
+    result = await loop.run_in_executor(None, latest_snapshot, scale, overlay)
+    if result is not None:
+        frame, variant = result
+        etag = make_etag(frame, variant)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        if frame.is_transcode(variant):
+            # 해당 배율을 보는 시청자가 없으면 여기서 한 번 인코딩 (이벤트 루프 밖에서)
+            jpeg = await loop.run_in_executor(None, frame.render, variant)
+        else:
+            jpeg = frame.render(variant)
+    else:
+        shot = await loop.run_in_executor(None, one_shot_snapshot, scale, ONE_SHOT_TIMEOUT, overlay)
+        if shot is None:
+            raise HTTPException(status_code=503, detail="카메라 프레임을 가져올 수 없음")
+        frame, variant, jpeg = shot
+        etag = make_etag(frame, variant)
+
+    if jpeg is None:
+        raise HTTPException(status_code=503, detail="JPEG 인코딩 실패")
+    return Response(
+        content=jpeg,
+        media_type="image/jpeg",
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
+
+@router.get("/h264.mp4")
+async def h264(bitrate: Optional[str] = None, gop: Optional[int] = None):
+    """
+    H.264 fragmented MP4 스트림 (셀룰러용 저대역폭) - <video src="/h264.mp4">로 재생
+
+    인코딩은 ffmpeg 프로세스 하나가 모든 시청자 몫을 한 번만 한다.
+    bitrate/gop는 실행 중인 인코더가 없을 때(첫 시청자)만 적용되고,
+    이미 시청자가 있으면 무시되어 공유 인코더 설정을 그대로 받는다.
+    """
+    if not ffmpeg_available():
+        raise HTTPException(status_code=503, detail="ffmpeg가 설치되어 있지 않음")
+    try:
+        applied = await asyncio.get_event_loop().run_in_executor(None, h264_stream.configure, bitrate, gop)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not applied and (bitrate is not None or gop is not None):
+        logger.info("📼 H.264 인코더가 이미 실행 중 - bitrate/gop 요청 무시")
+    return StreamingResponse(
+        stream_h264(),
+        media_type="video/mp4",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@router.get("/timelapse.mjpeg")
+async def timelapse_stream(start: str, end: Optional[str] = None, fps: float = TIMELAPSE_PLAYBACK_FPS):
+    """저장된 타임랩스 구간을 빨리 감기 MJPEG으로 재생 (end 생략 시 현재까지)"""
+    start_time = parse_time(start)
+    end_time = parse_time(end) if end else datetime.now().timestamp()
+    if end_time < start_time:
+        raise HTTPException(status_code=400, detail="end가 start보다 앞섬")
+    return StreamingResponse(
+        stream_timelapse(start_time, end_time, fps),
+        media_type="multipart/x-mixed-replace; boundary=frame"
+    )
+
+@router.post("/timelapse/start")
+async def start_timelapse(interval: Optional[float] = None):
+    """타임랩스 촬영 시작 (interval초마다 한 장)"""
+    if interval is not None and interval <= 0:
+        raise HTTPException(status_code=400, detail="interval은 0보다 커야 합니다")
+    started = timelapse_capture.start(interval)
+    return {"success": started, "message": "타임랩스 시작" if started else "이미 실행 중", **timelapse_capture.get_status()}
+
+@router.post("/timelapse/stop")
+async def stop_timelapse():
+    """타임랩스 촬영 중지"""
+    timelapse_capture.stop()
+    return {"success": True, "message": "타임랩스 중지"}
+
 @router.get("/camera-info")
 async def get_camera_info():
     """카메라 정보 조회"""
@@ -42,6 +203,57 @@ async def get_camera_info():
         logger.error(f"❌ 카메라 정보 조회 실패: {e}")
         return {"error": str(e)}
 
+@router.get("/camera/stats")
+async def get_camera_stats():
+    """공유 캡처 엔진 상태 조회 (소비자 수, 장치 열기 횟수, 인코딩/시청자별 통계)"""
+    return {
+        **capture_engine.get_status(),
+        "viewers": viewer_registry.get_status(),
+        "event_clips": event_clip_recorder.get_status(),
+        "recorder": segment_recorder.get_status(),
+        "timelapse": timelapse_capture.get_status(),
+        "h264": h264_stream.get_status(),
+        "webrtc": webrtc_service.get_status(),
+        "overlay": overlay_renderer.get_status(),
+        "frame_bus": frame_bus.get_status(),
+        "burst": burst_capture.get_status(),
+    }
+
+@router.get("/camera/capabilities")
+async def get_camera_capabilities(refresh: bool = False):
+    """
+    캐시된 카메라 지원 모드/벤치마크 결과 (refresh=1이면 다시 프로브 - 카메라를 쓰는 중이면 409)
+
+    캐시가 없는데 카메라를 쓰는 중이면 프로브하지 않고 현재 적용 중인 모드만 돌려준다.
+    """
+    entry = camera_capabilities.get(capture_engine.device)
+    if refresh or entry is None:
+        if capture_engine.is_running:
+            if refresh:
+                raise HTTPException(status_code=409, detail="카메라 사용 중 - 스트림을 모두 닫은 뒤 다시 시도")
+            width, height, fps = capture_engine.negotiated_mode()
+            return {
+                "device": capture_engine.device,
+                "probed": False,
+                "state": capture_engine.state,
+                "active_mode": {"width": width, "height": height, "fps": fps, "mode": capture_engine.mode},
+            }
+        else:
+            entry = await asyncio.get_event_loop().run_in_executor(
+                None, lambda: camera_capabilities.probe(
+                    capture_engine.device, *capture_engine.requested, force=refresh,
+                    busy=lambda: capture_engine.is_running
+                )
+            )
+    if entry is None:
+        raise HTTPException(status_code=404, detail="프로브 결과 없음")
+    return entry
+
+@router.get("/camera/latency")
+async def get_camera_latency():
+    """캡처 → 클라이언트 단계별 지연 히스토그램 (최근 LATENCY_WINDOW_SECONDS초)"""
+    return latency_stats.get_status()
+
 @router.post("/camera/initialize")
 async def initialize_camera():
     """카메라 초기화"""
@@ -54,14 +266,37 @@ async def initialize_camera():
 
 @router.post("/camera/capture")
 async def capture_photo():
-    """사진 촬영"""
+    """사진 촬영 - 연속 촬영에서 가장 선명한 한 장을 저장 (움직이는 반려동물 대비)"""
     try:
-        success = await async_camera_service.capture_photo("captured_photo.jpg")
+        loop = asyncio.get_event_loop()
+        shot = await loop.run_in_executor(
+            None, burst_capture.capture, BURST_PAST_FRAMES, BURST_NEXT_FRAMES, "captured_photo.jpg"
+        )
+        success = shot is not None
         return {"success": success, "message": "사진 촬영 완료" if success else "사진 촬영 실패"}
     except Exception as e:
         logger.error(f"❌ 사진 촬영 실패: {e}")
         return {"success": False, "error": str(e)}
 
+@router.get("/camera/burst.jpg")
+async def burst_photo(past: int = BURST_PAST_FRAMES, next: int = BURST_NEXT_FRAMES):
+    """
+    연속 촬영 베스트 샷 - 직전 past장(링 버퍼) + 이후 next장 중 가장 선명한 프레임의 원본 JPEG
+
+    전체 과정은 이벤트 루프 밖에서 실행되며 카메라를 다시 열지 않는다.
+    응답 헤더: X-Burst-Score(선명도), X-Burst-Candidates(후보 수), X-Frame-Timestamp(촬영 시각)
+    """
+    loop = asyncio.get_event_loop()
+    shot = await loop.run_in_executor(None, burst_capture.capture, past, next)
+    if shot is None:
+        raise HTTPException(status_code=503, detail="카메라 프레임을 가져올 수 없음")
+    return Response(content=shot.jpeg, media_type="image/jpeg", headers={
+        "Cache-Control": "no-store",
+        "X-Burst-Score": f"{shot.score:.1f}",
+        "X-Burst-Candidates": str(shot.candidates),
+        "X-Frame-Timestamp": f"{shot.frame.captured_wall:.3f}",
+    })
+
 @router.post("/camera/stop")
 async def stop_camera():
     """카메라 중지"""
@@ -0,0 +1,179 @@
+# routers/ws_video_router.py - 바이너리 WebSocket 영상 채널
+import asyncio
+import json
+import struct
+import time
+import logging
+from typing import Dict, Tuple
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from camera.capture_engine import capture_engine, STATE_STREAMING
+from camera.frame import VARIANT_SCALES, StreamVariant, jpeg_dimensions
+from camera.frame_broadcaster import frame_broadcaster
+from camera.latency_stats import latency_stats
+from camera.stream_control import AdaptiveStreamController, ViewerSession, viewer_registry
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# 프레임 헤더 (네트워크 바이트 순서, 18바이트)
+#   version   uint8
+#   codec     uint8   (1 = JPEG)
+#   seq       uint32
+#   timestamp float64 (캡처 시각, Unix epoch 초)
+#   width     uint16
+#   height    uint16
+FRAME_HEADER = struct.Struct("!BBIdHH")
+FRAME_HEADER_VERSION = 1
+CODEC_JPEG = 1
+
+# ack를 받지 못한 채 보낼 수 있는 최대 프레임 수 (클라이언트가 config로 변경 가능)
+DEFAULT_MAX_OUTSTANDING = 2
+MAX_OUTSTANDING_LIMIT = 8
+# 이 시간 동안 ack가 없으면 가장 오래된 미확인 프레임을 유실로 간주
+ACK_TIMEOUT = 2.0
+FRAME_WAIT_TIMEOUT = 1.0
+
+
+def pack_frame_header(seq: int, timestamp: float, width: int, height: int, codec: int = CODEC_JPEG) -> bytes:
+    return FRAME_HEADER.pack(FRAME_HEADER_VERSION, codec, seq & 0xFFFFFFFF, timestamp, width, height)
+
+
+@router.websocket("/ws/video")
+async def websocket_video(websocket: WebSocket):
+    """
+    인코딩된 프레임을 바이너리 메시지 하나씩 전송 (헤더 + JPEG)
+
+    클라이언트 → 서버 (텍스트 JSON):
+      {"type": "ack", "seq": 123}                         프레임 수신 확인
+      {"type": "config", "size": "half", "max_outstanding": 3, "overlay": true}
+    서버 → 클라이언트 (텍스트 JSON):
+      {"type": "status", "camera": "reconnecting"}        카메라 상태가 바뀔 때 (streaming이면 복구)
+    서버는 미확인 프레임이 max_outstanding개에 도달하면 ack가 올 때까지 전송을 멈추고,
+    그동안 도착한 프레임은 건너뛰고 가장 최신 프레임부터 다시 보낸다.
+    """
+    await websocket.accept()
+    size = websocket.query_params.get("size", "full")
+    scale = VARIANT_SCALES.get(size.lower(), 1)
+    overlay = websocket.query_params.get("overlay", "").lower() in ("1", "true", "yes")
+
+    capture_engine.acquire()
+
+    controller = AdaptiveStreamController(max_quality=None, max_fps=capture_engine.fps)
+    session = ViewerSession("/ws/video", controller, scale)
+    viewer_registry.add(session)
+    variant = StreamVariant(scale, controller.quality, overlay)
+    frame_broadcaster.subscribe(variant)
+    logger.info(f"🎥 [WS_VIDEO] 클라이언트 연결 (size={size})")
+
+    outstanding: Dict[int, Tuple[float, int]] = {}
+    ack_event = asyncio.Event()
+    state = {"max_outstanding": DEFAULT_MAX_OUTSTANDING, "scale": scale, "overlay": overlay, "lost": 0}
+
+    async def receive_acks():
+        while True:
+            message = await websocket.receive_text()
+            try:
+                data = json.loads(message)
+            except ValueError:
+                continue
+            # 형식이 잘못된 메시지는 무시 (소켓을 끊지 않음)
+            if not isinstance(data, dict):
+                continue
+            if data.get("type") == "ack":
+                try:
+                    seq = int(data["seq"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                sent = outstanding.pop(seq, None)
+                if sent is not None:
+                    sent_at, nbytes = sent
+                    # 미확인 프레임이 파이프라인으로 겹쳐 전송되므로 RTT를 한도로 나눈 값을
+                    # 프레임당 전송 시간으로 보고 화질 단계를 조절
+                    rtt = time.monotonic() - sent_at
+                    session.controller.record_send(nbytes, rtt / state["max_outstanding"])
+                ack_event.set()
+            elif data.get("type") == "config":
+                if "max_outstanding" in data:
+                    try:
+                        state["max_outstanding"] = max(1, min(MAX_OUTSTANDING_LIMIT, int(data["max_outstanding"])))
+                    except (TypeError, ValueError):
+                        pass
+                if "size" in data:
+                    state["scale"] = VARIANT_SCALES.get(str(data["size"]).lower(), state["scale"])
+                if "overlay" in data:
+                    state["overlay"] = bool(data["overlay"])
+                ack_event.set()
+
+    async def send_frames():
+        nonlocal variant
+        notified_state = STATE_STREAMING
+        while True:
+            # 미확인 프레임이 한도에 도달하면 ack를 기다림 (blind write 없음)
+            while len(outstanding) >= state["max_outstanding"]:
+                ack_event.clear()
+                try:
+                    await asyncio.wait_for(ack_event.wait(), ACK_TIMEOUT)
+                except asyncio.TimeoutError:
+                    oldest = min(outstanding)
+                    outstanding.pop(oldest, None)
+                    state["lost"] += 1
+
+            wanted = StreamVariant(state["scale"], controller.quality, state["overlay"])
+            if wanted != variant:
+                frame_broadcaster.resubscribe(variant, wanted)
+                variant = wanted
+                session.scale = variant.scale
+
+            encoded = await frame_broadcaster.wait_for_encoded(session.last_seq, FRAME_WAIT_TIMEOUT, variant)
+            if encoded is None:
+                if not capture_engine.is_running:
+                    logger.warning("⚠️ [WS_VIDEO] 캡처 엔진이 중지됨 - 전송 종료")
+                    return
+                camera_state = capture_engine.state
+                if camera_state != notified_state:
+                    notified_state = camera_state
+                    await websocket.send_text(json.dumps({"type": "status", "camera": camera_state}))
+                continue
+            if notified_state != STATE_STREAMING:
+                notified_state = STATE_STREAMING
+                await websocket.send_text(json.dumps({"type": "status", "camera": STATE_STREAMING}))
+            now = time.monotonic()
+            if not session.accept(encoded.seq, now):
+                continue
+
+            width, height = jpeg_dimensions(encoded.jpeg)
+            # 벽시계 캡처 시각을 실어 클라이언트가 glass-to-glass 지연을 계산할 수 있게 함
+            header = pack_frame_header(encoded.seq, encoded.frame.captured_wall, width, height)
+            write_started = time.monotonic()
+            await websocket.send_bytes(header + encoded.jpeg)
+            latency_stats.record_delivery(encoded.frame.captured_at, encoded.enqueued_at,
+                                          now, write_started, time.monotonic())
+            outstanding[encoded.seq] = (now, len(encoded.jpeg))
+            session.last_sent_at = now
+            session.frames_sent += 1
+            session.bytes_sent += len(encoded.jpeg)
+
+    receiver = asyncio.create_task(receive_acks())
+    sender = asyncio.create_task(send_frames())
+    try:
+        done, pending = await asyncio.wait({receiver, sender}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                logger.error(f"❌ [WS_VIDEO] 에러: {error}")
+        if sender in done:
+            # 캡처가 멈춰 송신이 끝난 경우 - 클라이언트가 재연결할 수 있도록 정상 종료
+            try:
+                await websocket.close()
+            except Exception:
+                pass
+    finally:
+        receiver.cancel()
+        sender.cancel()
+        logger.info(f"🔌 [WS_VIDEO] 클라이언트 연결 종료 (유실 {state['lost']}프레임)")
+        viewer_registry.remove(session)
+        frame_broadcaster.unsubscribe(variant)
+        capture_engine.release()
@@ -0,0 +1,66 @@
+# routers/ws_webrtc_router.py - WebRTC 시그널링 (WebSocket)
+import json
+import logging
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from camera.frame import VARIANT_SCALES
+from services.webrtc_service import webrtc_service, WEBRTC_DEFAULT_SCALE
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.websocket("/ws/webrtc")
+async def websocket_webrtc(websocket: WebSocket):
+    """
+    WebRTC 시그널링 - 영상(카메라) + 오디오(서버 마이크) + 명령 데이터 채널을 한 세션으로
+
+    클라이언트 → 서버 (텍스트 JSON):
+      {"type": "offer", "sdp": "...", "size": "half", "audio": true}
+      {"type": "bye"}
+    서버 → 클라이언트 (텍스트 JSON):
+      {"type": "answer", "sdp": "..."}
+      {"type": "error", "message": "..."}
+    명령은 클라이언트가 만든 데이터 채널로 /ws와 같은 JSON/문자열 명령을 보내면 된다.
+    시그널링 WebSocket이 끊기면 피어도 종료한다.
+    """
+    await websocket.accept()
+    if not webrtc_service.available:
+        await websocket.send_text(json.dumps(
+            {"type": "error", "message": "aiortc가 설치되어 있지 않음 (pip install aiortc)"}, ensure_ascii=False))
+        await websocket.close()
+        return
+
+    pc = None
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                continue
+            # 형식이 잘못된 메시지는 무시 (피어 연결을 끊지 않음)
+            if not isinstance(message, dict):
+                continue
+            message_type = message.get("type")
+            if message_type == "offer":
+                if pc is not None:
+                    await webrtc_service.close(pc)
+                scale = VARIANT_SCALES.get(str(message.get("size", "")).lower(), WEBRTC_DEFAULT_SCALE)
+                try:
+                    pc, answer = await webrtc_service.create_answer(
+                        message["sdp"], message.get("sdp_type", "offer"), scale, message.get("audio", True))
+                except Exception as e:
+                    logger.error(f"❌ [WEBRTC] 앤서 생성 실패: {e}")
+                    await websocket.send_text(json.dumps({"type": "error", "message": str(e)}, ensure_ascii=False))
+                    continue
+                await websocket.send_text(json.dumps({"type": "answer", "sdp": answer}))
+                logger.info("📡 [WEBRTC] 앤서 전송")
+            elif message_type == "bye":
+                break
+    except WebSocketDisconnect:
+        logger.info("🔌 [WEBRTC] 시그널링 연결 종료")
+    except Exception as e:
+        logger.error(f"❌ [WEBRTC] 시그널링 에러: {e}")
+    finally:
+        if pc is not None:
+            await webrtc_service.close(pc)
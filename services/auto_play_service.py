@@ -9,6 +9,7 @@ from services.xy_servo import set_xy_servo_angles, reset_to_center, set_xy_servo
 from services.motor_service import move_forward, move_backward, turn_left, turn_right, stop_motors
 from services.sol_service import fire
 from services.audio_playback_service import audio_playback_service
+from utils import hardware_events
 
 logger = logging.getLogger(__name__)
 
@@ -119,6 +120,8 @@ class AutoPlayService:
         self.auto_play_running = True
         
         logger.info("🎮 자동 놀이 모드 시작")
+        # 나중에 다시 볼 수 있도록 자동 놀이 동안 연속 녹화
+        hardware_events.emit(hardware_events.RECORDING_START, "auto_play")
         
         try:
             # 시작 음성 재생 (볼륨 크게)
@@ -150,6 +153,7 @@ class AutoPlayService:
             laser_off()
             stop_motors()
             reset_to_center()
+            hardware_events.emit(hardware_events.RECORDING_STOP)
             self.is_auto_playing = False
             logger.info(f"🎮 자동 놀이 모드 종료 (총 {pattern_count}개 패턴 실행)")
     
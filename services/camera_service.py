@@ -1,102 +1,89 @@
 import cv2
 import asyncio
-import threading
-import time
 import logging
 from typing import Optional, Tuple
 import numpy as np
 
+from camera.capture_engine import capture_engine
+from camera.jpeg_encoder import jpeg_encoder
+from camera.mjpeg_streamer import stream_mjpeg
+
 logger = logging.getLogger(__name__)
 
-# 전역 변수
-_camera = None
-_latest_frame = None
-_camera_lock = threading.Lock()
-_camera_running = False
-_camera_thread = None
+# /mjpeg-async 적응형 화질 단계의 상한
+ASYNC_JPEG_QUALITY = 70
+
+
+def _write_file(filename: str, data: bytes) -> bool:
+    """바이트를 파일로 저장 (블로킹 - 이벤트 루프 밖에서 호출)"""
+    try:
+        with open(filename, "wb") as f:
+            f.write(data)
+        return True
+    except OSError as e:
+        logger.error(f"❌ 파일 쓰기 실패 ({filename}): {e}")
+        return False
+
 
 class AsyncCameraService:
-    """비동기 카메라 서비스"""
+    """비동기 카메라 서비스 (공유 캡처 엔진 위의 비동기 래퍼)"""
     
     def __init__(self, device_id: int = 0, width: int = 640, height: int = 480, fps: int = 30):
         self.device_id = device_id
         self.width = width
         self.height = height
         self.fps = fps
-        self.camera = None
         self.is_initialized = False
         
     async def initialize(self) -> bool:
-        """카메라 초기화 (비동기)"""
-        try:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(None, self._init_camera_sync)
-            self.is_initialized = result
-            if result:
-                logger.info(f"📹 카메라 초기화 성공 (해상도: {self.width}x{self.height}, FPS: {self.fps})")
-            else:
-                logger.error("❌ 카메라 초기화 실패")
-            return result
-        except Exception as e:
-            logger.error(f"❌ 카메라 초기화 중 예외 발생: {e}")
-            return False
-    
-    def _init_camera_sync(self) -> bool:
-        """동기 카메라 초기화"""
+        """카메라 초기화 (비동기) - 캡처 엔진에 한 번만 소비자로 등록"""
+        if self.is_initialized:
+            return True
         try:
-            self.camera = cv2.VideoCapture(self.device_id)
-            if not self.camera.isOpened():
-                logger.error(f"❌ 카메라 {self.device_id} 열기 실패")
-                return False
-            
-            # 카메라 설정
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
-            self.camera.set(cv2.CAP_PROP_FPS, self.fps)
-            self.camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
-            
-            # 실제 설정된 값 확인
-            actual_width = self.camera.get(cv2.CAP_PROP_FRAME_WIDTH)
-            actual_height = self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT)
-            actual_fps = self.camera.get(cv2.CAP_PROP_FPS)
-            
-            logger.info(f"📹 카메라 설정 완료 - 해상도: {actual_width}x{actual_height}, FPS: {actual_fps}")
+            capture_engine.acquire()
+            self.is_initialized = True
+            logger.info("📹 카메라 초기화 성공 (공유 캡처 엔진 사용)")
             return True
-            
         except Exception as e:
-            logger.error(f"❌ 카메라 초기화 실패: {e}")
+            logger.error(f"❌ 카메라 초기화 중 예외 발생: {e}")
             return False
     
     async def capture_frame(self) -> Optional[np.ndarray]:
-        """프레임 캡처 (비동기)"""
-        if not self.is_initialized or self.camera is None:
+        """프레임 캡처 (비동기) - 캡처 엔진의 최신 프레임 사용"""
+        if not capture_engine.is_running:
             logger.warning("⚠️ 카메라가 초기화되지 않음")
             return None
         
-        try:
-            loop = asyncio.get_event_loop()
-            frame = await loop.run_in_executor(None, self._capture_frame_sync)
-            return frame
-        except Exception as e:
-            logger.error(f"❌ 프레임 캡처 실패: {e}")
+        frame = await self._wait_latest()
+        if frame is None:
+            logger.warning("⚠️ 프레임 읽기 실패")
             return None
+        # 패스스루 프레임은 여기서 처음 디코딩됨 - 이벤트 루프 밖에서 실행
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, frame.get_bgr)
     
-    def _capture_frame_sync(self) -> Optional[np.ndarray]:
-        """동기 프레임 캡처"""
-        try:
-            ret, frame = self.camera.read()
-            if ret:
-                return frame
-            else:
-                logger.warning("⚠️ 프레임 읽기 실패")
-                return None
-        except Exception as e:
-            logger.error(f"❌ 프레임 캡처 중 예외: {e}")
-            return None
+    async def _wait_latest(self):
+        """캡처 엔진의 최신 Frame 반환 (엔진이 막 열린 경우 첫 프레임을 잠시 기다림)"""
+        frame = capture_engine.get_latest()
+        if frame is not None:
+            return frame
+        # 장치는 감시 스레드가 백그라운드에서 여므로 장치 열기 시간만큼 기다림
+        return await capture_engine.wait_for_frame(0, timeout=3.0)
     
     async def capture_photo(self, filename: str = "photo.jpg") -> bool:
         """사진 촬영 (비동기)"""
         try:
+            # 카메라 원본 JPEG이 있으면 디코딩/재인코딩 없이 그대로 저장
+            latest = capture_engine.get_latest() if capture_engine.is_running else None
+            if latest is not None and latest.is_compressed:
+                loop = asyncio.get_event_loop()
+                result = await loop.run_in_executor(None, _write_file, filename, latest.get_jpeg())
+                if result:
+                    logger.info(f"📸 사진 저장 완료: {filename}")
+                else:
+                    logger.error(f"❌ 사진 저장 실패: {filename}")
+                return result
+            
             frame = await self.capture_frame()
             if frame is not None:
                 loop = asyncio.get_event_loop()
@@ -114,15 +101,22 @@ class AsyncCameraService:
             logger.error(f"❌ 사진 촬영 실패: {e}")
             return False
     
-    async def get_frame_jpeg(self, quality: int = 80) -> Optional[bytes]:
-        """JPEG 형식의 프레임 반환 (비동기)"""
+    async def get_frame_jpeg(self, quality: Optional[int] = None) -> Optional[bytes]:
+        """JPEG 형식의 프레임 반환 (비동기, quality=None이면 카메라 원본 화질 그대로)"""
         try:
+            # 카메라 원본 JPEG이 있으면 그대로 반환 - 다른 화질을 요청한 경우만 재인코딩
+            # (Frame 캐시를 거치므로 같은 화질은 프레임당 한 번만 인코딩)
+            latest = capture_engine.get_latest() if capture_engine.is_running else None
+            if latest is not None and latest.is_compressed:
+                if quality is None:
+                    return latest.get_jpeg()
+                loop = asyncio.get_event_loop()
+                return await loop.run_in_executor(None, latest.get_jpeg, quality)
+            
             frame = await self.capture_frame()
             if frame is not None:
                 loop = asyncio.get_event_loop()
-                encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
-                _, jpeg_data = await loop.run_in_executor(None, cv2.imencode, '.jpg', frame, encode_params)
-                return jpeg_data.tobytes()
+                return await loop.run_in_executor(None, jpeg_encoder.encode, frame, quality)
             else:
                 return None
         except Exception as e:
@@ -144,50 +138,28 @@ class AsyncCameraService:
             return False
     
     async def stop_streaming(self):
-        """스트리밍 중지 (비동기)"""
+        """스트리밍 중지 (비동기) - 이 서비스의 소비자 등록만 해제"""
         try:
-            if self.camera is not None:
+            if self.is_initialized:
+                self.is_initialized = False
                 loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, self._release_camera_sync)
+                await loop.run_in_executor(None, capture_engine.release)
                 logger.info("📹 스트리밍 중지")
         except Exception as e:
             logger.error(f"❌ 스트리밍 중지 실패: {e}")
     
-    def _release_camera_sync(self):
-        """동기 카메라 해제"""
-        try:
-            if self.camera is not None:
-                self.camera.release()
-                self.camera = None
-                self.is_initialized = False
-        except Exception as e:
-            logger.error(f"❌ 카메라 해제 실패: {e}")
-    
     async def get_camera_info(self) -> dict:
         """카메라 정보 반환 (비동기)"""
-        if not self.is_initialized or self.camera is None:
+        if not capture_engine.is_running:
             return {"error": "카메라가 초기화되지 않음"}
         
         try:
             loop = asyncio.get_event_loop()
-            info = await loop.run_in_executor(None, self._get_camera_info_sync)
+            info = await loop.run_in_executor(None, capture_engine.get_info)
             return info
         except Exception as e:
             logger.error(f"❌ 카메라 정보 조회 실패: {e}")
             return {"error": str(e)}
-    
-    def _get_camera_info_sync(self) -> dict:
-        """동기 카메라 정보 조회"""
-        try:
-            return {
-                "width": self.camera.get(cv2.CAP_PROP_FRAME_WIDTH),
-                "height": self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT),
-                "fps": self.camera.get(cv2.CAP_PROP_FPS),
-                "device_id": self.device_id,
-                "is_opened": self.camera.isOpened()
-            }
-        except Exception as e:
-            return {"error": str(e)}
 
 # 전역 비동기 카메라 서비스 인스턴스
 async_camera_service = AsyncCameraService()
@@ -195,42 +167,24 @@ async_camera_service = AsyncCameraService()
 # 기존 함수들 (하위 호환성 유지)
 def capture_photo(filename="photo.jpg"):
     """기존 동기 사진 촬영 함수 (하위 호환성)"""
-    cap = cv2.VideoCapture(0)
-    ret, frame = cap.read()
-    if ret:
+    frame = get_frame()
+    if frame is not None:
         cv2.imwrite(filename, frame)
-    cap.release()
 
 def get_frame():
     """기존 동기 프레임 반환 함수 (하위 호환성)"""
+    # 스트리밍 중이면 장치를 다시 열지 않고 최신 프레임 사용
+    if capture_engine.is_running:
+        return capture_engine.get_latest_frame()
     cap = cv2.VideoCapture(0)
     ret, frame = cap.read()
     cap.release()
     return frame if ret else None
 
 # 비동기 스트리밍 생성기
-async def generate_async_mjpeg():
-    """비동기 MJPEG 스트림 생성기"""
-    try:
-        # 카메라 서비스 초기화
-        if not async_camera_service.is_initialized:
-            await async_camera_service.initialize()
-        
-        while True:
-            jpeg_data = await async_camera_service.get_frame_jpeg(quality=70)
-            if jpeg_data:
-                yield (
-                    b"--frame\r\n"
-                    b"Content-Type: image/jpeg\r\n\r\n" + jpeg_data + b"\r\n"
-                )
-            else:
-                # 프레임 캡처 실패 시 잠시 대기
-                await asyncio.sleep(0.1)
-            
-            # FPS 제한
-            await asyncio.sleep(1 / 30)  # 30fps
-            
-    except Exception as e:
-        logger.error(f"❌ 비동기 MJPEG 생성 중 예외: {e}")
-    finally:
-        await async_camera_service.stop_streaming()
+def generate_async_mjpeg(scale: int = 1, timestamps: bool = False, overlay: bool = False,
+                         crop: Optional[Tuple[int, int, int, int]] = None, size: Optional[Tuple[int, int]] = None):
+    """비동기 MJPEG 스트림 생성기 (공유 캡처 엔진/브로드캐스터 사용)"""
+    # 새 프레임 알림으로 깨어나는 공유 생성기 - 종료 시 이 클라이언트의 등록만 해제
+    return stream_mjpeg("/mjpeg-async", max_quality=ASYNC_JPEG_QUALITY, scale=scale, timestamps=timestamps,
+                        overlay=overlay, crop=crop, size=size)
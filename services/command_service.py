@@ -22,6 +22,7 @@ from services.feed_service import (
     cleanup as feed_cleanup, feed_once_sync
 )
 from services.ultrasonic_service import get_distance, get_distance_data, cleanup_ultrasonic
+from utils import hardware_events
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +70,7 @@ class CommandHandler:
         try:
             laser_on()
             logger.info("🔴 레이저 ON")
+            hardware_events.emit(hardware_events.EVENT_CLIP, "laser")
             return True
         except Exception as e:
             logger.error(f"❌ 레이저 ON 실패: {e}")
@@ -182,6 +184,7 @@ class CommandHandler:
     def handle_fire(self):
         """발사 장치 동작"""
         try:
+            hardware_events.emit(hardware_events.EVENT_CLIP, "fire")
             solenoid_fire()
             logger.info("🔥 솔레노이드 발사")
             return True
@@ -192,6 +195,7 @@ class CommandHandler:
     def handle_feed_once(self):
         """급식 한 번 실행"""
         try:
+            hardware_events.emit(hardware_events.EVENT_CLIP, "feed")
             feed_once_sync()  # 동기 버전 사용
             logger.info("🍽 급식 실행 완료")
             return True
@@ -201,6 +205,7 @@ class CommandHandler:
     def handle_feed_multiple(self, count: int):
         """급식 여러 번 실행"""
         try:
+            hardware_events.emit(hardware_events.EVENT_CLIP, "feed")
             for _ in range(count):
                 feed_once_sync()  # 동기 버전 반복 실행
             logger.info(f"🍽 {count}회 급식 실행 완료")
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 from services.settings_service import settings_service
 from services.feed_service import feed_once
+from utils import hardware_events
 import json
 
 logger = logging.getLogger(__name__)
@@ -71,6 +72,7 @@ class FeedScheduler:
                 now = datetime.now()
                 if now >= self.next_feed_time:
                     logger.info(f"✅ 급식 시간 도달: {now.strftime('%H:%M:%S')}")
+                    hardware_events.emit(hardware_events.EVENT_CLIP, "feed")
                     
                     # 설정된 양만큼 급식 실행
                     for i in range(amount):
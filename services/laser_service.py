@@ -1,4 +1,5 @@
 import RPi.GPIO as GPIO
+from utils import hardware_events
 
 LASER_PIN = 17  # 레이저 포인터 (PIN 11)
 
@@ -6,10 +7,12 @@ def laser_on():
     GPIO.setmode(GPIO.BCM)
     GPIO.setup(LASER_PIN, GPIO.OUT)
     GPIO.output(LASER_PIN, GPIO.HIGH)
+    hardware_events.emit(hardware_events.OVERLAY_UPDATE, laser_on=True)
 
 def laser_off():
     GPIO.setmode(GPIO.BCM)
     GPIO.setup(LASER_PIN, GPIO.OUT)
     GPIO.output(LASER_PIN, GPIO.LOW)
+    hardware_events.emit(hardware_events.OVERLAY_UPDATE, laser_on=False)
 
 laser_off()
\ No newline at end of file
@@ -2,6 +2,7 @@ import RPi.GPIO as GPIO
 import time
 import asyncio
 import logging
+from utils import hardware_events
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +59,7 @@ class UltrasonicSensor:
             # 유효한 거리 범위 확인 (2cm ~ 400cm)
             if 2 <= distance <= 400:
                 logger.info(f"📏 거리 측정: {distance:.1f}cm")
+                hardware_events.emit(hardware_events.OVERLAY_UPDATE, distance_cm=distance)
                 return round(distance, 1)
             else:
                 logger.warning(f"⚠️ 측정된 거리가 범위를 벗어남: {distance:.1f}cm")
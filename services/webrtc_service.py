@@ -0,0 +1,324 @@
+# services/webrtc_service.py - WebRTC 피어 (카메라 영상 + 서버 마이크 + 명령 데이터 채널)
+import asyncio
+import json
+import threading
+import time
+import logging
+from fractions import Fraction
+from typing import Optional, Set
+
+from camera.capture_engine import capture_engine
+from camera.frame_notifier import FrameNotifier
+from services.command_service import handle_command_async
+from utils.alsa_suppress import suppress_alsa_errors
+
+try:
+    import av
+    from aiortc import RTCPeerConnection, RTCSessionDescription, MediaStreamTrack, VideoStreamTrack
+    from aiortc.mediastreams import MediaStreamError
+    AIORTC_AVAILABLE = True
+except ImportError:
+    # aiortc는 선택 의존성 - 없으면 /ws/webrtc가 오류 메시지를 돌려줌
+    MediaStreamTrack = VideoStreamTrack = object
+    AIORTC_AVAILABLE = False
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
+
+logger = logging.getLogger(__name__)
+
+# WebRTC 설정
+WEBRTC_DEFAULT_SCALE = 2
+WEBRTC_FRAME_TIMEOUT = 1.0
+# 영상 RTP 클럭 (90kHz) - pts는 캡처 시각 기준
+VIDEO_CLOCK_RATE = 90000
+VIDEO_TIME_BASE = Fraction(1, VIDEO_CLOCK_RATE)
+# 서버 마이크 (기존 /ws/audio_receive와 같은 16kHz 모노 16비트)
+AUDIO_RATE = 16000
+# 20ms 단위로 읽어 Opus 패킷 하나에 맞춤 (1024 샘플 = 64ms 버퍼링을 피함)
+AUDIO_CHUNK_SAMPLES = 320
+AUDIO_TIME_BASE = Fraction(1, AUDIO_RATE)
+AUDIO_WAIT_TIMEOUT = 0.1
+
+
+class MicrophoneSource:
+    """
+    서버 마이크를 한 번만 열어 모든 WebRTC 오디오 트랙이 공유
+
+    읽기 스레드가 20ms 청크를 FrameNotifier로 알리므로, 피어가 여럿이어도 장치는 하나만 연다.
+    첫 트랙이 붙을 때 열고 마지막 트랙이 떠나면 닫는다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._consumers = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._chunks = FrameNotifier()
+        self._seq = 0
+        self.read_errors = 0
+
+    def acquire(self) -> bool:
+        """소비자 등록 - 마이크를 열 수 없으면 False"""
+        if pyaudio is None:
+            logger.warning("⚠️ pyaudio 없음 - WebRTC 오디오 없이 진행")
+            return False
+        with self._lock:
+            if self._consumers == 0:
+                opened = self._open()
+                if opened is None:
+                    return False
+                audio, stream = opened
+                self._stop_event = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(audio, stream, self._stop_event),
+                                                daemon=True)
+                self._thread.start()
+            self._consumers += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._consumers = max(self._consumers - 1, 0)
+            if self._consumers == 0:
+                self._stop_event.set()
+
+    def _open(self):
+        with suppress_alsa_errors():
+            audio = pyaudio.PyAudio()
+            index = None
+            for i in range(audio.get_device_count()):
+                if audio.get_device_info_by_index(i)["maxInputChannels"] > 0:
+                    index = i
+                    break
+            if index is None:
+                logger.warning("⚠️ 사용 가능한 마이크 장치 없음 - WebRTC 오디오 없이 진행")
+                audio.terminate()
+                return None
+            try:
+                stream = audio.open(format=pyaudio.paInt16, channels=1, rate=AUDIO_RATE, input=True,
+                                    input_device_index=index, frames_per_buffer=AUDIO_CHUNK_SAMPLES)
+            except Exception as e:
+                logger.warning(f"⚠️ 마이크 열기 실패: {e}")
+                audio.terminate()
+                return None
+        logger.info(f"🎤 WebRTC 마이크 열림 (장치 {index})")
+        return audio, stream
+
+    def _run(self, audio, stream, stop_event: threading.Event) -> None:
+        try:
+            while not stop_event.is_set():
+                try:
+                    data = stream.read(AUDIO_CHUNK_SAMPLES, exception_on_overflow=False)
+                except Exception as e:
+                    self.read_errors += 1
+                    logger.warning(f"⚠️ 마이크 읽기 실패: {e}")
+                    time.sleep(0.1)
+                    continue
+                self._seq += 1
+                self._chunks.notify(self._seq, data)
+        finally:
+            stream.stop_stream()
+            stream.close()
+            audio.terminate()
+            self._chunks.clear()
+            logger.info("🎤 WebRTC 마이크 닫힘")
+
+    async def wait_chunk(self, after_seq: int, timeout: float = AUDIO_WAIT_TIMEOUT):
+        return await self._chunks.wait_next(after_seq, timeout)
+
+    @property
+    def consumers(self) -> int:
+        return self._consumers
+
+
+# 전역 인스턴스
+microphone_source = MicrophoneSource()
+
+
+class CameraVideoTrack(VideoStreamTrack):
+    """
+    공유 캡처 엔진의 최신 프레임을 내보내는 영상 트랙
+
+    인코더가 밀리면 그 사이의 프레임은 건너뛰고 항상 가장 최신 프레임을 보낸다 (지연 누적 없음).
+    JPEG 디코딩은 이벤트 루프 밖에서 한다.
+    """
+
+    kind = "video"
+
+    def __init__(self, scale: int = WEBRTC_DEFAULT_SCALE):
+        super().__init__()
+        self.scale = scale
+        self._seq = 0
+        self._released = False
+        capture_engine.acquire()
+
+    async def recv(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.readyState != "live":
+                raise MediaStreamError
+            frame = await capture_engine.wait_for_frame(self._seq, WEBRTC_FRAME_TIMEOUT)
+            if frame is None:
+                continue
+            self._seq = frame.seq
+            bgr = await loop.run_in_executor(None, frame.get_bgr, self.scale)
+            if bgr is not None:
+                break
+        video_frame = av.VideoFrame.from_ndarray(bgr, format="bgr24")
+        video_frame.pts = int(frame.captured_at * VIDEO_CLOCK_RATE)
+        video_frame.time_base = VIDEO_TIME_BASE
+        return video_frame
+
+    def stop(self):
+        super().stop()
+        if not self._released:
+            self._released = True
+            capture_engine.release()
+
+
+class MicrophoneAudioTrack(MediaStreamTrack):
+    """
+    서버 마이크 오디오 트랙 - 마이크 청크가 늦으면 기다린 만큼 무음으로 채워 RTP 시각을 유지
+
+    항상 가장 최근 청크를 보내므로 송신이 밀리면 오디오를 쌓아 두지 않고 버린다.
+    """
+
+    kind = "audio"
+
+    def __init__(self):
+        super().__init__()
+        self._seq = 0
+        self._pts = 0
+        self._released = False
+        self._silence = bytes(int(AUDIO_RATE * AUDIO_WAIT_TIMEOUT) * 2)
+
+    async def recv(self):
+        if self.readyState != "live":
+            raise MediaStreamError
+        seq, data = await microphone_source.wait_chunk(self._seq)
+        if data is None:
+            data = self._silence
+        else:
+            self._seq = seq
+        audio_frame = av.AudioFrame(format="s16", layout="mono", samples=len(data) // 2)
+        audio_frame.planes[0].update(data)
+        audio_frame.sample_rate = AUDIO_RATE
+        audio_frame.pts = self._pts
+        audio_frame.time_base = AUDIO_TIME_BASE
+        self._pts += audio_frame.samples
+        return audio_frame
+
+    def stop(self):
+        super().stop()
+        if not self._released:
+            self._released = True
+            microphone_source.release()
+
+
+class WebRtcService:
+    """
+    WebRTC 피어 관리 - 오퍼를 받아 영상/오디오 트랙과 명령 데이터 채널이 붙은 앤서를 만든다
+
+    데이터 채널로 받은 메시지는 /ws와 같은 handle_command_async()로 처리하고
+    같은 형식의 JSON 응답을 채널로 돌려준다.
+    """
+
+    def __init__(self):
+        self.peers: Set = set()
+        self.sessions_started = 0
+        self.commands_handled = 0
+
+    @property
+    def available(self) -> bool:
+        return AIORTC_AVAILABLE
+
+    async def create_answer(self, sdp: str, sdp_type: str = "offer",
+                            scale: int = WEBRTC_DEFAULT_SCALE, audio: bool = True):
+        """오퍼 SDP → (피어, 앤서 SDP) - ICE 후보 수집이 끝난 앤서를 돌려줌 (trickle 없음)"""
+        pc = RTCPeerConnection()
+        self.peers.add(pc)
+        self.sessions_started += 1
+
+        @pc.on("datachannel")
+        def on_datachannel(channel):
+            logger.info(f"📨 WebRTC 데이터 채널 열림: {channel.label}")
+
+            @channel.on("message")
+            def on_message(message):
+                asyncio.ensure_future(self._handle_command(channel, message))
+
+        @pc.on("connectionstatechange")
+        async def on_connectionstatechange():
+            logger.info(f"🔗 WebRTC 연결 상태: {pc.connectionState}")
+            if pc.connectionState in ("failed", "closed"):
+                await self.close(pc)
+
+        # 협상이 실패하면(잘못된 SDP 등) 피어를 닫아 카메라/마이크 소비자를 바로 해제
+        tracks = []
+        try:
+            tracks.append(CameraVideoTrack(scale))
+            pc.addTrack(tracks[-1])
+            # 마이크 장치 열기(장치 나열 + PyAudio 열기)는 블로킹이므로 이벤트 루프 밖에서
+            loop = asyncio.get_running_loop()
+            if audio and await loop.run_in_executor(None, microphone_source.acquire):
+                tracks.append(MicrophoneAudioTrack())
+                pc.addTrack(tracks[-1])
+
+            await pc.setRemoteDescription(RTCSessionDescription(sdp=sdp, type=sdp_type))
+            await pc.setLocalDescription(await pc.createAnswer())
+        except Exception:
+            await self.close(pc)
+            # addTrack 전에 실패한 트랙도 해제 (stop()은 여러 번 호출해도 한 번만 해제)
+            for track in tracks:
+                track.stop()
+            raise
+        return pc, pc.localDescription.sdp
+
+    async def _handle_command(self, channel, message) -> None:
+        try:
+            command = json.loads(message)
+        except (json.JSONDecodeError, TypeError):
+            command = message
+        try:
+            success = await handle_command_async(command)
+            response = {
+                "success": success,
+                "command": command,
+                "message": "명령 처리 완료" if success else "명령 처리 실패",
+            }
+        except Exception as e:
+            logger.error(f"❌ WebRTC 명령 처리 중 예외: {e}")
+            response = {"success": False, "error": str(e), "command": command, "message": "명령 처리 중 예외"}
+        self.commands_handled += 1
+        if channel.readyState == "open":
+            channel.send(json.dumps(response, ensure_ascii=False))
+
+    async def close(self, pc) -> None:
+        """피어 종료 - 트랙을 멈춰 카메라/마이크 소비자를 해제"""
+        if pc not in self.peers:
+            return
+        self.peers.discard(pc)
+        for sender in pc.getSenders():
+            if sender.track is not None:
+                sender.track.stop()
+        await pc.close()
+        logger.info(f"🔌 WebRTC 피어 종료 (남은 피어 {len(self.peers)})")
+
+    async def close_all(self) -> None:
+        for pc in list(self.peers):
+            await self.close(pc)
+
+    def get_status(self) -> dict:
+        return {
+            "available": AIORTC_AVAILABLE,
+            "peers": len(self.peers),
+            "sessions_started": self.sessions_started,
+            "commands_handled": self.commands_handled,
+            "microphone_consumers": microphone_source.consumers,
+        }
+
+
+# 전역 인스턴스
+webrtc_service = WebRtcService()
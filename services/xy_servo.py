@@ -4,6 +4,7 @@ import asyncio
 import logging
 import time
 from typing import Optional
+from utils import hardware_events
 
 logger = logging.getLogger(__name__)
 
@@ -126,6 +127,8 @@ def _set_servo_angle_sync(angle: int, axis: str = "x"):
             logger.error(f"잘못된 축 지정: {axis}")
             return False
         
+        # 영상 오버레이의 레이저 조준점 갱신
+        hardware_events.emit(hardware_events.OVERLAY_UPDATE, laser_angles=(current_x_angle, current_y_angle))
         return True
         
     except Exception as e:
@@ -0,0 +1,16 @@
+# tests/conftest.py - 저장소 루트를 import 경로에 추가하고 카메라 없이 합성 영상으로 테스트
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def synthetic_camera(monkeypatch):
+    """공유 캡처 엔진을 합성 영상 소스로 전환 (/dev/video0 없이 실제 캡처 경로 실행)"""
+    pytest.importorskip("cv2")
+    from camera.capture_engine import capture_engine
+    monkeypatch.setattr(capture_engine, "device", "synthetic")
+    yield capture_engine
@@ -0,0 +1,29 @@
+# tests/test_camera_service.py - 비동기 카메라 서비스 (합성 영상 소스)
+import asyncio
+
+import pytest
+
+pytest.importorskip("cv2")
+
+from services.camera_service import AsyncCameraService
+
+
+@pytest.fixture
+def service(synthetic_camera):
+    synthetic_camera.acquire()
+    # 패스스루 프레임이 들어올 때까지 대기
+    assert synthetic_camera.wait_for_frame_sync(0, 5.0) is not None
+    yield AsyncCameraService()
+    synthetic_camera.release()
+
+
+def test_get_frame_jpeg_returns_bytes(service):
+    jpeg = asyncio.run(service.get_frame_jpeg())
+    assert isinstance(jpeg, bytes) and jpeg.startswith(b"\xff\xd8")
+
+
+def test_get_frame_jpeg_reencodes_requested_quality(service):
+    original = asyncio.run(service.get_frame_jpeg())
+    smaller = asyncio.run(service.get_frame_jpeg(quality=20))
+    assert isinstance(smaller, bytes) and smaller.startswith(b"\xff\xd8")
+    assert len(smaller) < len(original)
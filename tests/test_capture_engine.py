@@ -0,0 +1,237 @@
+# tests/test_capture_engine.py - 공유 캡처 엔진 (합성 영상 소스)
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("cv2")
+
+import camera.capture_engine as capture_engine_module
+from camera.capture_engine import (CaptureEngine, STATE_OPENING, STATE_RECONNECTING, STATE_STALLED,
+                                   STATE_STOPPED, STATE_STREAMING)
+from camera.synthetic_source import SyntheticCapture
+
+
+class FrameCounter:
+    """바운드 메서드 sink (녹화기/H.264 스트림과 같은 등록 방식)"""
+
+    def __init__(self):
+        self.frames = 0
+        self.received = threading.Event()
+
+    def on_frame(self, frame):
+        self.frames += 1
+        self.received.set()
+
+
+@pytest.fixture
+def engine():
+    engine = CaptureEngine(device="synthetic", fps=30)
+    engine.acquire()
+    yield engine
+    engine.release()
+
+
+def test_removed_sink_stops_receiving_frames(engine):
+    counter = FrameCounter()
+    engine.add_frame_sink(counter.on_frame)
+    assert counter.received.wait(5.0)
+
+    engine.remove_frame_sink(counter.on_frame)
+    assert engine._sinks == []
+    # 진행 중이던 콜백 한 번이 끝날 시간을 준 뒤 더 이상 늘지 않아야 함
+    time.sleep(0.1)
+    frames = counter.frames
+    assert engine.wait_for_frame_sync(engine.frame_seq, 2.0) is not None
+    time.sleep(0.2)
+    assert counter.frames == frames
+
+
+def test_sink_added_twice_is_removed_per_registration(engine):
+    counter = FrameCounter()
+    engine.add_frame_sink(counter.on_frame)
+    engine.remove_frame_sink(counter.on_frame)
+    engine.add_frame_sink(counter.on_frame)
+    assert len(engine._sinks) == 1
+    engine.remove_frame_sink(counter.on_frame)
+    assert engine._sinks == []
+
+
+def test_acquire_during_teardown_does_not_block():
+    engine = CaptureEngine(device="synthetic", fps=30)
+    engine.acquire()
+    assert engine.wait_for_frame_sync(0, 5.0) is not None
+    engine.release()
+
+    # 정리 스레드가 감시 스레드를 join하는 동안에도 acquire()는 바로 반환하고 캡처가 이어져야 함
+    started = time.monotonic()
+    engine.acquire()
+    try:
+        assert time.monotonic() - started < 0.1
+        assert engine.wait_for_frame_sync(engine.frame_seq, 5.0) is not None
+    finally:
+        engine.release()
+
+
+def wait_until(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class FaultyCapture:
+    """합성 소스에 장애를 주입 - fail이면 grab 실패(뽑힘), hang이면 grab이 멈춤(정지)"""
+
+    def __init__(self):
+        self.inner = SyntheticCapture()
+        self.fail = False
+        self.hang = threading.Event()
+        self.unhang = threading.Event()
+
+    def grab(self):
+        if self.hang.is_set():
+            self.unhang.wait(5.0)
+            return False
+        if self.fail:
+            return False
+        return self.inner.grab()
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+@pytest.fixture
+def faulty(monkeypatch):
+    """장치 열기를 가로챔 - 첫 시도는 열기 실패(None), 이후는 FaultyCapture (열린 순서대로 기록)"""
+    opens = []
+    monkeypatch.setattr(capture_engine_module, "REOPEN_BACKOFF_INITIAL", 0.05)
+    monkeypatch.setattr(capture_engine_module, "READ_ERROR_LIMIT", 3)
+
+    def open_capture(device):
+        opens.append(FaultyCapture() if opens else None)
+        return opens[-1]
+
+    monkeypatch.setattr(capture_engine_module, "open_capture", open_capture)
+    return opens
+
+
+def record_states(engine: CaptureEngine) -> list:
+    """엔진 상태 전이 기록"""
+    states = []
+    set_state = engine._set_state
+
+    def recording(state):
+        if state != engine._state:
+            states.append(state)
+        set_state(state)
+
+    engine._set_state = recording
+    return states
+
+
+def test_supervisor_retries_failed_open_then_streams(faulty):
+    engine = CaptureEngine(device="synthetic", fps=30)
+    assert engine.state == STATE_STOPPED
+    engine.acquire()
+    try:
+        # 첫 열기는 실패 - 블로킹 없이 opening 상태에서 백오프 후 재시도
+        assert engine.state == STATE_OPENING
+        assert engine.wait_for_frame_sync(0, 5.0) is not None
+        assert engine.open_failures == 1
+        assert engine.state == STATE_STREAMING
+    finally:
+        engine.release()
+    assert wait_until(lambda: not engine.is_running)
+    assert engine.state == STATE_STOPPED
+
+
+def test_supervisor_reopens_after_read_errors(faulty):
+    engine = CaptureEngine(device="synthetic", fps=30)
+    states = record_states(engine)
+    engine.acquire()
+    try:
+        assert engine.wait_for_frame_sync(0, 5.0) is not None
+        faulty[-1].fail = True
+        assert wait_until(lambda: (engine.last_error or "").startswith("연속 read 실패"))
+        assert engine.reconnects == 1
+        # 새 장치로 다시 열리면 프레임이 이어짐
+        assert engine.wait_for_frame_sync(engine.frame_seq, 5.0) is not None
+        assert engine.state == STATE_STREAMING
+        assert len(faulty) == 3
+        assert states == [STATE_OPENING, STATE_STREAMING, STATE_RECONNECTING, STATE_STREAMING]
+    finally:
+        engine.release()
+
+
+def test_supervisor_detects_stall_and_reconnects(faulty):
+    engine = CaptureEngine(device="synthetic", fps=30, stall_timeout=0.3)
+    engine.acquire()
+    try:
+        assert engine.wait_for_frame_sync(0, 5.0) is not None
+        stuck = faulty[-1]
+        stuck.hang.set()
+        # grab()이 멈춰 있는 동안에도 마지막 프레임 시각으로 정지를 보고
+        assert wait_until(lambda: engine.state == STATE_STALLED)
+        stuck.unhang.set()
+        assert wait_until(lambda: engine.reconnects == 1)
+        assert engine.stalls == 1
+        assert engine.wait_for_frame_sync(engine.frame_seq, 5.0) is not None
+        assert engine.state == STATE_STREAMING
+    finally:
+        engine.release()
+
+
+def test_negotiated_mode_before_open_uses_verified_mode(monkeypatch):
+    engine = CaptureEngine(device="synthetic", width=640, height=480, fps=30)
+    monkeypatch.setattr(capture_engine_module.camera_capabilities, "select_mode",
+                        lambda device, width, height, fps: {"fourcc": "MJPG", "width": 1280, "height": 720, "fps": 30})
+    # 장치를 열기 전에는 width/height가 아직 요청 값이어도 열 때 적용될 모드를 보고
+    assert (engine.width, engine.height) == (640, 480)
+    assert engine.negotiated_mode() == (1280, 720, 30)
+
+    monkeypatch.setattr(capture_engine_module.camera_capabilities, "select_mode", lambda *args: None)
+    assert engine.negotiated_mode() == (640, 480, 30)
+
+
+def test_engine_open_waits_for_probe_and_probe_stops(monkeypatch):
+    from camera import capability_probe
+    caps = capture_engine_module.camera_capabilities
+    monkeypatch.setattr(caps, "_cache", {})
+    monkeypatch.setattr(capability_probe, "list_modes", lambda device: [])
+    measuring = threading.Event()
+    in_benchmark = []
+    opened_during_benchmark = []
+
+    def benchmark(device, mode):
+        in_benchmark.append(mode)
+        measuring.set()
+        time.sleep(0.2)
+        in_benchmark.remove(mode)
+        return dict(mode, verified=False)
+
+    real_open = capture_engine_module.open_capture
+
+    def open_capture(device):
+        opened_during_benchmark.append(bool(in_benchmark))
+        return real_open(device)
+
+    monkeypatch.setattr(capability_probe, "benchmark_mode", benchmark)
+    monkeypatch.setattr(capture_engine_module, "open_capture", open_capture)
+    engine = CaptureEngine(device="synthetic", fps=30)
+    results = []
+    prober = threading.Thread(target=lambda: results.append(
+        caps.probe("/dev/video-test", 640, 480, 30, busy=lambda: engine.is_running)))
+    prober.start()
+    assert measuring.wait(5.0)
+    engine.acquire()
+    try:
+        assert engine.wait_for_frame_sync(0, 5.0) is not None
+        prober.join(5.0)
+        # 엔진은 측정 중인 모드가 끝난 뒤에 열고, 프로브는 다음 모드로 넘어가지 않고 중단
+        assert opened_during_benchmark == [False]
+        assert results == [None]
+    finally:
+        engine.release()
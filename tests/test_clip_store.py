@@ -0,0 +1,65 @@
+# tests/test_clip_store.py - 이벤트 클립 색인 조회 (썸네일/영상 파일 없이)
+import pytest
+
+from camera.clip_store import ClipStore
+
+
+def make_index(start_time: float, frames: int = 3) -> dict:
+    offsets = [
+        {"time": start_time + i * 0.1, "offset": i * 1000, "length": 1000}
+        for i in range(frames)
+    ]
+    return {
+        "start_time": start_time,
+        "end_time": start_time + (frames - 1) * 0.1,
+        "frame_count": frames,
+        "bytes": frames * 1000,
+        "frames": offsets,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ClipStore(str(tmp_path / "clips.db"))
+    yield store
+    store.close()
+
+
+def test_query_filters_by_time_and_event_type(store, tmp_path):
+    feed_id = store.add("feed", 100.0, str(tmp_path / "a.mjpeg"), make_index(100.0), None)
+    fire_id = store.add("fire", 200.0, str(tmp_path / "b.mjpeg"), make_index(200.0), b"thumb")
+
+    assert [clip["id"] for clip in store.query()] == [fire_id, feed_id]
+    assert [clip["id"] for clip in store.query(start=150.0)] == [fire_id]
+    assert [clip["id"] for clip in store.query(end=150.0)] == [feed_id]
+    assert [clip["id"] for clip in store.query(event_type="feed")] == [feed_id]
+    assert [clip["id"] for clip in store.query(limit=1)] == [fire_id]
+    assert store.thumbnail(fire_id) == b"thumb"
+    assert store.thumbnail(feed_id) is None
+
+
+def test_frame_offsets_round_trip(store, tmp_path):
+    path = str(tmp_path / "a.mjpeg")
+    clip_id = store.add("feed", 100.0, path, make_index(100.0, frames=4), None)
+
+    clip = store.get(clip_id, with_frames=True)
+    assert clip["frame_count"] == 4
+    assert [frame["offset"] for frame in clip["frames"]] == [0, 1000, 2000, 3000]
+    assert "frames" not in store.get(clip_id)
+
+    assert store.frame_location(clip_id, 2) == (path, 2000, 1000)
+    assert store.frame_location(clip_id, 4) is None
+    assert store.frame_location(clip_id, -1) is None
+    assert store.get(clip_id + 1) is None
+
+
+def test_remove_missing_drops_deleted_files(store, tmp_path):
+    kept = tmp_path / "kept.mjpeg"
+    kept.write_bytes(b"")
+    store.add("feed", 100.0, str(kept), make_index(100.0), None)
+    store.add("feed", 200.0, str(tmp_path / "gone.mjpeg"), make_index(200.0), None)
+
+    assert store.remove_missing() == 1
+    status = store.get_status()
+    assert status["clips"] == 1
+    assert status["bytes"] == 3000
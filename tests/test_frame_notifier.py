@@ -0,0 +1,50 @@
+# tests/test_frame_notifier.py - 프레임 시퀀스 대기/알림 (코루틴 + 스레드 소비자)
+import asyncio
+import threading
+
+from camera.frame_notifier import FrameNotifier
+
+
+def test_wait_returns_latest_immediately_when_newer():
+    notifier = FrameNotifier()
+    notifier.notify(3, "frame3")
+    assert notifier.wait_next_sync(1, timeout=0) == (3, "frame3")
+    assert asyncio.run(notifier.wait_next(2, timeout=0.1)) == (3, "frame3")
+
+
+def test_wait_times_out_without_new_frame():
+    notifier = FrameNotifier()
+    notifier.notify(3, "frame3")
+    assert notifier.wait_next_sync(3, timeout=0.01) == (3, None)
+    assert asyncio.run(notifier.wait_next(3, timeout=0.01)) == (3, None)
+    assert notifier._waiters == []
+
+
+def test_coroutine_wakes_on_notify_from_thread():
+    notifier = FrameNotifier()
+
+    async def main():
+        waiter = asyncio.ensure_future(notifier.wait_next(0, timeout=2))
+        await asyncio.sleep(0)
+        threading.Thread(target=notifier.notify, args=(1, "frame1")).start()
+        return await waiter
+
+    assert asyncio.run(main()) == (1, "frame1")
+
+
+def test_thread_wakes_on_notify():
+    notifier = FrameNotifier()
+    results = []
+    consumer = threading.Thread(target=lambda: results.append(notifier.wait_next_sync(0, timeout=2)))
+    consumer.start()
+    notifier.notify(1, "frame1")
+    consumer.join(2)
+    assert results == [(1, "frame1")]
+
+
+def test_clear_keeps_sequence():
+    notifier = FrameNotifier()
+    notifier.notify(5, "frame5")
+    notifier.clear()
+    assert notifier.latest() == (5, None)
+    assert notifier.wait_next_sync(0, timeout=0) == (0, None)
@@ -0,0 +1,54 @@
+# tests/test_h264_stream.py - H.264 스트림 입력 검증과 MP4 박스 분리 (ffmpeg 없이)
+import io
+import struct
+
+import pytest
+
+pytest.importorskip("cv2")
+
+from camera.h264_stream import H264Stream, validate_bitrate
+
+
+def box(box_type: bytes, payload: bytes = b"") -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+class FakeProcess:
+    """ffmpeg 대신 미리 만든 MP4 출력을 stdout으로 주는 프로세스"""
+
+    def __init__(self, output: bytes):
+        self.stdout = io.BytesIO(output)
+        self.returncode = 0
+
+    def wait(self):
+        return self.returncode
+
+
+OUTPUT = box(b"ftyp", b"isom") + box(b"moov", b"init") + box(b"moof", b"1") + box(b"mdat", b"gop1")
+
+
+def test_validate_bitrate():
+    assert validate_bitrate("300k") == 300_000
+    assert validate_bitrate("2M") == 2_000_000
+    for bad in ("", "300k\n", "-1", "1G", "9M", "0"):
+        with pytest.raises(ValueError):
+            validate_bitrate(bad)
+
+
+def test_read_output_splits_init_segment_and_fragments():
+    stream = H264Stream()
+    stream._generation = 1
+    stream._read_output(FakeProcess(OUTPUT), 1)
+    assert stream.init_segment == box(b"ftyp", b"isom") + box(b"moov", b"init")
+    assert stream.fragments_out == 1
+    assert stream._fragments.latest() == (1, box(b"moof", b"1") + box(b"mdat", b"gop1"))
+
+
+def test_read_output_drops_fragments_from_previous_process():
+    stream = H264Stream()
+    # 재시작 후 이전 세대 출력 스레드가 남은 출력을 내보내는 경우
+    stream._generation = 2
+    stream._read_output(FakeProcess(OUTPUT), 1)
+    assert stream.init_segment is None
+    assert stream.fragments_out == 0
+    assert stream._fragments.latest() == (0, None)
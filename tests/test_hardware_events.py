@@ -0,0 +1,44 @@
+# tests/test_hardware_events.py - 하드웨어 서비스 → 카메라 기능 이벤트 콜백 목록
+import pytest
+
+from utils import hardware_events
+
+EVENT = "test_event"
+
+
+@pytest.fixture(autouse=True)
+def clean_handlers():
+    yield
+    hardware_events._handlers.pop(EVENT, None)
+
+
+def test_emit_without_handlers_is_noop():
+    hardware_events.emit(EVENT, 1, key="value")
+
+
+def test_emit_calls_registered_handler_once():
+    calls = []
+
+    def handler(*args, **kwargs):
+        calls.append((args, kwargs))
+
+    hardware_events.register(EVENT, handler)
+    hardware_events.register(EVENT, handler)
+    hardware_events.emit(EVENT, "fire", laser_on=True)
+    assert calls == [(("fire",), {"laser_on": True})]
+
+    hardware_events.unregister(EVENT, handler)
+    hardware_events.emit(EVENT, "fire")
+    assert len(calls) == 1
+
+
+def test_failing_handler_does_not_reach_caller_or_block_others():
+    calls = []
+
+    def broken(*args):
+        raise RuntimeError("camera unavailable")
+
+    hardware_events.register(EVENT, broken)
+    hardware_events.register(EVENT, calls.append)
+    hardware_events.emit(EVENT, "feed")
+    assert calls == ["feed"]
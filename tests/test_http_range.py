@@ -0,0 +1,30 @@
+# tests/test_http_range.py - 클립 다운로드 Range 헤더 해석
+import pytest
+
+from utils.http_range import RangeNotSatisfiable, parse_range
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=500-", (500, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    # 끝이 파일보다 길면 파일 끝으로 잘림
+    ("bytes=900-5000", (900, 999)),
+])
+def test_single_range(header, expected):
+    assert parse_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header", [None, "", "bytes=0-10,20-30", "items=0-10", "bytes=a-b"])
+def test_unsupported_or_malformed_range_means_full_response(header):
+    assert parse_range(header, SIZE) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=50-10"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(RangeNotSatisfiable) as excinfo:
+        parse_range(header, SIZE)
+    assert str(excinfo.value) == f"bytes */{SIZE}"
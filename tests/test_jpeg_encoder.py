@@ -0,0 +1,40 @@
+# tests/test_jpeg_encoder.py - 인코더 백엔드 인터페이스와 최초 선택
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("cv2")
+
+from camera.jpeg_encoder import JpegEncoder, JpegEncoderBackend
+
+
+def test_backend_without_encode_cannot_be_created():
+    class Incomplete(JpegEncoderBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_concurrent_first_encode_benchmarks_once(monkeypatch):
+    encoder = JpegEncoder(backend="auto")
+    calls = []
+
+    def slow_benchmark(names):
+        calls.append(names)
+        time.sleep(0.05)
+        return {name: float(index) for index, name in enumerate(names)}
+
+    monkeypatch.setattr(encoder, "_benchmark", slow_benchmark)
+    image = encoder._benchmark_image()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(encoder.encode(image))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) <= 1
+    assert encoder.backend != "unselected"
+    assert all(jpeg and jpeg.startswith(b"\xff\xd8") for jpeg in results)
@@ -0,0 +1,54 @@
+# tests/test_latency_stats.py - 구간 히스토그램 백분위/창 만료
+from camera.latency_stats import LATENCY_STAGES, LatencyStats, RollingHistogram
+
+NOW = 1000.0
+
+
+def test_empty_snapshot():
+    snapshot = RollingHistogram(window_seconds=10).snapshot(NOW)
+    assert snapshot["samples"] == 0
+    assert snapshot["p50_ms"] == snapshot["p99_ms"] == 0.0
+
+
+def test_percentiles_use_bucket_upper_bounds():
+    histogram = RollingHistogram(window_seconds=10, buckets_ms=(1, 5, 10, 50))
+    # 90개는 3ms(<=5 버킷), 10개는 40ms(<=50 버킷)
+    for _ in range(90):
+        histogram.record(0.003, NOW)
+    for _ in range(10):
+        histogram.record(0.040, NOW)
+
+    snapshot = histogram.snapshot(NOW)
+    assert snapshot["samples"] == 100
+    assert snapshot["p50_ms"] == 5.0
+    assert snapshot["p95_ms"] == 40.0  # 버킷 상한(50)보다 관측 최댓값이 작음
+    assert snapshot["max_ms"] == 40.0
+    assert snapshot["avg_ms"] == 6.7
+    assert snapshot["histogram"] == {"<=1ms": 0, "<=5ms": 90, "<=10ms": 0, "<=50ms": 10, ">50ms": 0}
+
+
+def test_overflow_bucket_reports_observed_max():
+    histogram = RollingHistogram(window_seconds=10, buckets_ms=(1, 5))
+    histogram.record(0.250, NOW)
+    snapshot = histogram.snapshot(NOW)
+    assert snapshot["p99_ms"] == 250.0
+    assert snapshot["histogram"][">5ms"] == 1
+
+
+def test_old_samples_expire_from_window():
+    histogram = RollingHistogram(window_seconds=3)
+    histogram.record(0.010, NOW)
+    histogram.record(0.020, NOW + 1)
+    assert histogram.snapshot(NOW + 2)["samples"] == 2
+    assert histogram.snapshot(NOW + 3)["samples"] == 1
+    assert histogram.snapshot(NOW + 4)["samples"] == 0
+
+
+def test_latency_stats_status_has_every_stage():
+    stats = LatencyStats()
+    stats.record("encode", 0.002)
+    stats.record("custom_stage", 0.001)
+    stages = stats.get_status()["stages"]
+    assert set(LATENCY_STAGES) <= set(stages)
+    assert stages["encode"]["samples"] == 1
+    assert stages["custom_stage"]["samples"] == 1
@@ -0,0 +1,53 @@
+# tests/test_stream_control.py - 시청자별 적응형 화질/fps 단계
+from camera.stream_control import (
+    LADDER_TOP_QUALITY, QUALITY_STEP, STEP_DOWN_AFTER, STEP_UP_AFTER,
+    AdaptiveStreamController, ViewerSession, build_ladder,
+)
+
+
+def test_ladder_lowers_quality_before_fps():
+    ladder = build_ladder(80, 30, min_quality=50, min_fps=5)
+    assert ladder == [(80, 30), (65, 30), (50, 30), (50, 15), (50, 7.5)]
+
+
+def test_ladder_from_original_quality():
+    ladder = build_ladder(None, 30)
+    assert ladder[0] == (None, 30)
+    assert ladder[1] == (LADDER_TOP_QUALITY - QUALITY_STEP, 30)
+
+
+def test_controller_steps_down_after_slow_sends_and_back_up():
+    controller = AdaptiveStreamController(max_quality=80, max_fps=30)
+    budget = controller.frame_interval
+
+    for _ in range(STEP_DOWN_AFTER - 1):
+        assert not controller.record_send(50_000, budget * 2)
+    assert controller.record_send(50_000, budget * 2)
+    assert controller.level == 1
+    assert controller.quality == 65
+
+    changed = [controller.record_send(10_000, budget * 0.01) for _ in range(STEP_UP_AFTER * 2)]
+    assert changed.count(True) == 1
+    assert controller.level == 0
+    assert (controller.step_downs, controller.step_ups) == (1, 1)
+
+
+def test_controller_stays_on_lowest_step():
+    controller = AdaptiveStreamController(max_quality=30, max_fps=6)
+    for _ in range(STEP_DOWN_AFTER * 10):
+        controller.record_send(50_000, 10.0)
+    assert controller.level == len(controller.ladder) - 1
+    assert controller.fps == 3
+
+
+def test_viewer_session_counts_skipped_frames():
+    session = ViewerSession("test", AdaptiveStreamController(max_fps=10))
+    assert session.accept(1, now=10.0)
+    session.sent(1000, now=10.0, seconds=0.001)
+    # 2~4번은 시청자가 받지 못하고 건너뜀
+    assert session.accept(5, now=10.2)
+    session.sent(1000, now=10.2, seconds=0.001)
+    # fps 단계 간격(0.1초)보다 빨리 온 프레임은 보내지 않음
+    assert not session.accept(6, now=10.21)
+    assert session.frames_skipped == 4
+    assert session.frames_sent == 2
@@ -0,0 +1,61 @@
+# tests/test_webrtc.py - WebRTC 루프백과 시그널링 (aiortc 없으면 건너뜀)
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("aiortc")
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from aiortc import RTCPeerConnection, RTCSessionDescription
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers.ws_webrtc_router import router
+from services.webrtc_service import webrtc_service
+
+
+async def loopback_first_frame(scale: int):
+    """같은 프로세스의 클라이언트 피어로 오퍼/앤서를 주고받고 첫 영상 프레임 크기 반환"""
+    client = RTCPeerConnection()
+    client.addTransceiver("video", direction="recvonly")
+    first_frame = asyncio.get_running_loop().create_future()
+
+    @client.on("track")
+    def on_track(track):
+        async def consume():
+            frame = await track.recv()
+            if not first_frame.done():
+                first_frame.set_result((frame.width, frame.height))
+        asyncio.ensure_future(consume())
+
+    await client.setLocalDescription(await client.createOffer())
+    server_pc, answer = await webrtc_service.create_answer(client.localDescription.sdp, "offer", scale, False)
+    try:
+        await client.setRemoteDescription(RTCSessionDescription(sdp=answer, type="answer"))
+        return await asyncio.wait_for(first_frame, timeout=10)
+    finally:
+        await client.close()
+        await webrtc_service.close(server_pc)
+
+
+def test_loopback_receives_video(synthetic_camera):
+    assert asyncio.run(loopback_first_frame(2)) == (320, 240)
+    assert webrtc_service.get_status()["peers"] == 0
+
+
+def test_signalling_ignores_malformed_messages(synthetic_camera):
+    app = FastAPI()
+    app.include_router(router)
+    with TestClient(app) as client, client.websocket_connect("/ws/webrtc") as websocket:
+        websocket.send_text("not json")
+        websocket.send_text(json.dumps(["offer"]))
+        # 시그널링 루프가 살아 있으면 잘못된 오퍼에 에러로 응답
+        websocket.send_text(json.dumps({"type": "offer", "sdp": "invalid"}))
+        reply = json.loads(websocket.receive_text())
+        assert reply["type"] == "error"
+        # 실패한 협상은 피어를 남기지 않음
+        assert webrtc_service.get_status()["peers"] == 0
+        websocket.send_text(json.dumps({"type": "bye"}))
@@ -0,0 +1,50 @@
+# tests/test_ws_video.py - /ws/video 바이너리 영상 채널
+import json
+
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers.ws_video_router import router, FRAME_HEADER, CODEC_JPEG
+
+
+@pytest.fixture
+def client(synthetic_camera):
+    app = FastAPI()
+    app.include_router(router)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_ws_video_delivers_frame(client):
+    with client.websocket_connect("/ws/video?size=full") as websocket:
+        message = websocket.receive_bytes()
+        _, codec, seq, timestamp, width, height = FRAME_HEADER.unpack_from(message)
+        assert codec == CODEC_JPEG
+        assert seq >= 1 and timestamp > 0
+        assert (width, height) == (640, 480)
+        assert message[FRAME_HEADER.size:].startswith(b"\xff\xd8")
+
+        # ack 후 다음 프레임도 계속 받는지
+        websocket.send_text(json.dumps({"type": "ack", "seq": seq}))
+        _, _, next_seq, _, _, _ = FRAME_HEADER.unpack_from(websocket.receive_bytes())
+        assert next_seq > seq
+
+
+def test_ws_video_ignores_malformed_ack(client):
+    with client.websocket_connect("/ws/video?size=full") as websocket:
+        _, _, seq, _, _, _ = FRAME_HEADER.unpack_from(websocket.receive_bytes())
+
+        # 잘못된 ack/config는 무시하고 소켓을 유지해야 함
+        websocket.send_text(json.dumps({"type": "ack", "seq": "abc"}))
+        websocket.send_text(json.dumps({"type": "ack"}))
+        websocket.send_text(json.dumps({"type": "config", "max_outstanding": None}))
+        websocket.send_text(json.dumps(["ack"]))
+        websocket.send_text(json.dumps({"type": "ack", "seq": seq}))
+        _, _, next_seq, _, _, _ = FRAME_HEADER.unpack_from(websocket.receive_bytes())
+        assert next_seq > seq
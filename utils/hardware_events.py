@@ -0,0 +1,42 @@
+# utils/hardware_events.py
+# 하드웨어 서비스 → 카메라 기능(오버레이, 이벤트 클립, 녹화) 이벤트 전달용 콜백 목록
+# 레이저/서보/급식 등 GPIO 서비스가 카메라 모듈(cv2/numpy, 캡처 엔진)을 import하지 않도록
+# 카메라 모듈이 import될 때 자기 훅을 등록하고, 서비스는 emit()만 호출한다.
+# 카메라 모듈이 로드되지 않았으면(OpenCV 없음 등) 이벤트는 아무 일도 하지 않는다.
+import logging
+import threading
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# 이벤트 종류
+OVERLAY_UPDATE = "overlay_update"    # 키워드 인자: distance_cm, laser_on, laser_angles
+EVENT_CLIP = "event_clip"            # 인자: 이벤트 종류 ("fire", "feed", "laser")
+RECORDING_START = "recording_start"  # 인자: 녹화 라벨
+RECORDING_STOP = "recording_stop"
+
+_lock = threading.Lock()
+_handlers: Dict[str, List[Callable[..., None]]] = {}
+
+
+def register(event: str, handler: Callable[..., None]) -> None:
+    """이벤트 훅 등록 (같은 훅을 여러 번 등록해도 한 번만 호출)"""
+    with _lock:
+        handlers = _handlers.get(event, [])
+        if handler not in handlers:
+            # 목록은 통째로 교체 - emit()이 잠금 없이 순회
+            _handlers[event] = handlers + [handler]
+
+
+def unregister(event: str, handler: Callable[..., None]) -> None:
+    with _lock:
+        _handlers[event] = [registered for registered in _handlers.get(event, []) if registered != handler]
+
+
+def emit(event: str, *args, **kwargs) -> None:
+    """등록된 훅 호출 - 훅의 실패가 하드웨어 제어에 영향을 주지 않도록 예외를 삼킴"""
+    for handler in _handlers.get(event, ()):
+        try:
+            handler(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"⚠️ 이벤트 훅 실패 ({event}): {e}")
@@ -0,0 +1,37 @@
+# utils/http_range.py
+# HTTP Range 헤더(단일 바이트 구간) 해석 - 클립 다운로드 라우터용 (웹 프레임워크 의존 없음)
+from typing import Optional, Tuple
+
+
+class RangeNotSatisfiable(ValueError):
+    """요청 구간이 파일 범위를 벗어남 (416)"""
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Range 헤더(bytes=a-b, bytes=a-, bytes=-n)를 [start, end]로 변환
+
+    헤더가 없거나 해석할 수 없거나 여러 구간이면 None (전체 응답),
+    범위를 벗어나면 RangeNotSatisfiable.
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        # 여러 구간 요청은 지원하지 않음 - 전체 응답
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # 마지막 n바이트
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise RangeNotSatisfiable(f"bytes */{size}")
+    return start, end
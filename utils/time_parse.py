@@ -0,0 +1,12 @@
+# utils/time_parse.py
+# 쿼리 파라미터의 ISO 시각을 epoch 초로 변환하는 유틸리티 (타임랩스/클립 라우터 공용)
+from datetime import datetime
+from fastapi import HTTPException
+
+
+def parse_time(value: str) -> float:
+    """ISO 형식 시각(예: 2025-01-01T22:00)을 epoch 초로 변환 (형식 오류는 400)"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"시각 형식 오류: {value} (예: 2025-01-01T22:00)")
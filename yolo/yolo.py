@@ -1,43 +1,160 @@
+# yolo/yolo.py - 사람 감지 (YOLOv5n)
+#
+# 서버 안에서: main.py가 YOLO_ENABLED일 때 yolo_detector.start()로 실행하며,
+#   공유 캡처 엔진의 프레임 버스에서 BGR 프레임을 받는다 (카메라를 따로 열지 않음).
+# 단독 실행(python yolo/yolo.py): 카메라는 서버가 쓰고 있으므로 서버의 /mjpeg 스트림을
+#   별도 프로세스에서 읽어 감지 결과를 화면에 띄운다 (디버깅용).
+import sys
+import time
+import threading
+import logging
+from typing import List, Optional
+
 import cv2
-import torch
 
-# 1. YOLO 모델 설정
-device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')  # GPU 사용 가능하면 사용, 아니면 CPU 사용
-model = torch.hub.load('ultralytics/yolov5', 'yolov5n', pretrained=True, device=device)  # yolov5n 모델 사용
-model.classes = [0]  # COCO 데이터셋에서 사람(0) 클래스만 사용
-model.conf = 0.25  # 객체 탐지 신뢰도 임계값
-model.iou = 0.45  # NMS IoU 임계값
-model.eval() # 평가 모드로 설정
-
-# 2. OpenCV 최적화
-cv2.setUseOptimized(True)
-cv2.setNumThreads(4)  # 라즈베리 파이의 코어 수에 맞춰 스레드 수 설정
-
-# 3. 카메라 설정
-cap = cv2.VideoCapture(0)  # 0번 카메라 사용 (라즈베리 파이 카메라 모듈)
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1600)  # 해상도 너비 설정
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 900)  # 해상도 높이 설정
-cap.set(cv2.CAP_PROP_FPS, 60)  # 프레임 속도 설정
-
-# 4. 프레임 건너뛰기 설정
-frame_count = 0
-skip_frames = 1  # 1 프레임마다 하나씩 건너뜀 (총 2프레임당 1프레임 처리)
-
-# 5. 메인 루프
 try:
-    with torch.no_grad(): # 기울기 계산 비활성화
-        while True:
-            # 프레임 읽기
-            ret, frame = cap.read()
-            if not ret:
-                break
+    import torch
+except ImportError:
+    # torch는 선택 의존성 - 없으면 감지기를 시작하지 않음
+    torch = None
+
+logger = logging.getLogger(__name__)
+
+# 1. YOLO 모델 설정
+YOLO_ENABLED = False          # 서버 시작 시 감지기 실행 여부 (torch 필요)
+YOLO_MODEL = 'yolov5n'        # yolov5n 모델 사용
+YOLO_CLASSES = [0]            # COCO 데이터셋에서 사람(0) 클래스만 사용
+YOLO_CONF = 0.25              # 객체 탐지 신뢰도 임계값
+YOLO_IOU = 0.45               # NMS IoU 임계값
+YOLO_THREADS = 4              # 라즈베리 파이의 코어 수에 맞춰 스레드 수 설정
+
+# 2. 프레임 설정
+# 해상도는 캡처 엔진 설정(CAMERA_WIDTH/HEIGHT)을 따르고, 모델 입력 크기로의 리사이즈는 YOLO가 함
+# 기존의 "2프레임당 1프레임 처리"는 최대 fps로 대신함 (프레임 버스가 캡처 스레드에서 솎아 줌)
+YOLO_MAX_FPS = 15
+FRAME_TIMEOUT = 5.0
+# 단독 실행 시 읽을 서버 스트림
+YOLO_STREAM_URL = "http://127.0.0.1:8000/mjpeg?size=full"
+
+
+def load_model():
+    """YOLO 모델 로드 (GPU 사용 가능하면 사용, 아니면 CPU 사용)"""
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    model = torch.hub.load('ultralytics/yolov5', YOLO_MODEL, pretrained=True, device=device)
+    model.classes = YOLO_CLASSES
+    model.conf = YOLO_CONF
+    model.iou = YOLO_IOU
+    model.eval()  # 평가 모드로 설정
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(YOLO_THREADS)
+    return model
+
+
+class YoloDetector:
+    """
+    서버 프로세스 안에서 도는 사람 감지기
+
+    프레임 버스 구독 하나로 캡처 엔진을 공유하며, 감지 스레드가 최신 프레임만 처리한다
+    (처리가 느리면 그 사이 프레임은 건너뜀). 결과는 get_status()로 조회한다.
+    """
 
-            frame_count += 1
+    def __init__(self, max_fps: float = YOLO_MAX_FPS):
+        self.max_fps = max_fps
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.frames = 0
+        self.last_detections: List[dict] = []
+        self.last_detected_at: Optional[float] = None
+        self.last_error: Optional[str] = None
 
-            # 프레임 건너뛰기
-            if frame_count % (skip_frames + 1) == 0:
-                # 6. 이미지 전처리 최적화
-                frame = cv2.resize(frame, (1600, 900), interpolation=cv2.INTER_AREA)
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        if torch is None:
+            logger.warning("⚠️ torch 없음 - YOLO 감지기 사용 불가")
+            return False
+        if self.is_running:
+            return True
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,), daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=FRAME_TIMEOUT + 1)
+        self._thread = None
+
+    def _run(self, stop_event: threading.Event) -> None:
+        # 서버 안에서만 쓰는 의존성 (단독 실행 경로에서는 캡처 엔진을 만들지 않도록 지연 import)
+        from camera.frame_bus import frame_bus, FrameFormat, FORMAT_BGR
+
+        try:
+            model = load_model()
+        except Exception as e:
+            self.last_error = f"모델 로드 실패: {e}"
+            logger.error(f"❌ YOLO {self.last_error}")
+            return
+        logger.info(f"🧠 YOLO 감지기 시작 ({YOLO_MODEL}, 최대 {self.max_fps}fps)")
+        with frame_bus.subscribe("yolo", FrameFormat(FORMAT_BGR), max_fps=self.max_fps) as subscription:
+            with torch.no_grad():  # 기울기 계산 비활성화
+                while not stop_event.is_set():
+                    # 읽기 전용 배열 - 다른 구독자와 공유되므로 수정 금지
+                    bus_frame = subscription.read(timeout=1.0)
+                    if bus_frame is None:
+                        continue
+                    try:
+                        # 모델이 입력 이미지에 결과를 그릴 수 있으므로 쓰기 가능한 복사본 전달
+                        results = model(bus_frame.data.copy())
+                    except Exception as e:
+                        self.last_error = str(e)
+                        logger.error(f"❌ YOLO 감지 실패: {e}")
+                        continue
+                    self.frames += 1
+                    self.last_detections = [
+                        {"box": [round(float(v), 1) for v in row[:4]], "confidence": round(float(row[4]), 3)}
+                        for row in results.xyxy[0].tolist()
+                    ]
+                    if self.last_detections:
+                        self.last_detected_at = bus_frame.captured_wall
+        logger.info("🧠 YOLO 감지기 종료")
+
+    def get_status(self) -> dict:
+        return {
+            "running": self.is_running,
+            "frames": self.frames,
+            "detections": self.last_detections,
+            "last_detected_at": self.last_detected_at,
+            "last_error": self.last_error,
+        }
+
+
+# 전역 인스턴스
+yolo_detector = YoloDetector()
+
+
+def main(url: str = YOLO_STREAM_URL) -> None:
+    """단독 실행 - 서버의 MJPEG 스트림을 읽어 감지 결과 표시 (카메라 장치는 열지 않음)"""
+    if torch is None:
+        print("torch가 설치되어 있지 않음")
+        return
+    model = load_model()
+    cap = cv2.VideoCapture(url)
+    try:
+        with torch.no_grad():  # 기울기 계산 비활성화
+            last_at = 0.0
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                # 최대 fps로 솎아서 처리
+                now = time.monotonic()
+                if now - last_at < 1.0 / YOLO_MAX_FPS:
+                    continue
+                last_at = now
 
                 # YOLO 모델로 객체 감지
                 results = model(frame)
@@ -45,11 +162,14 @@ try:
                 # Show the results
                 cv2.imshow('YOLO', results.render()[0])
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+    except KeyboardInterrupt:
+        print("Program stopped")
+    finally:
+        cap.release()
+        cv2.destroyAllWindows()
+
 
-except KeyboardInterrupt:
-    print("Program stopped")
-finally:
-    cap.release()
-    cv2.destroyAllWindows()
\ No newline at end of file
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else YOLO_STREAM_URL)